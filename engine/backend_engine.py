@@ -1,9 +1,76 @@
+import bisect
 import json
-from typing import Dict, List
+import heapq
+import math
+import time
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 
+from engine_metrics import EngineMetrics
+from engine_snapshot import restore_snapshot, write_snapshot
+
+MARKETS = ['ft_hdp', 'ft_ou', 'ht_hdp', 'ht_ou']
+
+# 1 / price for every two-decimal price up to 100.00, indexed by price in cents
+IMPLIED_PROB_TABLE = [0.0] + [100.0 / cents for cents in range(1, 10001)]
+
+
+def implied_probability(price: float) -> float:
+    cents = int(price * 100 + 0.5)
+    if cents < len(IMPLIED_PROB_TABLE) and abs(price * 100 - cents) < 1e-6:
+        return IMPLIED_PROB_TABLE[cents]
+    return 1 / price
+
+
+def to_decimal_odds(price: float, odds_format: str = 'decimal') -> Optional[float]:
+    """Convert a provider price to decimal odds (decimal, hk, malay, indo or american)"""
+    if not price:
+        return None
+    if odds_format == 'hk':
+        decimal = price + 1
+    elif odds_format == 'malay':
+        decimal = price + 1 if price > 0 else 1 - 1 / price
+    elif odds_format == 'indo':
+        decimal = price + 1 if price >= 1 else 1 - 1 / price
+    elif odds_format == 'american':
+        decimal = price / 100 + 1 if price > 0 else 100 / -price + 1
+    else:
+        decimal = price
+    return round(decimal, 4) if decimal > 0 else None
+
+
+def parse_odds_formats(value: str) -> Dict[str, str]:
+    """"C-Sport=malay,nova=indo" -> {'C-Sport': 'malay', 'nova': 'indo'}"""
+    formats = {}
+    for item in value.split(','):
+        if '=' in item:
+            provider, odds_format = item.split('=', 1)
+            formats[provider.strip()] = odds_format.strip().lower()
+    return formats
+
+
+def parse_match_clock(time_str: str) -> Tuple[int, int]:
+    """Parse a live clock like '1H 3', '2H 10', 'HT' or '67' into (half, match minute)"""
+    if not time_str:
+        return 0, 0
+    try:
+        parts = time_str.split()
+        if parts[0].upper() == 'HT':
+            return 1, 45
+        if 'H' in parts[0]:
+            half = int(parts[0].replace('H', ''))
+            minute = int(parts[1]) if len(parts) > 1 else 0
+            return half, minute + (half - 1) * 45
+        minute = int(time_str)
+        return (1 if minute <= 45 else 2), minute
+    except:
+        return 0, 0
+
+
 class EventMatcher:
-    def __init__(self):
+    def __init__(self, odds_formats: Dict = None):
+        self.odds_formats = odds_formats or {}
         self.team_aliases = {
             'manchester united': ['man united', 'man u'],
             'manchester city': ['man city'],
@@ -12,6 +79,7 @@ class EventMatcher:
             'galatasaray': [],
             'sporting': ['sporting lisbon'],
         }
+        self.alias_cache = {}
     
     def normalize_team_name(self, name: str) -> str:
         if not name:
@@ -22,21 +90,46 @@ class EventMatcher:
         return name
     
     def find_team_canonical(self, norm: str) -> str:
-        if norm in self.team_aliases:
-            return norm
-        for canonical, aliases in self.team_aliases.items():
-            if norm in aliases:
-                return canonical
-        return norm
+        cached = self.alias_cache.get(norm)
+        if cached is not None:
+            return cached
+        canonical = norm
+        if norm not in self.team_aliases:
+            for candidate, aliases in self.team_aliases.items():
+                if norm in aliases:
+                    canonical = candidate
+                    break
+        self.alias_cache[norm] = canonical
+        return canonical
+    
+    def match_signature(self, home_norm: str, away_norm: str) -> str:
+        teams_sorted = sorted([self.find_team_canonical(home_norm), self.find_team_canonical(away_norm)])
+        return f"{teams_sorted[0]}_{teams_sorted[1]}"
     
     def normalize_match(self, match: Dict) -> Dict:
         home_norm = self.normalize_team_name(match.get('home_team', ''))
         away_norm = self.normalize_team_name(match.get('away_team', ''))
-        home_can = self.find_team_canonical(home_norm)
-        away_can = self.find_team_canonical(away_norm)
-        teams_sorted = sorted([home_can, away_can])
-        sig = f"{teams_sorted[0]}_{teams_sorted[1]}"
-        return {'home_norm': home_norm, 'away_norm': away_norm, 'signature': sig, 'provider': match.get('provider'), 'odds': match.get('odds')}
+        sig = self.match_signature(home_norm, away_norm)
+        half, minute = parse_match_clock(match.get('time', ''))
+        return {
+            'home_norm': home_norm, 'away_norm': away_norm, 'signature': sig, 'provider': match.get('provider'),
+            'odds': match.get('odds'), 'received_at': match.get('received_at'), 'league': match.get('league'),
+            'half': half, 'minute': minute,
+            'prices': self.precompute_prices(match.get('odds'), self.odds_formats.get(match.get('provider'), 'decimal'))
+        }
+    
+    def precompute_prices(self, odds: Dict, odds_format: str) -> Dict:
+        """Per market: (raw price, decimal price, implied probability) for the home/over and away/under legs"""
+        prices = {}
+        for market, sides in (odds or {}).items():
+            if not isinstance(sides, dict):
+                continue
+            legs = {}
+            for leg, raw in (('home', sides.get('home') or sides.get('over')), ('away', sides.get('away') or sides.get('under'))):
+                decimal = to_decimal_odds(raw, odds_format)
+                legs[leg] = (raw, decimal, implied_probability(decimal)) if decimal else None
+            prices[market] = legs
+        return prices
     
     def match_events(self, data: Dict) -> Dict:
         grouped = {}
@@ -59,86 +152,140 @@ class ArbitrageDetector:
             'minute_limit_ht': 35,
             'minute_limit_ft': 75,
             'market_filter': {'ft_hdp': True, 'ft_ou': True, 'ht_hdp': True, 'ht_ou': True},
-            'round_off': 5
+            'round_off': 5,
+            'quote_max_age': 30,
+            'quote_max_age_by_provider': {},
+            'max_leg_skew': None,
+            # 'raw' keeps the legacy rules on unconverted prices (margin = total implied - 1,
+            # bounded by min/max_percent); 'decimal' is set once provider odds formats are
+            # configured: best price per side, margin = 1 - total implied (the arb's profit)
+            'price_mode': 'raw',
+            'min_profit_percent': 0,
+            'max_profit_percent': 10
         }
+        self.markets_evaluated = 0
+    
+    def decimal_prices(self) -> bool:
+        return self.settings.get('price_mode', 'raw') == 'decimal'
+    
+    def total_bounds(self) -> Tuple[float, float]:
+        """(min, max) total implied probability a leg pair must fall within to qualify"""
+        if self.decimal_prices():
+            return 1 - self.settings.get('max_profit_percent', 10) / 100, 1 - self.settings.get('min_profit_percent', 0) / 100
+        return 1 + self.settings['min_percent'] / 100, 1 + self.settings['max_percent'] / 100
+    
+    def margin_from_total(self, total_implied: float) -> float:
+        if self.decimal_prices():
+            return round((1 - total_implied) * 100, 2)
+        return round((total_implied - 1) * 100, 2)
     
     def parse_time_to_minutes(self, time_str: str) -> int:
-        if not time_str:
-            return 0
-        try:
-            parts = time_str.split()
-            if 'H' in time_str:
-                h = int(parts[0].replace('H', ''))
-                m = int(parts[1]) if len(parts) > 1 else 0
-                return h * 60 + m
-            return int(time_str)
-        except:
-            return 0
+        return parse_match_clock(time_str)[1]
     
     def apply_time_filter(self, match_info: Dict) -> bool:
-        time_str = match_info.get('time', '')
-        minutes = self.parse_time_to_minutes(time_str)
-        is_ht = minutes < 45
-        limit = self.settings['minute_limit_ht'] if is_ht else self.settings['minute_limit_ft']
-        return minutes <= limit
+        half, minute = match_info.get('half'), match_info.get('minute')
+        if minute is None:
+            half, minute = parse_match_clock(match_info.get('time', ''))
+        limit = self.settings['minute_limit_ht'] if half <= 1 else self.settings['minute_limit_ft']
+        return minute <= limit
     
     def calculate_margin(self, odds1: float, odds2: float) -> float:
         if not odds1 or not odds2 or odds1 <= 0 or odds2 <= 0:
             return None
-        try:
-            total_implied = (1 / odds1) + (1 / odds2)
-            margin = (total_implied - 1) * 100
-            return round(margin, 2)
-        except:
-            return None
+        total_implied = implied_probability(odds1) + implied_probability(odds2)
+        return round((total_implied - 1) * 100, 2)
     
     def check_market_filter(self, market: str) -> bool:
         return self.settings['market_filter'].get(market, False)
     
+    def select_legs(self, home_overs: List[Dict], away_unders: List[Dict], min_total: float = -math.inf,
+                    max_total: float = math.inf) -> Optional[Tuple[Dict, Dict]]:
+        """
+        Best-margin leg pair from two providers whose total implied probability lies in
+        [min_total, max_total] and, with max_leg_skew set, whose quotes were received
+        within max_leg_skew seconds of each other
+        """
+        max_skew = self.settings.get('max_leg_skew')
+        decimal_prices = self.decimal_prices()
+        best, best_total = None, None
+        for home in home_overs:
+            for away in away_unders:
+                if home['provider'] == away['provider']:
+                    continue
+                if max_skew is not None:
+                    if home['received_at'] is None or away['received_at'] is None:
+                        continue
+                    if abs(home['received_at'] - away['received_at']) > max_skew:
+                        continue
+                total = home['prob'] + away['prob']
+                if total < min_total or total > max_total:
+                    continue
+                # The margin grows as the total falls on decimal prices, and with it on raw ones
+                if best is None or (total < best_total if decimal_prices else total > best_total):
+                    best, best_total = (home, away), total
+        return best
+    
     def detect_opportunities(self, grouped_matches: Dict) -> List[Dict]:
-        opportunities = []
+        return list(self.iter_opportunities(grouped_matches))
+    
+    def top_opportunities(self, grouped_matches: Dict, k: int) -> Iterator[Dict]:
+        """Yield the k highest-margin opportunities, best first, keeping only a k-sized heap"""
+        heap = []
+        for seq, opportunity in enumerate(self.iter_opportunities(grouped_matches)):
+            entry = (opportunity['margin'], -seq, opportunity)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+        for _, _, opportunity in sorted(heap, reverse=True):
+            yield opportunity
+    
+    def iter_opportunities(self, grouped_matches: Dict) -> Iterator[Dict]:
+        """Yield opportunities as soon as each market qualifies"""
+        # Margin bounds in implied-probability space, so each pair costs one addition
+        min_total, max_total = self.total_bounds()
         for match_sig, event_data in grouped_matches.items():
             providers = event_data['providers']
             if len(providers) < 2:
                 continue
             
             match_info = event_data['match_info']
-            for market in ['ft_hdp', 'ft_ou', 'ht_hdp', 'ht_ou']:
+            if not self.apply_time_filter(match_info):
+                continue
+            
+            for market in MARKETS:
                 if not self.check_market_filter(market):
                     continue
-                
-                odds_by_provider = {}
-                for provider, match_data in providers.items():
-                    odds = match_data.get('odds', {}).get(market)
-                    if odds:
-                        odds_by_provider[provider] = odds
-                
-                if len(odds_by_provider) < 2:
-                    continue
+                self.markets_evaluated += 1
                 
                 home_overs = []
                 away_unders = []
+                quoted = 0
                 
-                for provider, odds in odds_by_provider.items():
-                    home_val = odds.get('home') or odds.get('over')
-                    away_val = odds.get('away') or odds.get('under')
-                    if home_val:
-                        home_overs.append({'value': home_val, 'provider': provider})
-                    if away_val:
-                        away_unders.append({'value': away_val, 'provider': provider})
+                for provider, match_data in providers.items():
+                    legs = match_data['prices'].get(market)
+                    if not legs:
+                        continue
+                    quoted += 1
+                    received_at = match_data.get('received_at')
+                    if legs['home']:
+                        raw, decimal, prob = legs['home']
+                        home_overs.append({'value': raw, 'decimal': decimal, 'prob': prob, 'provider': provider, 'received_at': received_at})
+                    if legs['away']:
+                        raw, decimal, prob = legs['away']
+                        away_unders.append({'value': raw, 'decimal': decimal, 'prob': prob, 'provider': provider, 'received_at': received_at})
                 
-                if not home_overs or not away_unders:
+                if quoted < 2 or not home_overs or not away_unders:
                     continue
                 
-                home_overs.sort(key=lambda x: x['value'])
-                away_unders.sort(key=lambda x: x['value'], reverse=True)
-                
-                best_home = home_overs[0]
-                best_away = away_unders[0]
-                
-                margin = self.calculate_margin(best_home['value'], best_away['value'])
+                pair = self.select_legs(home_overs, away_unders, min_total, max_total)
+                if not pair:
+                    continue
+                best_home, best_away = pair
                 
-                if not margin or margin < self.settings['min_percent'] or margin > self.settings['max_percent']:
+                total_implied = best_home['prob'] + best_away['prob']
+                margin = self.margin_from_total(total_implied)
+                if not margin:
                     continue
                 
                 opportunity = {
@@ -147,37 +294,298 @@ class ArbitrageDetector:
                     'away': match_info.get('away', 'Unknown'),
                     'market': market,
                     'margin': margin,
-                    'leg_1': {'provider': best_home['provider'], 'odds': best_home['value'], 'side': 'home/over'},
-                    'leg_2': {'provider': best_away['provider'], 'odds': best_away['value'], 'side': 'away/under'}
+                    'leg_1': {'provider': best_home['provider'], 'odds': best_home['value'], 'decimal': best_home['decimal'], 'side': 'home/over'},
+                    'leg_2': {'provider': best_away['provider'], 'odds': best_away['value'], 'decimal': best_away['decimal'], 'side': 'away/under'}
                 }
-                opportunities.append(opportunity)
+                yield opportunity
+
+
+class QuoteExpiryIndex:
+    """Timing wheel of quote deadlines, so stale quotes expire without scanning the book"""
+    
+    def __init__(self, settings: Dict, resolution: float = 0.1):
+        self.settings = settings
+        self.resolution = resolution
+        self.buckets = {}
+        self.slots = {}
+        self.ticks = []
+    
+    def freshness_budget(self, provider: str) -> float:
+        by_provider = self.settings.get('quote_max_age_by_provider') or {}
+        return by_provider.get(provider, self.settings.get('quote_max_age', 30))
+    
+    def track(self, sig: str, provider: str, received_at: float):
+        """(Re)schedule expiry of a quote; a newer quote replaces the old deadline"""
+        key = (sig, provider)
+        self.discard(sig, provider)
+        tick = int((received_at + self.freshness_budget(provider)) / self.resolution) + 1
+        bucket = self.buckets.get(tick)
+        if bucket is None:
+            bucket = self.buckets[tick] = set()
+            heapq.heappush(self.ticks, tick)
+        bucket.add(key)
+        self.slots[key] = tick
+    
+    def discard(self, sig: str, provider: str):
+        tick = self.slots.pop((sig, provider), None)
+        if tick is not None:
+            self.buckets[tick].discard((sig, provider))
+    
+    def pop_expired(self, now: float) -> List[Tuple[str, str]]:
+        """Return (signature, provider) keys whose freshness budget ran out by now"""
+        expired = []
+        now_tick = int(now / self.resolution)
+        while self.ticks and self.ticks[0] <= now_tick:
+            tick = heapq.heappop(self.ticks)
+            for key in self.buckets.pop(tick, ()):
+                del self.slots[key]
+                expired.append(key)
+        return expired
+
+
+class DurationHistogram:
+    """Fixed log-spaced buckets (about 19% apart, 1 ms .. ~20 min); constant memory, O(log n) record"""
+    
+    BOUNDS = [0.001 * 2 ** (i / 4) for i in range(81)]
+    
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+    
+    def record(self, seconds: float):
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+    
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (q in 0..100)"""
+        if not self.total:
+            return 0.0
+        rank = q / 100 * self.total
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                return min(self.BOUNDS[i], self.max) if i < len(self.BOUNDS) else self.max
+        return self.max
+
+
+class OpportunityLifetimeTracker:
+    """Follows each opportunity from first detection to disappearance"""
+    
+    def __init__(self, max_margin_samples: int = 32, recent_windows: int = 1000):
+        self.max_margin_samples = max_margin_samples
+        self.open = {}
+        self.histograms = {}
+        self.recent = deque(maxlen=recent_windows)
+    
+    @staticmethod
+    def key(opportunity: Dict) -> Tuple:
+        return (opportunity['match_id'], opportunity['market'], opportunity['leg_1']['provider'], opportunity['leg_2']['provider'])
+    
+    def observe(self, opportunities: List[Dict], now: float = None):
+        """Record one detection cycle; anything open but not seen this cycle has closed"""
+        now = time.time() if now is None else now
+        seen = set()
+        for opportunity in opportunities:
+            key = self.key(opportunity)
+            seen.add(key)
+            odds = (opportunity['leg_1']['odds'], opportunity['leg_2']['odds'])
+            window = self.open.get(key)
+            if window is None:
+                self.open[key] = {
+                    'first_seen': now, 'last_seen': now, 'odds': odds, 'first_mover': None,
+                    'margins': [(now, opportunity['margin'])], 'peak_margin': opportunity['margin']
+                }
+                continue
+            window['last_seen'] = now
+            if window['first_mover'] is None and odds != window['odds']:
+                window['first_mover'] = self.mover(window['odds'], odds)
+            window['odds'] = odds
+            if opportunity['margin'] != window['margins'][-1][1] and len(window['margins']) < self.max_margin_samples:
+                window['margins'].append((now, opportunity['margin']))
+            window['peak_margin'] = max(window['peak_margin'], opportunity['margin'])
         
-        return opportunities
+        for key in [key for key in self.open if key not in seen]:
+            self.close(key, self.open.pop(key), now)
+    
+    @staticmethod
+    def mover(before: Tuple, after: Tuple) -> str:
+        if before[0] != after[0] and before[1] != after[1]:
+            return 'both'
+        return 'leg_1' if before[0] != after[0] else 'leg_2'
+    
+    def close(self, key: Tuple, window: Dict, now: float):
+        match_id, market, provider_1, provider_2 = key
+        duration = now - window['first_seen']
+        group = f"{provider_1}>{provider_2}:{market}"
+        histogram = self.histograms.get(group)
+        if histogram is None:
+            histogram = self.histograms[group] = DurationHistogram()
+        histogram.record(duration)
+        self.recent.append({
+            'match_id': match_id, 'market': market, 'providers': (provider_1, provider_2),
+            'first_seen': window['first_seen'], 'duration': duration,
+            'peak_margin': window['peak_margin'], 'margins': window['margins'],
+            'first_mover': window['first_mover'] or 'vanished'
+        })
+    
+    def stats(self) -> Dict:
+        """Window duration percentiles (ms) per provider pair and market"""
+        return {
+            group: {
+                'count': h.total,
+                'p50_ms': round(h.percentile(50) * 1000, 1),
+                'p90_ms': round(h.percentile(90) * 1000, 1),
+                'p99_ms': round(h.percentile(99) * 1000, 1),
+                'max_ms': round(h.max * 1000, 1)
+            }
+            for group, h in self.histograms.items()
+        }
 
 
 class BackendEngine:
-    def __init__(self):
-        self.event_matcher = EventMatcher()
+    def __init__(self, odds_formats: Dict = None):
+        """
+        odds_formats: provider -> price format (decimal, hk, malay, indo, american); unlisted
+        providers are decimal. Configuring any switches detection to decimal prices.
+        """
+        self.event_matcher = EventMatcher(odds_formats)
         self.arb_detector = ArbitrageDetector()
+        if odds_formats:
+            self.arb_detector.settings['price_mode'] = 'decimal'
+        self.book = {}
+        self.provider_sigs = {}
+        self.expiry = QuoteExpiryIndex(self.arb_detector.settings)
+        self.lifetimes = OpportunityLifetimeTracker()
+        self.metrics = EngineMetrics()
+        self.history = None  # optional OddsStoreWriter recording every quote change
+        self.metrics.gauge('book_events', lambda: len(self.book))
+        self.metrics.gauge('open_opportunities', lambda: len(self.lifetimes.open))
+        self.metrics.gauge('expiry_pending_ticks', lambda: len(self.expiry.ticks))
+    
+    def ingest(self, odds_by_provider: Dict, received_at: float = None):
+        """Merge provider snapshots into the book; each snapshot replaces that provider's quotes"""
+        if received_at is None:
+            received_at = time.time()
+        with self.metrics.stage('match_events'):
+            grouped = self.event_matcher.match_events(odds_by_provider)
+        merge_started = time.perf_counter()
+        
+        fresh_sigs = {provider: set() for provider in odds_by_provider}
+        for sig, event_data in grouped.items():
+            event = self.book.get(sig)
+            if event is None:
+                event = self.book[sig] = {'providers': {}, 'match_info': event_data['match_info']}
+            for provider, quote in event_data['providers'].items():
+                quote['received_at'] = quote.get('received_at') or received_at
+                if quote['half'] or quote['minute']:
+                    event['match_info']['half'] = quote['half']
+                    event['match_info']['minute'] = quote['minute']
+                previous = event['providers'].get(provider)
+                if self.history and (previous is None or previous['prices'] != quote['prices']):
+                    self.history.append_quote(sig, provider, quote)
+                event['providers'][provider] = quote
+                fresh_sigs[provider].add(sig)
+                self.expiry.track(sig, provider, quote['received_at'])
+        
+        for provider, sigs in fresh_sigs.items():
+            for sig in self.provider_sigs.get(provider, set()) - sigs:
+                self.expiry.discard(sig, provider)
+                self.drop_quote(sig, provider)
+            self.provider_sigs[provider] = sigs
+            self.metrics.inc('quotes_ingested', len(sigs))
+        self.metrics.observe_stage('merge_book', time.perf_counter() - merge_started)
+    
+    def drop_quote(self, sig: str, provider: str):
+        event = self.book.get(sig)
+        if event is None:
+            return
+        event['providers'].pop(provider, None)
+        if not event['providers']:
+            del self.book[sig]
+    
+    def expire_stale_quotes(self, now: float = None, on_expire: Callable = None) -> int:
+        """Drop quotes older than their provider's freshness budget; on_expire(sig, provider, quote) sees each first"""
+        expired = self.expiry.pop_expired(time.time() if now is None else now)
+        for sig, provider in expired:
+            if on_expire:
+                quote = self.book.get(sig, {}).get('providers', {}).get(provider)
+                if quote is not None:
+                    on_expire(sig, provider, quote)
+            self.drop_quote(sig, provider)
+            self.provider_sigs.get(provider, set()).discard(sig)
+        return len(expired)
     
-    def process_odds(self, odds_by_provider: Dict) -> Dict:
-        """Main flow: odds → matching → arbitrage"""
+    def process_odds(self, odds_by_provider: Dict, received_at: float = None, now: float = None) -> Dict:
+        """Main flow: odds → matching → arbitrage (now overrides the wall clock for replays)"""
+        self.ingest(odds_by_provider, received_at)
+        return self.detect_cycle(len(odds_by_provider), now)
+    
+    def detect_cycle(self, providers: int = 0, now: float = None) -> Dict:
+        """Expire stale quotes and run detection over the current book"""
         result = {
             'timestamp': datetime.now().isoformat(),
-            'providers': len(odds_by_provider),
+            'providers': providers,
             'events_matched': 0,
+            'quotes_expired': 0,
             'opportunities_found': 0,
             'opportunities': []
         }
         
-        grouped = self.event_matcher.match_events(odds_by_provider)
-        result['events_matched'] = len(grouped)
+        with self.metrics.stage('expire'):
+            result['quotes_expired'] = self.expire_stale_quotes(now)
+        result['events_matched'] = len(self.book)
         
-        opportunities = self.arb_detector.detect_opportunities(grouped)
+        markets_before = self.arb_detector.markets_evaluated
+        with self.metrics.stage('detect_opportunities'):
+            opportunities = self.arb_detector.detect_opportunities(self.book)
+        with self.metrics.stage('lifetimes'):
+            self.lifetimes.observe(opportunities, now)
         result['opportunities_found'] = len(opportunities)
         result['opportunities'] = opportunities
         
+        self.metrics.inc('cycles')
+        self.metrics.inc('events_scanned', len(self.book))
+        self.metrics.inc('markets_evaluated', self.arb_detector.markets_evaluated - markets_before)
+        self.metrics.inc('quotes_expired', result['quotes_expired'])
+        self.metrics.inc('opportunities', len(opportunities))
+        
         return result
     
+    def stream_opportunities(self, odds_by_provider: Dict, received_at: float = None, top_k: int = None) -> Iterator[Dict]:
+        """Streaming process_odds: yield opportunities as found, or the top_k by margin first"""
+        self.ingest(odds_by_provider, received_at)
+        self.expire_stale_quotes()
+        if top_k:
+            yield from self.arb_detector.top_opportunities(self.book, top_k)
+        else:
+            # Lifetimes are only updated when the full cycle was consumed
+            seen = []
+            for opportunity in self.arb_detector.iter_opportunities(self.book):
+                seen.append(opportunity)
+                yield opportunity
+            self.lifetimes.observe(seen)
+    
+    def arb_window_stats(self) -> Dict:
+        return self.lifetimes.stats()
+    
+    def save_snapshot(self, path: str) -> int:
+        with self.metrics.stage('snapshot_write'):
+            return write_snapshot(self, path)
+    
+    def load_snapshot(self, path: str, max_age: float = None) -> int:
+        """Warm start from a snapshot; quotes older than max_age (or their freshness budget) are dropped"""
+        with self.metrics.stage('snapshot_restore'):
+            return restore_snapshot(self, path, max_age)
+    
     def update_settings(self, new_settings: Dict):
+        new_settings = dict(new_settings)
+        if 'odds_formats' in new_settings:
+            self.event_matcher.odds_formats = dict(new_settings.pop('odds_formats') or {})
+            new_settings.setdefault('price_mode', 'decimal' if self.event_matcher.odds_formats else 'raw')
         self.arb_detector.settings.update(new_settings)
@@ -0,0 +1,209 @@
+"""
+Detector Settings Backtester
+Replays recorded odds_update history through the detection logic once, then
+evaluates every combination of min_percent / max_percent / minute limits /
+market_filter in a single vectorized pass over the candidate table (requires numpy).
+With --odds-formats the replay detects on decimal prices, so the margin (and
+the min/max percent grid) is the arb's profit percent.
+
+History format: a capture_log directory, or JSON lines with one odds_update
+message per line ({'type': 'odds_update', 'provider', 'timestamp', 'matches',
+optional 'received_at'}).
+
+Usage:
+  python backtest.py history.jsonl --min-percent 2,5,10 --max-percent 50,120 \\
+      --minute-ht 30,35 --minute-ft 70,75 --markets all,ft_hdp+ft_ou --stake 100 [--odds-formats C-Sport=malay]
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from backend_engine import BackendEngine, MARKETS, parse_odds_formats
+from capture_log import iter_updates
+
+
+def load_history(path: str) -> Iterator[Tuple[float, str, List[Dict]]]:
+    """Yield (received_at, provider, matches) in file order; a directory is read as a capture log"""
+    if os.path.isdir(path):
+        yield from iter_updates(path)
+        return
+    skipped = 0
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if not isinstance(message, dict) or message.get('type', 'odds_update') != 'odds_update':
+                continue
+            received_at = message.get('received_at') or message.get('timestamp')
+            if received_at is None or not message.get('provider'):
+                skipped += 1
+                continue
+            yield float(received_at), message['provider'], message.get('matches', [])
+    if skipped:
+        print(f"[BACKTEST] Skipped {skipped} records without JSON, provider or receive time")
+
+
+def extract_candidates(history: Iterable[Tuple[float, str, List[Dict]]], base_settings: Dict = None) -> Dict[str, np.ndarray]:
+    """
+    One replay with thresholds disabled: every best leg pair on every cycle
+    becomes a row. Rows of the same (event, market, leg providers) seen on
+    consecutive cycles share a window id; sweep() counts each run of rows a
+    setting accepts within a window as one arb.
+    """
+    engine = BackendEngine()
+    if base_settings:
+        engine.update_settings(base_settings)
+    engine.update_settings({
+        'min_percent': -math.inf,
+        'max_percent': math.inf,
+        'min_profit_percent': -math.inf,
+        'max_profit_percent': math.inf,
+        'minute_limit_ht': math.inf,
+        'minute_limit_ft': math.inf,
+        'market_filter': {market: True for market in MARKETS}
+    })
+    market_index = {market: i for i, market in enumerate(MARKETS)}
+
+    margins, halves, minutes, markets, windows = [], [], [], [], []
+    open_windows = {}
+    next_window = 0
+
+    for received_at, provider, matches in history:
+        engine.ingest({provider: matches}, received_at)
+        engine.expire_stale_quotes(received_at)
+        still_open = {}
+        for opportunity in engine.arb_detector.iter_opportunities(engine.book):
+            key = (opportunity['match_id'], opportunity['market'], opportunity['leg_1']['provider'], opportunity['leg_2']['provider'])
+            window = open_windows.get(key)
+            if window is None:
+                window = next_window
+                next_window += 1
+            still_open[key] = window
+            match_info = engine.book[opportunity['match_id']]['match_info']
+            margins.append(opportunity['margin'])
+            halves.append(match_info.get('half', 0))
+            minutes.append(match_info.get('minute', 0))
+            markets.append(market_index[opportunity['market']])
+            windows.append(window)
+        open_windows = still_open
+
+    return {
+        'margin': np.asarray(margins, dtype=np.float64),
+        'half': np.asarray(halves, dtype=np.int8),
+        'minute': np.asarray(minutes, dtype=np.int16),
+        'market': np.asarray(markets, dtype=np.int8),
+        'window': np.asarray(windows, dtype=np.int64)
+    }
+
+
+def parse_market_filter(spec: str) -> Dict[str, bool]:
+    enabled = MARKETS if spec == 'all' else spec.split('+')
+    return {market: market in enabled for market in MARKETS}
+
+
+def sweep(candidates: Dict[str, np.ndarray], grid: Dict[str, List], stake: float = 100) -> List[Dict]:
+    """Evaluate every settings combination against the candidate table"""
+    margin = candidates['margin']
+    first_half = candidates['half'] <= 1
+    minute = candidates['minute']
+    window = candidates['window']
+
+    # Previous row of the same window (-1 for a window's first row): a window whose
+    # margin dips out of a setting's range and comes back is two arbs for that setting
+    order = np.argsort(window, kind='stable')
+    same = np.zeros(len(order), dtype=bool)
+    same[1:] = window[order][1:] == window[order][:-1]
+    previous = np.full(len(window), -1, dtype=np.int64)
+    previous[order[1:][same[1:]]] = order[:-1][same[1:]]
+    has_previous = previous >= 0
+
+    time_masks = {
+        (ht, ft): np.where(first_half, minute <= ht, minute <= ft)
+        for ht, ft in itertools.product(grid['minute_limit_ht'], grid['minute_limit_ft'])
+    }
+    market_masks = {}
+    for spec in grid['market_filter']:
+        allowed = np.array([parse_market_filter(spec)[m] for m in MARKETS], dtype=bool)
+        market_masks[spec] = allowed[candidates['market']]
+    margin_masks = {
+        (lo, hi): (margin >= lo) & (margin <= hi)
+        for lo, hi in itertools.product(grid['min_percent'], grid['max_percent'])
+    }
+
+    results = []
+    for (lo, hi), (ht, ft), spec in itertools.product(margin_masks, time_masks, market_masks):
+        mask = margin_masks[(lo, hi)] & time_masks[(ht, ft)] & market_masks[spec]
+        starts = mask.copy()
+        starts[has_previous] &= ~mask[previous[has_previous]]
+        taken = margin[starts]
+        results.append({
+            'min_percent': lo,
+            'max_percent': hi,
+            'minute_limit_ht': ht,
+            'minute_limit_ft': ft,
+            'market_filter': spec,
+            'opportunities': int(starts.sum()),
+            'detections': int(mask.sum()),
+            'avg_margin': round(float(taken.mean()), 2) if len(taken) else 0.0,
+            'modeled_profit': round(float(taken.sum()) * stake / 100, 2)
+        })
+
+    results.sort(key=lambda r: r['modeled_profit'], reverse=True)
+    return results
+
+
+def parse_list(value: str, cast=float) -> List:
+    return [cast(v) for v in value.split(',') if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest detector settings on recorded odds')
+    parser.add_argument('history')
+    parser.add_argument('--min-percent', default='5')
+    parser.add_argument('--max-percent', default='120')
+    parser.add_argument('--minute-ht', default='35')
+    parser.add_argument('--minute-ft', default='75')
+    parser.add_argument('--markets', default='all', help="comma separated; each is 'all' or markets joined by '+'")
+    parser.add_argument('--stake', type=float, default=100)
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--odds-formats', default='', help='provider price formats, e.g. C-Sport=malay (as on the ingest server)')
+    parser.add_argument('--output', help='write all results as JSON')
+    args = parser.parse_args()
+
+    grid = {
+        'min_percent': parse_list(args.min_percent),
+        'max_percent': parse_list(args.max_percent),
+        'minute_limit_ht': parse_list(args.minute_ht, int),
+        'minute_limit_ft': parse_list(args.minute_ft, int),
+        'market_filter': parse_list(args.markets, str)
+    }
+
+    odds_formats = parse_odds_formats(args.odds_formats)
+    candidates = extract_candidates(load_history(args.history), {'odds_formats': odds_formats} if odds_formats else None)
+    results = sweep(candidates, grid, args.stake)
+    print(f"[BACKTEST] {len(candidates['margin'])} candidate rows, {len(results)} settings combinations\n")
+
+    for r in results[:args.top]:
+        print(f"  min={r['min_percent']:<6} max={r['max_percent']:<6} ht={r['minute_limit_ht']:<3} ft={r['minute_limit_ft']:<3} "
+              f"markets={r['market_filter']:<16} arbs={r['opportunities']:<6} avg={r['avg_margin']:<7} profit={r['modeled_profit']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n[BACKTEST] Saved: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
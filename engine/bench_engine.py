@@ -0,0 +1,238 @@
+"""
+BackendEngine Load Benchmark
+Drives BackendEngine.process_odds under sustained load on a synthetic market that
+looks like production: providers quote overlapping subsets of the event list,
+team names carry provider-specific noise, and each provider re-polls at its own
+rate with only some prices moving between polls.
+
+Reports throughput, p50/p99/p999 cycle latency, memory per tracked event and GC
+pauses, and appends the result (tagged with the git commit) to a JSON file so
+runs can be compared across commits.
+
+Usage:
+  python bench_engine.py --providers 2,5,10,20 --events 1000,10000,50000 --seconds 10
+  python bench_engine.py --compare bench_results.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import subprocess
+import time
+import tracemalloc
+from typing import Dict, List
+
+from backend_engine import BackendEngine
+
+NAME_NOISE = [
+    lambda name: name,
+    lambda name: name.upper(),
+    lambda name: f"{name} (n)",
+    lambda name: f"  {name.title()} ",
+    lambda name: f"{name} (reserves)"
+]
+
+
+class SyntheticMarket:
+    """Event list plus per-provider coverage, name style, poll interval and price state"""
+
+    def __init__(self, num_providers: int, num_events: int, overlap: float = 0.7,
+                 move_share: float = 0.2, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.move_share = move_share
+        self.events = [(f'home team {e}', f'away team {e}', self.rng.randint(1, 90)) for e in range(num_events)]
+        self.providers = {}
+        for p in range(num_providers):
+            # Everyone quotes the shared core; each provider picks up half of the long tail
+            core = int(num_events * overlap)
+            covered = list(range(core)) + [e for e in range(core, num_events) if self.rng.random() < 0.5]
+            self.providers[f'provider_{p}'] = {
+                'events': covered,
+                'noise': NAME_NOISE[p % len(NAME_NOISE)],
+                'interval': self.rng.choice([0.5, 1.0, 2.0, 5.0]),
+                'prices': {e: self.fresh_prices() for e in covered}
+            }
+
+    def fresh_prices(self) -> Dict:
+        hdp = round(self.rng.uniform(0.70, 1.00), 2)
+        ou = round(self.rng.uniform(0.70, 1.00), 2)
+        return {
+            'ft_hdp': {'home': hdp, 'away': round(2.00 - hdp, 2)},
+            'ft_ou': {'over': ou, 'under': round(2.00 - ou, 2)}
+        }
+
+    def snapshot(self, provider: str) -> List[Dict]:
+        """Full snapshot for one provider after moving a share of its prices"""
+        state = self.providers[provider]
+        noise = state['noise']
+        matches = []
+        for e in state['events']:
+            if self.rng.random() < self.move_share:
+                state['prices'][e] = self.fresh_prices()
+            home, away, minute = self.events[e]
+            matches.append({
+                'home_team': noise(home),
+                'away_team': noise(away),
+                'time': f"{'1H' if minute <= 45 else '2H'} {minute if minute <= 45 else minute - 45}",
+                'odds': state['prices'][e]
+            })
+        return matches
+
+
+class GCPauseRecorder:
+    """Collects the duration of every collector run through gc.callbacks"""
+
+    def __init__(self):
+        self.pauses = []
+        self.started = None
+
+    def __call__(self, phase, info):
+        if phase == 'start':
+            self.started = time.perf_counter()
+        elif self.started is not None:
+            self.pauses.append(time.perf_counter() - self.started)
+            self.started = None
+
+    def __enter__(self):
+        gc.callbacks.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        gc.callbacks.remove(self)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_scenario(num_providers: int, num_events: int, seconds: float, overlap: float, move_share: float,
+                 seed: int = 0) -> Dict:
+    market = SyntheticMarket(num_providers, num_events, overlap, move_share, seed)
+    engine = BackendEngine()
+    engine.update_settings({'quote_max_age': 3600})
+
+    # Warm load under tracemalloc: memory per event is measured on the populated book
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    engine.process_odds({provider: market.snapshot(provider) for provider in market.providers})
+    book_bytes = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    tracked_events = len(engine.book)
+
+    # Sustained load: replay provider polls on a simulated clock, as fast as the engine allows
+    due = {provider: state['interval'] for provider, state in market.providers.items()}
+    latencies, quotes, opportunities = [], 0, 0
+    clock = time.time()
+    started = time.perf_counter()
+    with GCPauseRecorder() as gc_pauses:
+        while time.perf_counter() - started < seconds:
+            provider = min(due, key=due.get)
+            snapshot = market.snapshot(provider)
+            t = time.perf_counter()
+            result = engine.process_odds({provider: snapshot}, clock + due[provider], now=clock + due[provider])
+            latencies.append(time.perf_counter() - t)
+            quotes += len(snapshot)
+            opportunities += result['opportunities_found']
+            due[provider] += market.providers[provider]['interval']
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    pauses = sorted(gc_pauses.pauses)
+    return {
+        'providers': num_providers,
+        'events': num_events,
+        'tracked_events': tracked_events,
+        'cycles': len(latencies),
+        'quotes_per_s': round(quotes / elapsed, 1),
+        'cycles_per_s': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'p999_ms': round(percentile(latencies, 0.999) * 1000, 3),
+        'bytes_per_event': round(book_bytes / tracked_events) if tracked_events else 0,
+        'gc_pauses': len(pauses),
+        'gc_pause_total_ms': round(sum(pauses) * 1000, 3),
+        'gc_pause_max_ms': round(pauses[-1] * 1000, 3) if pauses else 0.0,
+        'opportunities_per_cycle': round(opportunities / len(latencies), 1) if latencies else 0.0
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save_run(path: str, run: Dict):
+    runs = []
+    if os.path.exists(path):
+        with open(path) as f:
+            runs = json.load(f)
+    runs.append(run)
+    with open(path, 'w') as f:
+        json.dump(runs, f, indent=2)
+
+
+def compare(path: str):
+    """Print the last two runs side by side per scenario"""
+    with open(path) as f:
+        runs = json.load(f)
+    if len(runs) < 2:
+        print(f"[BENCH] Need two runs in {path} to compare")
+        return
+    before, after = runs[-2], runs[-1]
+    print(f"[BENCH] {before['commit']} -> {after['commit']}")
+    previous = {(s['providers'], s['events']): s for s in before['scenarios']}
+    for scenario in after['scenarios']:
+        old = previous.get((scenario['providers'], scenario['events']))
+        if not old:
+            continue
+        deltas = '  '.join(
+            f"{metric} {old[metric]} -> {scenario[metric]} ({(scenario[metric] / old[metric] - 1) * 100:+.1f}%)"
+            for metric in ('quotes_per_s', 'p99_ms', 'bytes_per_event') if old[metric]
+        )
+        print(f"  {scenario['providers']:2d}p x {scenario['events']:6d}e  {deltas}")
+
+
+def parse_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(',') if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BackendEngine load benchmark')
+    parser.add_argument('--providers', type=parse_list, default=[2, 5, 10, 20])
+    parser.add_argument('--events', type=parse_list, default=[1000, 10000, 50000])
+    parser.add_argument('--seconds', type=float, default=10.0, help='sustained load per scenario')
+    parser.add_argument('--overlap', type=float, default=0.7, help='share of events every provider quotes')
+    parser.add_argument('--move-share', type=float, default=0.2, help='share of prices moving between polls')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', metavar='RESULTS', help='compare the last two runs in a results file and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.compare)
+        return
+
+    run = {'commit': git_commit(), 'timestamp': time.time(), 'seconds': args.seconds, 'scenarios': []}
+    print(f"[BENCH] commit {run['commit']}, {args.seconds:.0f}s per scenario")
+    for num_events in args.events:
+        for num_providers in args.providers:
+            scenario = run_scenario(num_providers, num_events, args.seconds, args.overlap, args.move_share, args.seed)
+            run['scenarios'].append(scenario)
+            print(f"  {num_providers:2d}p x {num_events:6d}e  {scenario['quotes_per_s']:10.0f} quotes/s  "
+                  f"p50 {scenario['p50_ms']:8.2f}ms  p99 {scenario['p99_ms']:8.2f}ms  p999 {scenario['p999_ms']:8.2f}ms  "
+                  f"{scenario['bytes_per_event']:6d} B/event  gc {scenario['gc_pauses']} pauses, "
+                  f"max {scenario['gc_pause_max_ms']:.2f}ms")
+
+    save_run(args.output, run)
+    print(f"[BENCH] Saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
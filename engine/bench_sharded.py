@@ -0,0 +1,78 @@
+"""
+Sharded Detection Benchmark
+Compares BackendEngine against ShardedEngine with 1..N shards on a synthetic book.
+
+Usage:
+  python bench_sharded.py --events 20000 --providers 4 --rounds 5
+"""
+
+import argparse
+import os
+import random
+import time
+from typing import Dict
+
+from backend_engine import BackendEngine
+from sharded_engine import ShardedEngine
+
+
+def generate_snapshot(num_providers: int, num_events: int, seed: int = 0) -> Dict:
+    """Every provider quotes every event with slightly different prices"""
+    rng = random.Random(seed)
+    snapshot = {}
+    for p in range(num_providers):
+        matches = []
+        for e in range(num_events):
+            hdp = round(rng.uniform(0.70, 1.00), 2)
+            ou = round(rng.uniform(0.70, 1.00), 2)
+            matches.append({
+                'home_team': f'home team {e}',
+                'away_team': f'away team {e}',
+                'time': f'1H {rng.randint(1, 30)}',
+                'odds': {
+                    'ft_hdp': {'home': hdp, 'away': round(2.00 - hdp, 2)},
+                    'ft_ou': {'over': ou, 'under': round(2.00 - ou, 2)}
+                }
+            })
+        snapshot[f'provider_{p}'] = matches
+    return snapshot
+
+
+def run(engine, snapshots) -> float:
+    start = time.perf_counter()
+    for snapshot in snapshots:
+        engine.process_odds(snapshot)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sharded detection benchmark')
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--providers', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--max-shards', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    snapshots = [generate_snapshot(args.providers, args.events, seed) for seed in range(args.rounds)]
+    quotes = args.providers * args.events * args.rounds
+
+    print(f"[BENCH] {args.providers} providers x {args.events} events x {args.rounds} rounds")
+
+    baseline = run(BackendEngine(), snapshots)
+    print(f"  single process : {baseline:7.2f}s  {quotes / baseline:10.0f} quotes/s")
+
+    shards = 1
+    while shards <= args.max_shards:
+        engine = ShardedEngine(num_shards=shards)
+        engine.start()
+        try:
+            engine.process_odds(snapshots[0])  # warm route cache and shard books
+            elapsed = run(engine, snapshots)
+        finally:
+            engine.stop()
+        print(f"  {shards:2d} shard(s)     : {elapsed:7.2f}s  {quotes / elapsed:10.0f} quotes/s  x{baseline / elapsed:.2f}")
+        shards *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Odds Capture Log
+Append-only, segmented record of every odds_update message as received, with
+its receive timestamp. Each segment is one gzip stream
+(odds-<first receive ms>.log.gz) of length-prefixed records:
+
+  received_at  d   unix time
+  length       I   payload bytes
+  payload          raw message (UTF-8 JSON as received)
+
+Segments rotate by size or age. A segment cut short by a crash is read up to
+its last complete record.
+
+Replay:
+  python capture_log.py replay /data/capture --speed 1     # real time
+  python capture_log.py replay /data/capture --speed 10    # 10x
+  python capture_log.py replay /data/capture --speed 0     # as fast as possible
+"""
+
+import argparse
+import gzip
+import json
+import os
+import struct
+import time
+import zlib
+from typing import Iterator, Tuple
+
+RECORD = struct.Struct('<dI')
+
+
+class CaptureLogWriter:
+    """Appends raw messages to the current segment and rotates it by size or age"""
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024, segment_seconds: float = 300,
+                 compresslevel: int = 6):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.compresslevel = compresslevel
+        self.segment = None
+        self.segment_path = None
+        self.segment_started = 0.0
+        self.segment_written = 0
+        self.records = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def open_segment(self, received_at: float):
+        self.close()
+        self.segment_path = os.path.join(self.directory, f"odds-{int(received_at * 1000):015d}.log.gz")
+        self.segment = gzip.open(self.segment_path, 'ab', compresslevel=self.compresslevel)
+        self.segment_started = received_at
+        self.segment_written = 0
+
+    def append(self, received_at: float, raw):
+        if isinstance(raw, str):
+            raw = raw.encode()
+        if (self.segment is None
+                or self.segment_written >= self.segment_bytes
+                or received_at - self.segment_started >= self.segment_seconds):
+            self.open_segment(received_at)
+        self.segment.write(RECORD.pack(received_at, len(raw)))
+        self.segment.write(raw)
+        self.segment_written += RECORD.size + len(raw)
+        self.records += 1
+
+    def flush(self):
+        if self.segment:
+            self.segment.flush()
+
+    def close(self):
+        if self.segment:
+            self.segment.close()
+            self.segment = None
+
+
+def list_segments(directory: str):
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.startswith('odds-') and name.endswith('.log.gz')
+    )
+
+
+def iter_capture(directory: str) -> Iterator[Tuple[float, bytes]]:
+    """Yield (received_at, raw message) across all segments in order"""
+    for path in list_segments(directory):
+        with gzip.open(path, 'rb') as segment:
+            try:
+                while True:
+                    header = segment.read(RECORD.size)
+                    if len(header) < RECORD.size:
+                        break
+                    received_at, length = RECORD.unpack(header)
+                    raw = segment.read(length)
+                    if len(raw) < length:
+                        break
+                    yield received_at, raw
+            except (EOFError, zlib.error, OSError):
+                print(f"[CAPTURE] Truncated segment {path}, stopping at last complete record")
+
+
+def iter_updates(directory: str) -> Iterator[Tuple[float, str, list]]:
+    """Yield (received_at, provider, matches) for every captured odds_update; undecodable records are skipped"""
+    skipped = 0
+    for received_at, raw in iter_capture(directory):
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            skipped += 1
+            continue
+        if isinstance(message, dict) and message.get('type') == 'odds_update' and message.get('provider'):
+            yield received_at, message['provider'], message.get('matches', [])
+    if skipped:
+        print(f"[CAPTURE] Skipped {skipped} undecodable records in {directory}")
+
+
+def replay(directory: str, engine, speed: float = 1.0) -> dict:
+    """
+    Feed a capture back through the engine. speed=1 reproduces the original
+    pacing, N compresses it N times, 0 replays as fast as possible. Quotes are
+    always stamped and expired on recorded time, so results do not depend on speed.
+    """
+    latencies = []
+    opportunities = 0
+    first_recorded = None
+    started = time.perf_counter()
+
+    for received_at, provider, matches in iter_updates(directory):
+        if first_recorded is None:
+            first_recorded = received_at
+        if speed > 0:
+            due = (received_at - first_recorded) / speed - (time.perf_counter() - started)
+            if due > 0:
+                time.sleep(due)
+        t = time.perf_counter()
+        result = engine.process_odds({provider: matches}, received_at, now=received_at)
+        latencies.append(time.perf_counter() - t)
+        opportunities += result['opportunities_found']
+
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+    return {
+        'messages': len(latencies),
+        'opportunities': opportunities,
+        'elapsed_s': round(elapsed, 3),
+        'messages_per_s': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(pick(0.50), 3),
+        'p99_ms': round(pick(0.99), 3),
+        'max_ms': round(latencies[-1] * 1000, 3) if latencies else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Odds capture log tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+    replay_cmd = sub.add_parser('replay', help='replay a capture through BackendEngine')
+    replay_cmd.add_argument('directory')
+    replay_cmd.add_argument('--speed', type=float, default=1.0, help='1 = real time, N = N x faster, 0 = max speed')
+    stats_cmd = sub.add_parser('stats', help='summarise a capture')
+    stats_cmd.add_argument('directory')
+    args = parser.parse_args()
+
+    if args.command == 'replay':
+        from backend_engine import BackendEngine
+        print(f"[REPLAY] {json.dumps(replay(args.directory, BackendEngine(), args.speed))}")
+    elif args.command == 'stats':
+        count, first, last = 0, None, None
+        for received_at, _ in iter_capture(args.directory):
+            count += 1
+            first = received_at if first is None else first
+            last = received_at
+        span = (last - first) if count else 0
+        print(f"[CAPTURE] {len(list_segments(args.directory))} segments, {count} messages over {span:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Engine Metrics
+Low-overhead stage timers, counters and gauges for BackendEngine, exposed in
+Prometheus text format from a small HTTP server thread inside the engine process.
+
+Recording is a perf_counter() pair plus a bisect into fixed buckets per stage,
+so it stays on in production.
+
+Usage:
+  engine = BackendEngine()
+  start_metrics_server(engine.metrics, port=9108)   # GET http://host:9108/metrics
+"""
+
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+STAGE_BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+
+
+class StageHistogram:
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class EngineMetrics:
+    """Stage latency histograms, monotonic counters and gauges"""
+
+    def __init__(self, prefix: str = 'backend_engine'):
+        self.prefix = prefix
+        self.stages = {}
+        self.counters = {}
+        self.gauges = {}
+
+    def observe_stage(self, stage: str, seconds: float):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = StageHistogram()
+        histogram.observe(seconds)
+
+    def stage(self, stage: str) -> 'StageTimer':
+        return StageTimer(self, stage)
+
+    def inc(self, name: str, value: float = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name: str, fn: Callable[[], float]):
+        """Register a gauge read lazily at scrape time (e.g. a queue length)"""
+        self.gauges[name] = fn
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_stage_duration_seconds Duration of BackendEngine stages",
+            f"# TYPE {p}_stage_duration_seconds histogram"
+        ]
+        for stage, h in list(self.stages.items()):
+            cumulative = 0
+            for bound, count in zip(h.buckets, h.counts):
+                cumulative += count
+                lines.append(f'{p}_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{p}_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+            lines.append(f'{p}_stage_duration_seconds_sum{{stage="{stage}"}} {h.sum:.6f}')
+            lines.append(f'{p}_stage_duration_seconds_count{{stage="{stage}"}} {h.count}')
+
+        for name, value in list(self.counters.items()):
+            lines.append(f"# TYPE {p}_{name}_total counter")
+            lines.append(f"{p}_{name}_total {value}")
+
+        for name, fn in list(self.gauges.items()):
+            try:
+                value = fn()
+            except Exception:
+                continue
+            lines.append(f"# TYPE {p}_{name} gauge")
+            lines.append(f"{p}_{name} {value}")
+
+        return '\n'.join(lines) + '\n'
+
+
+class StageTimer:
+    __slots__ = ('metrics', 'stage', 'started')
+
+    def __init__(self, metrics: EngineMetrics, stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe_stage(self.stage, time.perf_counter() - self.started)
+
+
+def start_metrics_server(metrics: EngineMetrics, host: str = '0.0.0.0', port: int = 9108) -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread; returns the server for shutdown()"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name='metrics-http').start()
+    return server
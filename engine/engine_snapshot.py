@@ -0,0 +1,127 @@
+"""
+Engine Warm-Start Snapshots
+Persists BackendEngine state (quote book, provider → event links, alias cache and
+the open-opportunity dedupe cache) to a memory-mapped file so a restarted engine
+resumes in milliseconds instead of waiting for every provider to re-poll.
+
+File layout (little endian):
+  magic      8s   b'ARBSNAP\\0'
+  version    H    SNAPSHOT_VERSION
+  encoding   B    0 = JSON, 1 = msgpack
+  reserved   B
+  created_at d    unix time of the snapshot
+  length     Q    payload bytes
+  crc32      I    of the payload
+  payload
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Optional
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+SNAPSHOT_MAGIC = b'ARBSNAP\0'
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct('<8sHBBdQI')
+ENCODING_JSON = 0
+ENCODING_MSGPACK = 1
+
+
+def encode_state(engine) -> dict:
+    return {
+        'book': engine.book,
+        'alias_cache': engine.event_matcher.alias_cache,
+        'open_opportunities': [[list(key), window] for key, window in engine.lifetimes.open.items()]
+    }
+
+
+def write_snapshot(engine, path: str) -> int:
+    """Write the engine state through a shared mmap; the file is swapped in atomically"""
+    state = encode_state(engine)
+    if msgpack:
+        encoding, payload = ENCODING_MSGPACK, msgpack.packb(state, use_bin_type=True)
+    else:
+        encoding, payload = ENCODING_JSON, json.dumps(state, separators=(',', ':')).encode()
+    header = HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, encoding, 0, time.time(), len(payload), zlib.crc32(payload))
+
+    size = HEADER.size + len(payload)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w+b') as f:
+        f.truncate(size)
+        with mmap.mmap(f.fileno(), size) as mm:
+            mm[:HEADER.size] = header
+            mm[HEADER.size:] = payload
+            mm.flush()
+    os.replace(tmp_path, path)
+    return size
+
+
+def restore_snapshot(engine, path: str, max_age: Optional[float] = None, now: float = None) -> int:
+    """
+    Map a snapshot into the engine, dropping quotes older than max_age seconds
+    (each provider's freshness budget when max_age is None).
+
+    Returns:
+        Number of quotes restored; 0 if the file is missing, foreign or corrupt
+    """
+    if not os.path.exists(path) or os.path.getsize(path) < HEADER.size:
+        return 0
+    now = time.time() if now is None else now
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, version, encoding, _, created_at, length, crc = HEADER.unpack_from(mm, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            print(f"[SNAPSHOT] Ignoring {path}: unsupported format (version {version})")
+            return 0
+        payload = memoryview(mm)[HEADER.size:HEADER.size + length]
+        try:
+            if zlib.crc32(payload) != crc:
+                print(f"[SNAPSHOT] Ignoring {path}: checksum mismatch")
+                return 0
+            if encoding == ENCODING_MSGPACK:
+                if not msgpack:
+                    print(f"[SNAPSHOT] Ignoring {path}: msgpack not installed")
+                    return 0
+                state = msgpack.unpackb(payload, raw=False)
+            else:
+                state = json.loads(bytes(payload))
+        finally:
+            payload.release()
+
+    restored = 0
+    for sig, event in state['book'].items():
+        providers = {}
+        for provider, quote in event['providers'].items():
+            budget = engine.expiry.freshness_budget(provider) if max_age is None else max_age
+            received_at = quote.get('received_at') or created_at
+            if now - received_at > budget:
+                continue
+            # Serializers turn the (raw, decimal, implied) leg tuples into lists; fresh quotes hold tuples
+            quote['prices'] = {
+                market: {leg: tuple(value) if value is not None else None for leg, value in legs.items()}
+                for market, legs in (quote.get('prices') or {}).items()
+            }
+            providers[provider] = quote
+            engine.provider_sigs.setdefault(provider, set()).add(sig)
+            engine.expiry.track(sig, provider, received_at)
+            restored += 1
+        if providers:
+            engine.book[sig] = {'providers': providers, 'match_info': event['match_info']}
+
+    engine.event_matcher.alias_cache.update(state.get('alias_cache', {}))
+
+    for key, window in state.get('open_opportunities', []):
+        if key[0] in engine.book:
+            window['odds'] = tuple(window['odds'])
+            window['margins'] = [tuple(sample) for sample in window['margins']]
+            engine.lifetimes.open[tuple(key)] = window
+
+    return restored
@@ -0,0 +1,258 @@
+"""
+Odds Ingest Server
+Asyncio WebSocket endpoint (ws://host:8000/ws) for worker odds_update messages.
+
+Only the latest snapshot per provider is kept. Detection runs on a coalescing
+tick: at most once every tick_ms (or as soon as something changed when
+tick_ms is 0), over whatever arrived since the last cycle, so a burst of
+messages never queues up redundant detection runs.
+
+Usage:
+  python ingest_server.py --host 0.0.0.0 --port 8000 --tick-ms 100 [--redis-url redis://localhost:6379] [--metrics-port 9108]
+      [--snapshot-path /data/engine.snap] [--capture-dir /data/capture]
+      [--board arb_odds --board-providers C-Sport,nova,saba] [--history-dir /data/history]
+      [--odds-formats C-Sport=malay,nova=indo] [--accounts accounts.json]
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+from backend_engine import BackendEngine, parse_odds_formats
+from capture_log import CaptureLogWriter
+from engine_metrics import start_metrics_server
+from odds_store import OddsStoreWriter
+from opportunity_dispatcher import OpportunityDispatcher
+from opportunity_publisher import OpportunityPublisher
+from opportunity_scheduler import OpportunityScheduler
+
+# The odds board layout ships with the worker (its image only contains worker/)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'worker'))
+from shared_odds_board import SharedOddsBoard
+
+
+class IngestServer:
+    """Latest-snapshot-per-provider ingest with coalesced detection"""
+
+    def __init__(self, engine: BackendEngine = None, tick_ms: int = 100, on_result: Optional[Callable] = None,
+                 snapshot_path: str = None, snapshot_interval: float = 5.0, capture: CaptureLogWriter = None):
+        """
+        Args:
+            engine: Engine that owns the book (a fresh BackendEngine by default)
+            tick_ms: Minimum spacing between detection cycles; 0 runs on every change
+            on_result: Called (or awaited) with each detection result
+            snapshot_path: Warm-start snapshot restored on serve() and rewritten periodically
+            snapshot_interval: Seconds between snapshot writes
+            capture: Optional capture log receiving every raw message
+        """
+        self.engine = engine or BackendEngine()
+        self.tick = tick_ms / 1000
+        self.on_result = on_result
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.last_snapshot = time.time()
+        self.capture = capture
+        self.pending = {}
+        self.changed = asyncio.Event()
+        # Engine work (ingest, detection, snapshots) and capture I/O each run in order on
+        # their own thread, so neither ever stalls the sockets on the event loop
+        self.engine_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ingest-engine')
+        self.io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ingest-capture')
+        self.running = False
+        self.stats = {'connections': 0, 'messages': 0, 'snapshots_coalesced': 0, 'cycles': 0, 'bad_messages': 0,
+                      'cycle_errors': 0}
+        self.engine.metrics.gauge('ingest_pending_snapshots', lambda: len(self.pending))
+        self.engine.metrics.gauge('ingest_connections', lambda: self.stats['connections'])
+
+    def submit(self, message: Dict, received_at: float = None):
+        """Keep the newest snapshot per provider; older unprocessed ones are dropped"""
+        provider = message.get('provider')
+        matches = message.get('matches', [])
+        if not provider or not isinstance(matches, list) or not all(isinstance(m, dict) for m in matches):
+            self.stats['bad_messages'] += 1
+            return
+        if provider in self.pending:
+            self.stats['snapshots_coalesced'] += 1
+            self.engine.metrics.inc('ingest_snapshots_coalesced')
+        self.pending[provider] = (received_at or time.time(), matches)
+        self.changed.set()
+
+    async def handle(self, websocket, path: str = None):
+        self.stats['connections'] += 1
+        try:
+            async for raw in websocket:
+                received_at = time.time()
+                self.stats['messages'] += 1
+                try:
+                    message = json.loads(raw)
+                except ValueError:
+                    self.stats['bad_messages'] += 1
+                    continue
+                if not isinstance(message, dict):
+                    self.stats['bad_messages'] += 1
+                    continue
+                # Only frames that decode are captured, so replays never trip over them
+                if self.capture:
+                    self.io_executor.submit(self.capture.append, received_at, raw)
+                if message.get('type') == 'odds_update':
+                    self.submit(message, received_at)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.stats['connections'] -= 1
+
+    async def watch_board(self, board, interval_ms: int = 5):
+        """Feed snapshots written by co-located workers into a shared-memory odds board"""
+        loop = asyncio.get_running_loop()
+        while self.running:
+            # Decoding a region costs about as much as json.loads of it: keep it off the sockets' loop
+            changed = await loop.run_in_executor(self.engine_executor, board.poll)
+            for provider, matches in changed.items():
+                self.stats['messages'] += 1
+                self.submit({'provider': provider, 'matches': matches})
+            await asyncio.sleep(interval_ms / 1000)
+
+    def run_cycle(self, pending: Dict = None) -> Dict:
+        if pending is None:
+            pending, self.pending = self.pending, {}
+        for provider, (received_at, matches) in pending.items():
+            try:
+                self.engine.ingest({provider: matches}, received_at)
+            except Exception as e:
+                # One malformed snapshot must not cost the other providers their cycle
+                self.stats['bad_messages'] += 1
+                print(f"[INGEST] Skipped {provider} snapshot: {e!r}")
+        self.stats['cycles'] += 1
+        return self.engine.detect_cycle(len(pending))
+
+    async def detection_loop(self):
+        loop = asyncio.get_running_loop()
+        while self.running:
+            await self.changed.wait()
+            self.changed.clear()
+            started = time.perf_counter()
+
+            # Swapped on the loop, so submit() never writes into a dict the cycle already read
+            pending, self.pending = self.pending, {}
+            try:
+                result = await loop.run_in_executor(self.engine_executor, self.run_cycle, pending)
+                if self.on_result:
+                    emitted = self.on_result(result)
+                    if inspect.isawaitable(emitted):
+                        await emitted
+            except Exception as e:
+                self.stats['cycle_errors'] += 1
+                print(f"[INGEST] Detection cycle failed: {e!r}")
+
+            if self.capture:
+                self.io_executor.submit(self.capture.flush)
+            if self.snapshot_path and time.time() - self.last_snapshot >= self.snapshot_interval:
+                self.last_snapshot = time.time()
+                await loop.run_in_executor(self.engine_executor, self.engine.save_snapshot, self.snapshot_path)
+
+            # Anything arriving during the rest of the tick is folded into the next cycle
+            remaining = self.tick - (time.perf_counter() - started)
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+
+    async def serve(self, host: str = '0.0.0.0', port: int = 8000, board=None):
+        if not websockets:
+            raise RuntimeError("websockets module not available")
+        if self.snapshot_path:
+            restored = self.engine.load_snapshot(self.snapshot_path)
+            print(f"[INGEST] Warm start: {restored} quotes restored from {self.snapshot_path}")
+        self.running = True
+        detector = asyncio.create_task(self.detection_loop())
+        board_watcher = asyncio.create_task(self.watch_board(board)) if board else None
+        try:
+            async with websockets.serve(self.handle, host, port, ping_interval=20, max_size=None):
+                print(f"[INGEST] Listening on ws://{host}:{port}/ws (tick {self.tick * 1000:.0f} ms)")
+                await asyncio.Future()
+        finally:
+            self.running = False
+            detector.cancel()
+            if board_watcher:
+                board_watcher.cancel()
+            # Let a cycle or snapshot already on the engine thread and queued capture writes finish
+            self.engine_executor.shutdown(wait=True)
+            self.io_executor.shutdown(wait=True)
+            if self.capture:
+                self.capture.close()
+            if self.engine.history:
+                self.engine.history.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BackendEngine odds ingest server')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--tick-ms', type=int, default=100)
+    parser.add_argument('--redis-url', help='publish opportunities to Redis')
+    parser.add_argument('--metrics-port', type=int, help='serve Prometheus metrics on this port')
+    parser.add_argument('--snapshot-path', help='warm-start snapshot file')
+    parser.add_argument('--snapshot-interval', type=float, default=5.0)
+    parser.add_argument('--capture-dir', help='record every incoming message to a segmented capture log')
+    parser.add_argument('--board', help='shared-memory odds board name for co-located workers')
+    parser.add_argument('--board-providers', default='C-Sport', help='comma separated provider regions')
+    parser.add_argument('--history-dir', help='record quote changes to the columnar odds store')
+    parser.add_argument('--odds-formats', default='',
+                        help='provider price formats, e.g. C-Sport=malay,nova=indo (default decimal); '
+                             'switches detection to decimal arbitrage (margin = profit percent)')
+    parser.add_argument('--accounts', help='JSON list of execution accounts; dispatches place_bet jobs (needs --redis-url)')
+    parser.add_argument('--in-flight-timeout', type=float, default=120,
+                        help='seconds before a dispatched pair without a result frees its accounts')
+    args = parser.parse_args()
+
+    publisher = None
+    dispatcher = None
+    if args.redis_url:
+        import redis.asyncio as aioredis
+        redis_client = aioredis.from_url(args.redis_url)
+        publisher = OpportunityPublisher(redis_client)
+        if args.accounts:
+            with open(args.accounts, 'r') as f:
+                scheduler = OpportunityScheduler(json.load(f))
+            dispatcher = OpportunityDispatcher(scheduler, redis_client, in_flight_timeout=args.in_flight_timeout)
+
+    async def report(result):
+        if result['opportunities_found']:
+            print(f"[INGEST] {result['events_matched']} events, {result['opportunities_found']} opportunities")
+        if publisher:
+            await publisher.publish(result)
+        if dispatcher:
+            dispatched = await dispatcher.dispatch(result)
+            if dispatched:
+                print(f"[INGEST] Dispatched {dispatched} bet pairs")
+
+    # C-Sport style feeds quote Malay/Indo prices; converted, they are detected as true decimal arbs
+    engine = BackendEngine(odds_formats=parse_odds_formats(args.odds_formats))
+    server = IngestServer(engine=engine, tick_ms=args.tick_ms, on_result=report,
+                          snapshot_path=args.snapshot_path, snapshot_interval=args.snapshot_interval,
+                          capture=CaptureLogWriter(args.capture_dir) if args.capture_dir else None)
+    if args.history_dir:
+        server.engine.history = OddsStoreWriter(args.history_dir)
+    if args.metrics_port:
+        start_metrics_server(server.engine.metrics, args.host, args.metrics_port)
+    board = SharedOddsBoard.create(args.board, args.board_providers.split(',')) if args.board else None
+    try:
+        asyncio.run(server.serve(args.host, args.port, board))
+    except KeyboardInterrupt:
+        print(f"[INGEST] Stopped: {server.stats}")
+    finally:
+        if board:
+            board.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Execution Latency Simulator
+Replays recorded odds history, takes each newly detected opportunity and models
+the worker's execute_bet_pair flow: place the positive leg, wait for acceptance,
+then place the hedge. Each step sees the price the provider was quoting after
+the configured delay, so the output is captured profit vs end-to-end latency.
+
+Rejection model: each leg is rejected with probability --reject, and if its
+price moved between detection and placement it is rejected with probability
+--reject-on-move (otherwise filled at the new price). A rejected positive leg
+aborts the pair; a rejected hedge leaves an exposure costing --exposure-cost
+of the stake.
+
+Usage:
+  python latency_sim.py history.jsonl --latencies 0,100,250,500,1000,2000 --hedge-share 0.5
+"""
+
+import argparse
+import bisect
+import json
+import random
+from typing import Dict, List, Optional, Tuple
+
+from backend_engine import ArbitrageDetector, BackendEngine, MARKETS, implied_probability, parse_odds_formats
+from backtest import load_history
+
+
+class QuoteTimeline:
+    """Price history per (signature, provider, market, leg), stored only on change"""
+
+    def __init__(self):
+        self.series = {}
+
+    def record(self, key: Tuple, at: float, price: Optional[float]):
+        times, prices = self.series.setdefault(key, ([], []))
+        if prices and prices[-1] == price:
+            return
+        times.append(at)
+        prices.append(price)
+
+    def price_at(self, key: Tuple, at: float) -> Optional[float]:
+        times, prices = self.series.get(key, ((), ()))
+        i = bisect.bisect_right(times, at) - 1
+        return prices[i] if i >= 0 else None
+
+
+def record_history(history, settings: Dict = None) -> Tuple[List[Dict], QuoteTimeline, ArbitrageDetector]:
+    """
+    Replay once: collect the first detection of every arb window and the quote
+    timeline, in which dropped and expired quotes read as None (not fillable);
+    the detector is returned for its margin rules
+    """
+    engine = BackendEngine()
+    if settings:
+        engine.update_settings(settings)
+    timeline = QuoteTimeline()
+    detections = []
+    open_keys = set()
+
+    def expired(sig, quote_provider, quote):
+        # The quote stopped being fillable when its freshness budget ran out, not at this message
+        expired_at = min(received_at, quote['received_at'] + engine.expiry.freshness_budget(quote_provider))
+        for market in MARKETS:
+            for leg in ('home', 'away'):
+                if (sig, quote_provider, market, leg) in timeline.series:
+                    timeline.record((sig, quote_provider, market, leg), expired_at, None)
+
+    for received_at, provider, matches in history:
+        previous = set(engine.provider_sigs.get(provider, ()))
+        # A quote refreshed only after its budget ran out was stale in between
+        budget = engine.expiry.freshness_budget(provider)
+        for sig in previous:
+            quote = engine.book.get(sig, {}).get('providers', {}).get(provider)
+            if quote is not None and quote['received_at'] + budget < received_at:
+                expired(sig, provider, quote)
+        engine.ingest({provider: matches}, received_at)
+        engine.expire_stale_quotes(received_at, on_expire=expired)
+
+        current = engine.provider_sigs.get(provider, set())
+        for sig in current:
+            for market, legs in engine.book[sig]['providers'][provider]['prices'].items():
+                for leg in ('home', 'away'):
+                    timeline.record((sig, provider, market, leg), received_at, legs[leg][1] if legs[leg] else None)
+        for sig in previous - current:
+            for market in MARKETS:
+                for leg in ('home', 'away'):
+                    if (sig, provider, market, leg) in timeline.series:
+                        timeline.record((sig, provider, market, leg), received_at, None)
+
+        seen = set()
+        for opportunity in engine.arb_detector.iter_opportunities(engine.book):
+            key = (opportunity['match_id'], opportunity['market'], opportunity['leg_1']['provider'], opportunity['leg_2']['provider'])
+            seen.add(key)
+            if key not in open_keys:
+                detections.append(dict(opportunity, detected_at=received_at))
+        open_keys = seen
+
+    return detections, timeline, engine.arb_detector
+
+
+def place_leg(timeline: QuoteTimeline, key: Tuple, at: float, detected_price: float, rng: random.Random, args) -> Optional[float]:
+    """Decimal price the leg was filled at, or None if rejected"""
+    price = timeline.price_at(key, at)
+    if price is None or rng.random() < args.reject:
+        return None
+    if price != detected_price and rng.random() < args.reject_on_move:
+        return None
+    return price
+
+
+def simulate(detections: List[Dict], timeline: QuoteTimeline, latency_ms: float, args,
+             detector: ArbitrageDetector) -> Dict:
+    rng = random.Random(args.seed)
+    place_delay = latency_ms * (1 - args.hedge_share) / 1000
+    hedge_delay = latency_ms * args.hedge_share / 1000
+    stats = {'latency_ms': latency_ms, 'detected': len(detections), 'filled': 0, 'aborted': 0, 'exposed': 0, 'profit': 0.0}
+
+    for opportunity in detections:
+        sig, market = opportunity['match_id'], opportunity['market']
+        leg_1, leg_2 = opportunity['leg_1'], opportunity['leg_2']
+
+        placed_at = opportunity['detected_at'] + place_delay
+        positive = place_leg(timeline, (sig, leg_1['provider'], market, 'home'), placed_at, leg_1['decimal'], rng, args)
+        if positive is None:
+            stats['aborted'] += 1
+            continue
+
+        hedge = place_leg(timeline, (sig, leg_2['provider'], market, 'away'), placed_at + hedge_delay, leg_2['decimal'], rng, args)
+        if hedge is None:
+            stats['exposed'] += 1
+            stats['profit'] -= args.stake * args.exposure_cost
+            continue
+
+        stats['filled'] += 1
+        margin = detector.margin_from_total(implied_probability(positive) + implied_probability(hedge))
+        stats['profit'] += args.stake * margin / 100
+
+    stats['profit'] = round(stats['profit'], 2)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Captured profit vs execution latency')
+    parser.add_argument('history')
+    parser.add_argument('--latencies', default='0,100,200,300,500,750,1000,1500,2000,3000')
+    parser.add_argument('--hedge-share', type=float, default=0.5, help='fraction of latency spent between positive fill and hedge')
+    parser.add_argument('--reject', type=float, default=0.05)
+    parser.add_argument('--reject-on-move', type=float, default=1.0)
+    parser.add_argument('--exposure-cost', type=float, default=0.5)
+    parser.add_argument('--stake', type=float, default=100)
+    parser.add_argument('--settings', help='JSON object of detector settings')
+    parser.add_argument('--odds-formats', default='', help='provider price formats, e.g. C-Sport=malay (as on the ingest server)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the curve as JSON')
+    args = parser.parse_args()
+
+    settings = json.loads(args.settings) if args.settings else {}
+    if args.odds_formats:
+        settings['odds_formats'] = parse_odds_formats(args.odds_formats)
+    detections, timeline, detector = record_history(load_history(args.history), settings)
+    print(f"[SIM] {len(detections)} opportunities detected\n")
+
+    curve = [simulate(detections, timeline, float(ms), args, detector) for ms in args.latencies.split(',') if ms]
+    base = curve[0]['profit'] or 1
+    for point in curve:
+        print(f"  {point['latency_ms']:7.0f} ms  filled={point['filled']:<6} aborted={point['aborted']:<6} "
+              f"exposed={point['exposed']:<5} profit={point['profit']:<12} ({point['profit'] / base * 100:5.1f}%)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(curve, f, indent=2)
+        print(f"\n[SIM] Saved: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+"""
+Historical Odds Store
+Append-only columnar store of every quote change the engine ingests, for
+analytics over weeks of history (volatility per league, provider lag, ...).
+
+Layout: one directory per UTC day, one file per column.
+  <root>/2026-10-19/received_at.f8      float64 unix time
+  <root>/2026-10-19/ft_hdp_home.f8      float64 decimal odds, NaN = no price
+  <root>/2026-10-19/minute.i2           int16 match clock
+  <root>/2026-10-19/provider.u4         uint32 code into provider.dict
+  <root>/2026-10-19/provider.dict       one JSON string per line, append-only
+
+Numeric columns are fixed width, so a column file is a plain array that NumPy
+maps without parsing, and a query only reads the columns it names. String
+columns are dictionary encoded per partition. A partition's row count is the
+shortest column, so a crash mid-flush never exposes a partial row; before a
+writer first appends to a partition it truncates every column back to that
+count (and dictionaries to their last complete line), so rows stay aligned.
+
+Usage:
+  writer = OddsStoreWriter('/data/history')
+  engine.history = writer                       # BackendEngine records quote changes
+  store = OddsStore('/data/history')
+  cols = store.scan(['received_at', 'provider', 'ft_hdp_home'], '2026-10-01', '2026-10-19')
+  python odds_store.py volatility /data/history --start 2026-10-01 --by league
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import numpy as np
+
+MARKET_LEGS = [
+    ('ft_hdp', 'home'), ('ft_hdp', 'away'),
+    ('ft_ou', 'home'), ('ft_ou', 'away'),
+    ('ht_hdp', 'home'), ('ht_hdp', 'away'),
+    ('ht_ou', 'home'), ('ht_ou', 'away')
+]
+PRICE_COLUMNS = [f"{market}_{leg}" for market, leg in MARKET_LEGS]
+
+NUMERIC_COLUMNS = {'received_at': 'f8', 'half': 'i1', 'minute': 'i2'}
+NUMERIC_COLUMNS.update({column: 'f8' for column in PRICE_COLUMNS})
+STRING_COLUMNS = ['provider', 'event', 'league']
+CODE_DTYPE = 'u4'
+
+
+def partition_for(received_at: float) -> str:
+    return datetime.fromtimestamp(received_at, timezone.utc).strftime('%Y-%m-%d')
+
+
+def column_dtype(column: str) -> str:
+    return CODE_DTYPE if column in STRING_COLUMNS else NUMERIC_COLUMNS[column]
+
+
+def column_path(directory: str, column: str) -> str:
+    return os.path.join(directory, f"{column}.{column_dtype(column)}")
+
+
+def partition_row_count(directory: str) -> int:
+    """Complete rows in a partition: the shortest column"""
+    counts = []
+    for column in list(NUMERIC_COLUMNS) + STRING_COLUMNS:
+        path = column_path(directory, column)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        counts.append(size // np.dtype(column_dtype(column)).itemsize)
+    return min(counts)
+
+
+class OddsStoreWriter:
+    """Buffers quote rows and appends them column by column in batches"""
+
+    def __init__(self, root: str, batch_rows: int = 50000, flush_seconds: float = 5.0):
+        self.root = root
+        self.batch_rows = batch_rows
+        self.flush_seconds = flush_seconds
+        self.buffer = {column: [] for column in list(NUMERIC_COLUMNS) + STRING_COLUMNS}
+        self.dictionaries = {}
+        self.aligned = set()
+        self.last_flush = time.time()
+        self.rows_written = 0
+        os.makedirs(root, exist_ok=True)
+
+    def append_quote(self, sig: str, provider: str, quote: Dict):
+        """One row per ingested quote; prices are decimal odds from quote['prices']"""
+        buffer = self.buffer
+        buffer['received_at'].append(quote['received_at'])
+        buffer['half'].append(quote.get('half') or 0)
+        buffer['minute'].append(quote.get('minute') or 0)
+        buffer['provider'].append(provider)
+        buffer['event'].append(sig)
+        buffer['league'].append(quote.get('league') or '')
+        prices = quote.get('prices') or {}
+        for (market, leg), column in zip(MARKET_LEGS, PRICE_COLUMNS):
+            price = (prices.get(market) or {}).get(leg)
+            buffer[column].append(price[1] if price else np.nan)
+
+        if (len(buffer['received_at']) >= self.batch_rows
+                or time.time() - self.last_flush >= self.flush_seconds):
+            self.flush()
+
+    def dictionary(self, day: str, column: str) -> Dict[str, int]:
+        key = (day, column)
+        codes = self.dictionaries.get(key)
+        if codes is None:
+            codes = {value: i for i, value in enumerate(read_dictionary(os.path.join(self.root, day), column))}
+            self.dictionaries[key] = codes
+        return codes
+
+    def flush(self):
+        self.last_flush = time.time()
+        rows = len(self.buffer['received_at'])
+        if not rows:
+            return
+        buffer, self.buffer = self.buffer, {column: [] for column in self.buffer}
+        received_at = np.asarray(buffer['received_at'], dtype='f8')
+        days = [partition_for(t) for t in received_at[[0, -1]]]
+        if days[0] == days[1]:
+            self.write_partition(days[0], buffer, slice(None))
+        else:
+            labels = np.array([partition_for(t) for t in received_at])
+            for day in np.unique(labels):
+                self.write_partition(str(day), buffer, np.flatnonzero(labels == day))
+        self.rows_written += rows
+
+    def align_partition(self, directory: str):
+        """Cut every column to the complete row count and dictionaries to their last full line"""
+        rows = partition_row_count(directory)
+        for column in list(NUMERIC_COLUMNS) + STRING_COLUMNS:
+            path = column_path(directory, column)
+            if os.path.exists(path):
+                os.truncate(path, rows * np.dtype(column_dtype(column)).itemsize)
+        for column in STRING_COLUMNS:
+            path = os.path.join(directory, f"{column}.dict")
+            if os.path.exists(path):
+                with open(path, 'rb+') as f:
+                    data = f.read()
+                    f.truncate(data.rfind(b'\n') + 1)
+
+    def write_partition(self, day: str, buffer: Dict[str, list], rows):
+        directory = os.path.join(self.root, day)
+        os.makedirs(directory, exist_ok=True)
+        if day not in self.aligned:
+            # A crash mid-flush leaves some columns longer than others
+            self.align_partition(directory)
+            self.aligned.add(day)
+        # Dictionaries first: a code on disk always has its string
+        encoded = {}
+        for column in STRING_COLUMNS:
+            codes = self.dictionary(day, column)
+            values = np.asarray(buffer[column], dtype=object)[rows]
+            added = []
+            for value in values:
+                if value not in codes:
+                    codes[value] = len(codes)
+                    added.append(value)
+            if added:
+                with open(os.path.join(directory, f"{column}.dict"), 'a', encoding='utf-8') as f:
+                    f.write(''.join(f"{json.dumps(value)}\n" for value in added))
+            encoded[column] = np.fromiter((codes[value] for value in values), dtype=CODE_DTYPE, count=len(values))
+        for column, dtype in NUMERIC_COLUMNS.items():
+            encoded[column] = np.asarray(buffer[column], dtype=dtype)[rows]
+        for column, array in encoded.items():
+            with open(column_path(directory, column), 'ab') as f:
+                f.write(array.tobytes())
+
+    def close(self):
+        self.flush()
+
+
+def read_dictionary(directory: str, column: str) -> List[str]:
+    path = os.path.join(directory, f"{column}.dict")
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f.read().split('\n')[:-1]]
+
+
+class OddsStore:
+    """Read side: memory-mapped column scans over a range of daily partitions"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def partitions(self, start: str = None, end: str = None) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            day for day in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, day))
+            and (start is None or day >= start) and (end is None or day <= end)
+        )
+
+    def row_count(self, day: str) -> int:
+        return partition_row_count(os.path.join(self.root, day))
+
+    def read_partition(self, day: str, columns: List[str]) -> Dict[str, np.ndarray]:
+        """Memory-mapped views of the requested columns; string columns come back as codes"""
+        directory = os.path.join(self.root, day)
+        rows = self.row_count(day)
+        result = {}
+        for column in columns:
+            dtype = column_dtype(column)
+            if rows == 0:
+                result[column] = np.empty(0, dtype=dtype)
+            else:
+                result[column] = np.memmap(column_path(directory, column), dtype=dtype, mode='r', shape=(rows,))
+        return result
+
+    def scan(self, columns: List[str], start: str = None, end: str = None) -> Dict[str, np.ndarray]:
+        """
+        Concatenate columns across partitions. String columns are returned as
+        codes into a merged dictionary, available as result['<column>_labels'].
+        """
+        unknown = [c for c in columns if c not in NUMERIC_COLUMNS and c not in STRING_COLUMNS]
+        if unknown:
+            raise KeyError(f"Unknown columns: {unknown}")
+        parts = {column: [] for column in columns}
+        labels = {column: {} for column in columns if column in STRING_COLUMNS}
+        for day in self.partitions(start, end):
+            partition = self.read_partition(day, columns)
+            for column, array in partition.items():
+                if column in labels:
+                    merged = labels[column]
+                    local = read_dictionary(os.path.join(self.root, day), column)
+                    remap = np.fromiter((merged.setdefault(value, len(merged)) for value in local),
+                                        dtype=CODE_DTYPE, count=len(local))
+                    array = remap[array] if len(array) else array
+                parts[column].append(array)
+
+        result = {}
+        for column in columns:
+            dtype = column_dtype(column)
+            result[column] = np.concatenate(parts[column]) if parts[column] else np.empty(0, dtype=dtype)
+        for column, merged in labels.items():
+            result[f"{column}_labels"] = np.array(list(merged), dtype=object)
+        return result
+
+
+def volatility(store: OddsStore, by: str = 'league', column: str = 'ft_hdp_home',
+               start: str = None, end: str = None) -> List[Dict]:
+    """Std-dev of consecutive price moves per (provider, event), aggregated by a string column"""
+    cols = store.scan(['received_at', 'provider', 'event', by, column], start, end)
+    if not len(cols['received_at']):
+        return []
+    order = np.lexsort((cols['received_at'], cols['event'], cols['provider']))
+    price = cols[column][order]
+    series = cols['provider'][order].astype('u8') << 32 | cols['event'][order]
+    moves = np.diff(price)
+    valid = (series[1:] == series[:-1]) & ~np.isnan(moves)
+    group = cols[by][order][1:][valid]
+    moves = moves[valid]
+
+    rows = []
+    for code in np.unique(group):
+        sample = moves[group == code]
+        rows.append({
+            by: cols[f"{by}_labels"][code],
+            'moves': int(len(sample)),
+            'volatility': round(float(np.std(sample)), 5),
+            'mean_abs_move': round(float(np.mean(np.abs(sample))), 5)
+        })
+    return sorted(rows, key=lambda r: r['volatility'], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Historical odds store tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+    stats_cmd = sub.add_parser('stats', help='rows per partition')
+    stats_cmd.add_argument('root')
+    vol_cmd = sub.add_parser('volatility', help='price-move volatility grouped by a string column')
+    vol_cmd.add_argument('root')
+    vol_cmd.add_argument('--by', default='league', choices=STRING_COLUMNS)
+    vol_cmd.add_argument('--column', default='ft_hdp_home', choices=PRICE_COLUMNS)
+    vol_cmd.add_argument('--start')
+    vol_cmd.add_argument('--end')
+    args = parser.parse_args()
+
+    store = OddsStore(args.root)
+    if args.command == 'stats':
+        for day in store.partitions():
+            print(f"  {day}: {store.row_count(day):10d} rows")
+    elif args.command == 'volatility':
+        for row in volatility(store, args.by, args.column, args.start, args.end):
+            print(f"  {row[args.by]:40s} {row['moves']:8d} moves  sd {row['volatility']:.5f}  mean |move| {row['mean_abs_move']:.5f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Opportunity Dispatcher
+Runs the OpportunityScheduler after every detection cycle and turns its
+assignments into place_bet jobs on the workers' job stream.
+
+  jobs:stream    XADD job=<json> {'job_id', 'type': 'place_bet', 'payload'}
+  jobs:results   read (no consumer group) for the results of dispatched jobs;
+                 each one releases its accounts, with the cooldown the result
+                 reports (cooldown_seconds) mirrored locally
+
+Cooldowns are re-read from Redis on every cycle. An opportunity (event,
+market, leg providers) already being executed is not dispatched again, and a
+job whose result never arrives is released after in_flight_timeout seconds.
+"""
+
+import json
+import time
+import uuid
+from typing import Dict, List
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from opportunity_scheduler import OpportunityScheduler
+
+
+def opportunity_key(opportunity: Dict) -> tuple:
+    return (opportunity['match_id'], opportunity['market'],
+            opportunity['leg_1']['provider'], opportunity['leg_2']['provider'])
+
+
+class OpportunityDispatcher:
+    """Schedules each cycle's opportunities onto free accounts and enqueues them as place_bet jobs"""
+
+    def __init__(self, scheduler: OpportunityScheduler, redis_client, job_stream: str = 'jobs:stream',
+                 results_stream: str = 'jobs:results', in_flight_timeout: float = 120, maxlen: int = 100000):
+        """
+        Args:
+            scheduler: Scheduler holding the accounts
+            redis_client: redis.asyncio client
+            job_stream: Stream the workers consume jobs from
+            results_stream: Stream the workers' ResultSink writes to
+            in_flight_timeout: Seconds before a job without a result frees its accounts
+        """
+        self.scheduler = scheduler
+        self.redis_client = redis_client
+        self.job_stream = job_stream
+        self.results_stream = results_stream
+        self.in_flight_timeout = in_flight_timeout
+        self.maxlen = maxlen
+        # Results written before startup belong to jobs this process never held
+        self.results_id = f"{int(time.time() * 1000)}-0"
+        self.executing: Dict[tuple, str] = {}  # opportunity key -> job_id
+        self.stats = {'dispatched': 0, 'released': 0, 'overdue': 0, 'errors': 0}
+
+    @staticmethod
+    def _field(fields: Dict, name: str):
+        value = fields.get(name, fields.get(name.encode()))
+        return value.decode() if isinstance(value, bytes) and name != 'result' else value
+
+    def decode_result(self, fields: Dict) -> Dict:
+        data = self._field(fields, 'result')
+        if self._field(fields, 'enc') == 'msgpack':
+            if msgpack is None:
+                return {}
+            return msgpack.unpackb(data, raw=False)
+        return json.loads(data)
+
+    def _forget(self, job_id: str):
+        for key in [key for key, held in self.executing.items() if held == job_id]:
+            del self.executing[key]
+
+    def release(self, job_id: str, cooldown_seconds: float = None) -> bool:
+        if not self.scheduler.release_job(job_id, cooldown_seconds):
+            return False
+        self._forget(job_id)
+        return True
+
+    async def sync_results(self):
+        """Release the accounts of every dispatched job whose result arrived since the last call"""
+        response = await self.redis_client.xread({self.results_stream: self.results_id}, count=1000)
+        for _, entries in response or []:
+            for entry_id, fields in entries:
+                self.results_id = entry_id
+                job_id = self._field(fields, 'job_id')
+                if job_id not in self.scheduler.jobs:
+                    continue
+                try:
+                    result = self.decode_result(fields)
+                except Exception:
+                    result = {}
+                if self.release(job_id, result.get('cooldown_seconds') if isinstance(result, dict) else None):
+                    self.stats['released'] += 1
+        for job_id in self.scheduler.release_overdue(self.in_flight_timeout):
+            self._forget(job_id)
+            self.stats['overdue'] += 1
+            print(f"[DISPATCH] No result for {job_id} after {self.in_flight_timeout:.0f}s, accounts released")
+
+    async def refresh_cooldowns(self, now: float):
+        keys = list(self.scheduler.accounts)
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.pttl(key)
+        self.scheduler.apply_cooldown_ttls(keys, await pipe.execute(), now)
+
+    async def dispatch(self, result: Dict) -> int:
+        """Schedule one detection result's opportunities and enqueue their jobs; returns jobs enqueued"""
+        try:
+            await self.sync_results()
+            opportunities: List[Dict] = [
+                opportunity for opportunity in result.get('opportunities', [])
+                if opportunity_key(opportunity) not in self.executing
+            ]
+            if not opportunities:
+                return 0
+            now = time.time()
+            await self.refresh_cooldowns(now)
+            assignments = self.scheduler.schedule(opportunities, now, mark=False)
+            if not assignments:
+                return 0
+
+            pipe = self.redis_client.pipeline(transaction=False)
+            jobs = []
+            for assignment in assignments:
+                job_id = f"arb-{uuid.uuid4().hex[:16]}"
+                job = {'job_id': job_id, 'type': 'place_bet', 'payload': {**assignment, 'dispatched_at': now}}
+                pipe.xadd(self.job_stream, {'job': json.dumps(job, separators=(',', ':'))},
+                          maxlen=self.maxlen, approximate=True)
+                jobs.append((job_id, assignment))
+            await pipe.execute()
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"[DISPATCH] Dispatch failed: {e}")
+            return 0
+
+        # Held only once the jobs are in the stream, so a failed write never strands accounts
+        for job_id, assignment in jobs:
+            self.scheduler.hold(job_id, assignment, now)
+            self.executing[opportunity_key(assignment['opportunity'])] = job_id
+        self.stats['dispatched'] += len(jobs)
+        return len(jobs)
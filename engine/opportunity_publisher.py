@@ -0,0 +1,76 @@
+"""
+Opportunity Publisher
+Pushes every detection cycle's opportunities to Redis in one pipelined round trip:
+one capped Stream entry per opportunity plus one pub/sub message per cycle.
+
+Payloads are msgpack when available (field 'enc' = 'msgpack'), JSON otherwise.
+"""
+
+import json
+import time
+from typing import Dict, List
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class OpportunityPublisher:
+    """Publishes detection results to a Redis Stream and pub/sub channel"""
+
+    def __init__(self, redis_client, stream: str = 'opportunities:stream', channel: str = 'opportunities',
+                 maxlen: int = 10000, encoding: str = None):
+        """
+        Args:
+            redis_client: redis.asyncio client (decode_responses must be False for msgpack)
+            stream: Stream key; trimmed to roughly maxlen entries
+            channel: Pub/sub channel receiving one batch per cycle
+            encoding: 'msgpack' or 'json'; defaults to msgpack if installed
+        """
+        self.redis_client = redis_client
+        self.stream = stream
+        self.channel = channel
+        self.maxlen = maxlen
+        self.encoding = encoding or ('msgpack' if msgpack else 'json')
+        if self.encoding == 'msgpack' and not msgpack:
+            raise ValueError("msgpack encoding requested but msgpack is not installed")
+        self.stats = {'cycles': 0, 'published': 0, 'errors': 0}
+
+    def encode(self, payload) -> bytes:
+        if self.encoding == 'msgpack':
+            return msgpack.packb(payload, use_bin_type=True)
+        return json.dumps(payload, separators=(',', ':')).encode()
+
+    def decode(self, data: bytes):
+        if self.encoding == 'msgpack':
+            return msgpack.unpackb(data, raw=False)
+        return json.loads(data)
+
+    async def publish(self, result: Dict) -> int:
+        """Publish one cycle's opportunities; returns how many were written"""
+        opportunities: List[Dict] = result.get('opportunities', [])
+        if not opportunities:
+            return 0
+
+        published_at = time.time()
+        pipe = self.redis_client.pipeline(transaction=False)
+        for opportunity in opportunities:
+            pipe.xadd(
+                self.stream,
+                {'enc': self.encoding, 'data': self.encode(opportunity)},
+                maxlen=self.maxlen,
+                approximate=True
+            )
+        pipe.publish(self.channel, self.encode({'published_at': published_at, 'opportunities': opportunities}))
+
+        try:
+            await pipe.execute()
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"[PUBLISH] Failed to publish {len(opportunities)} opportunities: {e}")
+            return 0
+
+        self.stats['cycles'] += 1
+        self.stats['published'] += len(opportunities)
+        return len(opportunities)
@@ -0,0 +1,164 @@
+"""
+Opportunity Scheduler
+Assigns detected opportunities to free execution accounts once per tick.
+
+An account is unavailable while its cooldown key
+(cooldown:{whitelabel}:{provider}:{account_id}, set by the worker after a pair)
+is alive in Redis, or while it has a bet pair in flight. Pairs are in flight
+from hold() until the worker's result for their job arrives (release_job(),
+fed from jobs:results by OpportunityDispatcher), or until they are overdue.
+"""
+
+import time
+from typing import Dict, List, Optional
+
+
+class OpportunityScheduler:
+    """Greedy max-profit assignment of opportunities to (leg_1, leg_2) accounts"""
+
+    def __init__(self, accounts: List[Dict], redis_client=None, default_stake: float = 100):
+        """
+        Args:
+            accounts: [{'whitelabel', 'provider', 'account_id', 'stake'}, ...]
+            redis_client: Optional redis-py client used to read cooldown TTLs
+            default_stake: Stake for accounts without an explicit 'stake'
+        """
+        self.redis_client = redis_client
+        self.default_stake = default_stake
+        self.accounts = {}
+        for account in accounts:
+            account = dict(account, key=self.cooldown_key(account))
+            account.setdefault('stake', default_stake)
+            self.accounts[account['key']] = account
+        self.cooldown_until = {}
+        self.in_flight = set()
+        self.jobs: Dict[str, tuple] = {}  # job_id -> (account keys, held_at)
+
+    @staticmethod
+    def cooldown_key(account: Dict) -> str:
+        return f"cooldown:{account['whitelabel']}:{account['provider']}:{account['account_id']}"
+
+    def refresh_cooldowns(self, now: float = None):
+        """Read every account's cooldown TTL in one pipelined round trip"""
+        if not self.redis_client:
+            return
+        now = time.time() if now is None else now
+        keys = list(self.accounts)
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.pttl(key)
+        self.apply_cooldown_ttls(keys, pipe.execute(), now)
+
+    def apply_cooldown_ttls(self, keys: List[str], pttls: List[int], now: float):
+        """Mirror PTTL replies (ms; negative when the key is gone); local cooldowns run until they lapse"""
+        for key, pttl in zip(keys, pttls):
+            if pttl and pttl > 0:
+                self.cooldown_until[key] = max(self.cooldown_until.get(key, 0), now + pttl / 1000)
+            elif self.cooldown_until.get(key, 0) <= now:
+                self.cooldown_until.pop(key, None)
+
+    def start_cooldown(self, key: str, seconds: float, now: float = None):
+        self.cooldown_until[key] = (time.time() if now is None else now) + seconds
+
+    def mark_in_flight(self, key: str):
+        self.in_flight.add(key)
+
+    def release(self, key: str, cooldown_seconds: float = None):
+        """Account finished its pair; optionally start the local cooldown mirror"""
+        self.in_flight.discard(key)
+        if cooldown_seconds:
+            self.start_cooldown(key, cooldown_seconds)
+
+    def hold(self, job_id: str, assignment: Dict, now: float = None):
+        """Keep an assignment's accounts in flight until the result of job_id is released"""
+        keys = (assignment['leg_1_account']['key'], assignment['leg_2_account']['key'])
+        for key in keys:
+            self.mark_in_flight(key)
+        self.jobs[job_id] = (keys, time.time() if now is None else now)
+
+    def release_job(self, job_id: str, cooldown_seconds: float = None) -> bool:
+        """The worker reported job_id: free its accounts; False if the job was not held here"""
+        held = self.jobs.pop(job_id, None)
+        if held is None:
+            return False
+        for key in held[0]:
+            self.release(key, cooldown_seconds)
+        return True
+
+    def release_overdue(self, timeout: float, now: float = None) -> List[str]:
+        """Release jobs held longer than timeout seconds (their result was lost); returns their ids"""
+        now = time.time() if now is None else now
+        overdue = [job_id for job_id, (_, held_at) in self.jobs.items() if now - held_at > timeout]
+        for job_id in overdue:
+            self.release_job(job_id)
+        return overdue
+
+    def free_accounts(self, now: float = None) -> Dict[str, List[Dict]]:
+        """Available accounts per provider, sorted by stake so pop() takes the largest"""
+        now = time.time() if now is None else now
+        free = {}
+        for key, account in self.accounts.items():
+            if key in self.in_flight or self.cooldown_until.get(key, 0) > now:
+                continue
+            free.setdefault(account['provider'], []).append(account)
+        for provider_accounts in free.values():
+            provider_accounts.sort(key=lambda a: a['stake'])
+        return free
+
+    @staticmethod
+    def expected_profit(opportunity: Dict, stake: float) -> float:
+        return stake * opportunity['margin'] / 100
+
+    def schedule(self, opportunities: List[Dict], now: float = None, mark: bool = True) -> List[Dict]:
+        """
+        Assign opportunities to accounts for this tick.
+
+        Opportunities are taken in order of expected profit at the best stake
+        their providers can offer; each takes the largest free account on each
+        leg's provider. Assigned accounts are marked in flight unless mark=False.
+
+        Returns:
+            [{'opportunity', 'leg_1_account', 'leg_2_account', 'stake', 'expected_profit'}, ...]
+        """
+        free = self.free_accounts(now)
+        if not free:
+            return []
+
+        ranked = []
+        for opportunity in opportunities:
+            leg_1 = free.get(opportunity['leg_1']['provider'])
+            leg_2 = free.get(opportunity['leg_2']['provider'])
+            if not leg_1 or not leg_2:
+                continue
+            stake = min(leg_1[-1]['stake'], leg_2[-1]['stake'])
+            ranked.append((self.expected_profit(opportunity, stake), opportunity))
+        ranked.sort(key=lambda r: r[0], reverse=True)
+
+        assignments = []
+        for _, opportunity in ranked:
+            leg_1 = free.get(opportunity['leg_1']['provider'])
+            leg_2 = free.get(opportunity['leg_2']['provider'])
+            if not leg_1 or not leg_2:
+                continue
+            if leg_1 is leg_2 and len(leg_1) < 2:
+                continue
+            account_1 = leg_1.pop()
+            account_2 = leg_2.pop()
+            stake = min(account_1['stake'], account_2['stake'])
+            assignments.append({
+                'opportunity': opportunity,
+                'leg_1_account': account_1,
+                'leg_2_account': account_2,
+                'stake': stake,
+                'expected_profit': self.expected_profit(opportunity, stake)
+            })
+            if mark:
+                self.mark_in_flight(account_1['key'])
+                self.mark_in_flight(account_2['key'])
+
+        return assignments
+
+    def tick(self, opportunities: List[Dict], now: Optional[float] = None) -> List[Dict]:
+        """Refresh cooldowns from Redis, then schedule"""
+        self.refresh_cooldowns(now)
+        return self.schedule(opportunities, now)
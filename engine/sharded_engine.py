@@ -0,0 +1,156 @@
+"""
+Sharded Detection
+Partitions events by a hash of their signature across N worker processes.
+Each shard owns its slice of the book and only receives the quotes routed to it;
+the coordinator merges the per-shard opportunity streams. The coordinator's
+route cache (team names -> shard) lives as long as the event's quotes do: an
+entry is evicted once no provider quotes the event, whether its providers
+stopped sending it or its quotes ran past their freshness budget.
+"""
+
+import multiprocessing as mp
+import os
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, List
+
+from backend_engine import BackendEngine, EventMatcher, QuoteExpiryIndex
+
+
+def shard_for(sig: str, num_shards: int) -> int:
+    """Stable shard index for an event signature (same across processes and restarts)"""
+    return zlib.crc32(sig.encode()) % num_shards
+
+
+def run_shard(conn, settings: Dict, odds_formats: Dict):
+    """Shard process loop: apply routed snapshots to a local BackendEngine"""
+    engine = BackendEngine(odds_formats)
+    if settings:
+        engine.update_settings(settings)
+
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        kind, payload, received_at = msg
+        if kind == 'settings':
+            engine.update_settings(payload)
+            continue
+        conn.send(engine.process_odds(payload, received_at))
+    conn.close()
+
+
+class ShardedEngine:
+    """Coordinator with the same process_odds contract as BackendEngine"""
+
+    def __init__(self, num_shards: int = None, settings: Dict = None, odds_formats: Dict = None):
+        self.num_shards = num_shards or os.cpu_count() or 1
+        self.settings = settings or {}
+        self.odds_formats = odds_formats or {}
+        self.matcher = EventMatcher()
+        self.route_cache = {}
+        self.route_expiry = QuoteExpiryIndex(self.settings)
+        self.route_quoted = {}  # teams -> providers quoting them
+        self.provider_teams = {}
+        self.conns = []
+        self.processes = []
+
+    def start(self):
+        for _ in range(self.num_shards):
+            parent_conn, child_conn = mp.Pipe()
+            process = mp.Process(target=run_shard, args=(child_conn, self.settings, self.odds_formats), daemon=True)
+            process.start()
+            child_conn.close()
+            self.conns.append(parent_conn)
+            self.processes.append(process)
+
+    def stop(self):
+        for conn in self.conns:
+            try:
+                conn.send(None)
+                conn.close()
+            except (OSError, BrokenPipeError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+        self.conns = []
+        self.processes = []
+
+    def route(self, odds_by_provider: Dict, received_at: float = None) -> List[Dict]:
+        """Split provider snapshots into one snapshot per shard.
+
+        Every shard receives every provider key (possibly with no matches) so that a
+        snapshot still replaces that provider's previous quotes in each slice.
+        """
+        if received_at is None:
+            received_at = time.time()
+        routed = [{provider: [] for provider in odds_by_provider} for _ in range(self.num_shards)]
+        for provider, matches in odds_by_provider.items():
+            fresh = set()
+            for match in matches:
+                teams = (match.get('home_team', ''), match.get('away_team', ''))
+                shard = self.route_cache.get(teams)
+                if shard is None:
+                    sig = self.matcher.match_signature(
+                        self.matcher.normalize_team_name(teams[0]),
+                        self.matcher.normalize_team_name(teams[1])
+                    )
+                    shard = self.route_cache[teams] = shard_for(sig, self.num_shards)
+                routed[shard][provider].append(match)
+                fresh.add(teams)
+                self.route_quoted.setdefault(teams, set()).add(provider)
+                self.route_expiry.track(teams, provider, match.get('received_at') or received_at)
+            # A snapshot replaces the provider's quotes, as in the shards
+            for teams in self.provider_teams.get(provider, set()) - fresh:
+                self.route_expiry.discard(teams, provider)
+                self.unroute(teams, provider)
+            self.provider_teams[provider] = fresh
+        return routed
+
+    def unroute(self, teams, provider: str):
+        quoted = self.route_quoted.get(teams)
+        if quoted is None:
+            return
+        quoted.discard(provider)
+        if not quoted:
+            del self.route_quoted[teams]
+            self.route_cache.pop(teams, None)
+
+    def expire_routes(self, now: float = None) -> int:
+        """Forget routes of events whose quotes expired in the shards; returns cache entries evicted"""
+        cached = len(self.route_cache)
+        for teams, provider in self.route_expiry.pop_expired(time.time() if now is None else now):
+            self.provider_teams.get(provider, set()).discard(teams)
+            self.unroute(teams, provider)
+        return cached - len(self.route_cache)
+
+    def process_odds(self, odds_by_provider: Dict, received_at: float = None) -> Dict:
+        """Fan a snapshot out to the shards and merge their results"""
+        routed = self.route(odds_by_provider, received_at)
+        self.expire_routes()
+        for conn, payload in zip(self.conns, routed):
+            conn.send(('odds', payload, received_at))
+
+        result = {
+            'timestamp': datetime.now().isoformat(),
+            'providers': len(odds_by_provider),
+            'events_matched': 0,
+            'quotes_expired': 0,
+            'opportunities_found': 0,
+            'opportunities': []
+        }
+        for conn in self.conns:
+            shard_result = conn.recv()
+            result['events_matched'] += shard_result['events_matched']
+            result['quotes_expired'] += shard_result['quotes_expired']
+            result['opportunities'].extend(shard_result['opportunities'])
+
+        result['opportunities'].sort(key=lambda o: o['margin'], reverse=True)
+        result['opportunities_found'] = len(result['opportunities'])
+        return result
+
+    def update_settings(self, new_settings: Dict):
+        self.settings.update(new_settings)
+        for conn in self.conns:
+            conn.send(('settings', new_settings, None))
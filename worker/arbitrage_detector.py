@@ -12,24 +12,29 @@ class ArbitrageDetector:
             'round_off': 5
         }
     
-    def parse_time_to_minutes(self, time_str: str) -> int:
+    def parse_match_clock(self, time_str: str) -> tuple:
+        """Parse '1H 3', '2H 10', 'HT' or '67' into (half, match minute)"""
         if not time_str:
-            return 0
+            return 0, 0
         try:
             parts = time_str.split()
-            if 'H' in time_str:
-                h = int(parts[0].replace('H', ''))
-                m = int(parts[1]) if len(parts) > 1 else 0
-                return h * 60 + m
-            return int(time_str)
+            if parts[0].upper() == 'HT':
+                return 1, 45
+            if 'H' in parts[0]:
+                half = int(parts[0].replace('H', ''))
+                minute = int(parts[1]) if len(parts) > 1 else 0
+                return half, minute + (half - 1) * 45
+            minute = int(time_str)
+            return (1 if minute <= 45 else 2), minute
         except:
-            return 0
+            return 0, 0
+    
+    def parse_time_to_minutes(self, time_str: str) -> int:
+        return self.parse_match_clock(time_str)[1]
     
     def apply_time_filter(self, match_info: Dict) -> bool:
-        time_str = match_info.get('time', '')
-        minutes = self.parse_time_to_minutes(time_str)
-        is_ht = minutes < 45
-        limit = self.settings['minute_limit_ht'] if is_ht else self.settings['minute_limit_ft']
+        half, minutes = self.parse_match_clock(match_info.get('time', ''))
+        limit = self.settings['minute_limit_ht'] if half <= 1 else self.settings['minute_limit_ft']
         return minutes <= limit
     
     def calculate_margin(self, odds1: float, odds2: float) -> float:
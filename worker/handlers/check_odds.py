@@ -1,10 +1,12 @@
 """
 Check Odds Handler
-Handles odds checking jobs (stub implementation)
+Handles odds checking jobs from captured network traffic (no DOM scraping)
 """
 
+import time
 from typing import Dict, Any
 from playwright.sync_api import BrowserContext
+from odds_capture import capture_profile_for, parse_capture, select_matches
 from .base import BaseHandler
 
 
@@ -12,8 +14,8 @@ class CheckOddsHandler(BaseHandler):
     """
     Handler for checking odds on sportsbook
     
-    Note: This is a stub implementation for Phase 1.
-    Full implementation will be added in Phase 3.
+    Loads the event page and reads the odds from the first XHR response or
+    WebSocket frame matching the bookmaker's capture profile (odds_capture).
     """
     
     def execute(self, payload: Dict[str, Any], context: BrowserContext) -> Dict[str, Any]:
@@ -23,27 +25,56 @@ class CheckOddsHandler(BaseHandler):
         Payload structure:
         {
             "event_id": "string",
-            "markets": ["1X2", "Over/Under", ...]
+            "markets": ["ft_hdp", "ft_ou", ...],
+            "url": "string",
+            "bookmaker": "string",     # optional, selects the capture profile
+            "timeout": float           # optional, seconds (default 15)
         }
         """
         self.log_execution('check_odds', payload)
         
         try:
             # Validate required fields
-            self.validate_payload(payload, ['event_id', 'markets'])
+            self.validate_payload(payload, ['event_id', 'markets', 'url'])
+            profile = capture_profile_for((payload.get('bookmaker') or payload['url']).lower())
             
-            # TODO: Implement actual odds checking logic
-            # Steps would include:
-            # 1. Navigate to event page
-            # 2. Extract odds for requested markets
-            # 3. Return structured odds data
+            # Listeners only collect; bodies are read and parsed outside the event callbacks
+            captured = []
+            page = context.new_page()
+            try:
+                page.on('response', lambda response: captured.append(response) if (
+                    response.request.resource_type in ('xhr', 'fetch') and profile.matches_response(response.url)
+                ) else None)
+                page.on('websocket', lambda ws: ws.on('framereceived', captured.append)
+                        if profile.matches_websocket(ws.url) else None)
+                page.goto(payload['url'], wait_until='domcontentloaded')
+                
+                matches = None
+                deadline = time.time() + float(payload.get('timeout', 15))
+                while matches is None and time.time() < deadline:
+                    while captured and matches is None:
+                        item = captured.pop(0)
+                        try:
+                            body = item if isinstance(item, (str, bytes)) else item.body()
+                        except Exception:
+                            continue
+                        matches = parse_capture(body)
+                    if matches is None:
+                        page.wait_for_timeout(50)  # lets Playwright dispatch further events
+            finally:
+                page.close()
             
+            if matches is None:
+                raise TimeoutError('No odds traffic captured')
+            
+            selected = select_matches(matches, payload['event_id'], payload['markets'])
             result = {
-                'success': True,
-                'message': 'Odds checking (stub - not implemented)',
-                'note': 'Full implementation pending in Phase 3',
-                'payload_received': payload,
-                'odds': {}  # Placeholder
+                'success': bool(selected),
+                'source': 'network',
+                'event_id': payload['event_id'],
+                'odds': selected[0]['odds'] if selected else {},
+                'match': selected[0] if selected else None,
+                'total_matches': len(matches)
             }
             
             self.log_success(result)
@@ -0,0 +1,145 @@
+"""
+Job Scheduler
+Bounded concurrent execution of worker jobs on one event loop (one browser).
+
+  max_concurrency   jobs running at once across all types
+  limits            per job type cap, e.g. {'login': 2, 'check_odds': 6}
+  max_backlog       accepted-but-not-started jobs; submit() waits beyond it so
+                    jobs stay in Redis for other workers instead of piling up here
+  backlog_limits    queued jobs per type (defaults to the type's limit); submit()
+                    turns down a job whose type is full, so one type held at its
+                    limit cannot fill the shared backlog ahead of the others
+
+Dispatch is round robin over job types that have queued work and spare
+capacity, so a burst of slow logins can never starve check_odds jobs.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class JobScheduler:
+    """Per-type FIFO queues with round-robin dispatch under global and per-type limits"""
+
+    def __init__(self, execute: Callable[[Dict[str, Any]], Awaitable[Any]], max_concurrency: int = 4,
+                 limits: Dict[str, int] = None, max_backlog: int = None, backlog_limits: Dict[str, int] = None):
+        """
+        Args:
+            execute: Coroutine function run for every job
+            max_concurrency: Jobs running at once
+            limits: Per job type concurrency caps (types not listed use max_concurrency)
+            max_backlog: Queued jobs before submit() blocks (defaults to max_concurrency)
+            backlog_limits: Queued jobs per type before submit() refuses that type
+        """
+        self.execute = execute
+        self.max_concurrency = max_concurrency
+        self.limits = limits or {}
+        self.max_backlog = max_backlog or max_concurrency
+        self.backlog_limits = backlog_limits or {}
+        self.queues: Dict[str, deque] = {}
+        self.rotation: deque = deque()
+        self.running: Dict[str, int] = {}
+        self.tasks = set()
+        self.backlog = 0
+        self.draining = False
+        self.changed = None
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'refused': 0, 'queue_wait_max_ms': 0.0}
+
+    def _event(self) -> asyncio.Event:
+        if self.changed is None:
+            self.changed = asyncio.Event()
+        return self.changed
+
+    def has_capacity(self) -> bool:
+        return self.backlog < self.max_backlog
+
+    async def wait_for_capacity(self):
+        """Block until the backlog has room for another job"""
+        while not self.has_capacity():
+            self._event().clear()
+            await self._event().wait()
+
+    async def wait_for_change(self, timeout: float):
+        """Block until a job starts or finishes, or timeout seconds pass"""
+        self._event().clear()
+        try:
+            await asyncio.wait_for(self._event().wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def has_room(self, job_type: str) -> bool:
+        queued = len(self.queues.get(job_type, ()))
+        return queued < self.backlog_limits.get(job_type, self._limit(job_type))
+
+    async def submit(self, job: Dict[str, Any]) -> bool:
+        """Queue a job; False (job not taken) when its type's backlog is full"""
+        await self.wait_for_capacity()
+        job_type = job.get('type') or 'unknown'
+        if not self.has_room(job_type):
+            self.stats['refused'] += 1
+            return False
+        if job_type not in self.queues:
+            self.queues[job_type] = deque()
+            self.rotation.append(job_type)
+        self.queues[job_type].append((time.perf_counter(), job))
+        self.backlog += 1
+        self.stats['submitted'] += 1
+        self._dispatch()
+        return True
+
+    def _limit(self, job_type: str) -> int:
+        return min(self.limits.get(job_type, self.max_concurrency), self.max_concurrency)
+
+    def _dispatch(self):
+        """Start jobs round robin across types until a limit is hit"""
+        while not self.draining and len(self.tasks) < self.max_concurrency:
+            for _ in range(len(self.rotation)):
+                job_type = self.rotation[0]
+                self.rotation.rotate(-1)
+                if self.queues[job_type] and self.running.get(job_type, 0) < self._limit(job_type):
+                    break
+            else:
+                return
+            queued_at, job = self.queues[job_type].popleft()
+            self.backlog -= 1
+            waited = (time.perf_counter() - queued_at) * 1000
+            self.stats['queue_wait_max_ms'] = max(self.stats['queue_wait_max_ms'], round(waited, 3))
+            self.running[job_type] = self.running.get(job_type, 0) + 1
+            task = asyncio.get_running_loop().create_task(self._run(job_type, job))
+            self.tasks.add(task)
+            self._event().set()
+
+    async def _run(self, job_type: str, job: Dict[str, Any]):
+        try:
+            await self.execute(job)
+            self.stats['completed'] += 1
+        except Exception as e:
+            self.stats['failed'] += 1
+            logger.error(f"Job {job.get('job_id')} crashed: {e}", exc_info=True)
+        finally:
+            self.running[job_type] -= 1
+            self.tasks.discard(asyncio.current_task())
+            self._dispatch()
+            self._event().set()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'running': dict(self.running),
+            'queued': {job_type: len(queue) for job_type, queue in self.queues.items()}
+        }
+
+    async def drain(self, timeout: float = None):
+        """Stop starting queued jobs and wait until no job is running (or timeout seconds pass)"""
+        self.draining = True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.tasks:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            await asyncio.wait(set(self.tasks), timeout=remaining)
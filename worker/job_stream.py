@@ -0,0 +1,204 @@
+"""
+Job Stream
+Redis Streams transport for worker jobs (replaces BLPOP jobs:queue).
+
+  jobs:stream          XADD job=<json>; producers trim with MAXLEN ~
+  group 'workers'      every worker is a consumer; an entry is owned by one
+                       worker until XACKed after its result was reported
+  jobs:dead            entries delivered max_deliveries times without an ack
+
+Delivery is at least once: entries a crashed worker never acknowledged are
+claimed by another worker once idle for claim_idle_ms. Workers heartbeat
+their in-flight entries from a task of their own (every heartbeat_interval)
+so long jobs are not stolen, even while the worker takes no new jobs; an
+entry another worker already claimed is dropped, never taken back. Jobs
+still pushed to the legacy jobs:queue list are moved into the stream while
+producers migrate. A job the worker cannot take right now is requeued: added
+back at the tail for any worker and its own entry acknowledged.
+"""
+
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] legacy list, KEYS[2] stream; ARGV: count, maxlen. Range, XADDs and trim are atomic,
+# so a crash can never lose jobs between the list and the stream
+MIGRATE_SCRIPT = """
+local jobs = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+for _, raw in ipairs(jobs) do
+    redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[2], '*', 'job', raw)
+end
+if #jobs > 0 then
+    redis.call('LTRIM', KEYS[1], #jobs, -1)
+end
+return #jobs
+"""
+
+# KEYS[1] stream; ARGV: group, consumer, entry ids. Resets the idle time of the entries
+# this consumer still owns and returns the ones it no longer does
+HEARTBEAT_SCRIPT = """
+local lost = {}
+for i = 3, #ARGV do
+    local owned = redis.call('XPENDING', KEYS[1], ARGV[1], ARGV[i], ARGV[i], 1, ARGV[2])
+    if #owned == 0 then
+        table.insert(lost, ARGV[i])
+    else
+        redis.call('XCLAIM', KEYS[1], ARGV[1], ARGV[2], 0, ARGV[i], 'JUSTID')
+    end
+end
+return lost
+"""
+
+
+class JobStream:
+    """Consumer-group reader with stale-entry claiming and queue depth/lag stats"""
+
+    def __init__(self, redis_client: aioredis.Redis, consumer: str, stream: str = 'jobs:stream',
+                 group: str = 'workers', claim_idle_ms: int = 120000, max_deliveries: int = 5,
+                 block_ms: int = 5000, dead_stream: str = 'jobs:dead', legacy_queue: str = 'jobs:queue',
+                 maxlen: int = 100000):
+        self.redis = redis_client
+        self.consumer = consumer
+        self.stream = stream
+        self.group = group
+        self.claim_idle_ms = claim_idle_ms
+        self.max_deliveries = max_deliveries
+        self.block_ms = block_ms
+        self.dead_stream = dead_stream
+        self.legacy_queue = legacy_queue
+        self.maxlen = maxlen
+        self.in_flight: Dict[str, float] = {}
+        self.last_claim = 0.0
+        self.last_heartbeat = time.time()
+        self.stats = {'read': 0, 'claimed': 0, 'acked': 0, 'dead_lettered': 0, 'migrated': 0, 'requeued': 0, 'lost': 0}
+
+    async def ensure_group(self):
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id='0', mkstream=True)
+            logger.info(f"Created consumer group {self.group} on {self.stream}")
+        except aioredis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    async def enqueue(self, job: Dict[str, Any]) -> str:
+        """Producer side: append one job"""
+        return await self.redis.xadd(self.stream, {'job': json.dumps(job, separators=(',', ':'))},
+                                     maxlen=self.maxlen, approximate=True)
+
+    async def migrate_legacy(self, count: int) -> int:
+        """Move up to count jobs from the legacy list into the stream"""
+        if not self.legacy_queue:
+            return 0
+        migrated = await self.redis.eval(MIGRATE_SCRIPT, 2, self.legacy_queue, self.stream, count, self.maxlen)
+        self.stats['migrated'] += migrated
+        return migrated
+
+    async def read(self, count: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """Up to count jobs: stale entries of dead consumers first, then new ones (blocking)"""
+        await self.migrate_legacy(count)
+        entries = []
+        if time.time() - self.last_claim >= self.claim_idle_ms / 4000:
+            self.last_claim = time.time()
+            entries = await self.claim_stale(count)
+        if len(entries) < count:
+            response = await self.redis.xreadgroup(
+                self.group, self.consumer, {self.stream: '>'}, count=count - len(entries),
+                block=self.block_ms if not entries else None
+            )
+            for _, messages in response or []:
+                entries.extend(messages)
+                self.stats['read'] += len(messages)
+
+        jobs = []
+        for entry_id, fields in entries:
+            try:
+                job = json.loads(fields['job'])
+            except (KeyError, TypeError, ValueError):
+                logger.error(f"Malformed job entry {entry_id}, dead-lettering")
+                await self.dead_letter(entry_id, fields, 'malformed')
+                continue
+            self.in_flight[entry_id] = time.time()
+            jobs.append((entry_id, job))
+        return jobs
+
+    async def claim_stale(self, count: int) -> List[Tuple[str, Dict]]:
+        """XCLAIM entries idle past claim_idle_ms; entries over max_deliveries go to the dead stream"""
+        pending = await self.redis.xpending_range(
+            self.stream, self.group, min='-', max='+', count=count, idle=self.claim_idle_ms
+        )
+        if not pending:
+            return []
+        claimable = []
+        for entry in pending:
+            if entry['times_delivered'] >= self.max_deliveries:
+                fields = await self.redis.xrange(self.stream, entry['message_id'], entry['message_id'])
+                await self.dead_letter(entry['message_id'], fields[0][1] if fields else {}, 'max_deliveries')
+            else:
+                claimable.append(entry['message_id'])
+        if not claimable:
+            return []
+        claimed = await self.redis.xclaim(self.stream, self.group, self.consumer, self.claim_idle_ms, claimable)
+        claimed = [(entry_id, fields) for entry_id, fields in claimed if fields]
+        self.stats['claimed'] += len(claimed)
+        if claimed:
+            logger.info(f"Claimed {len(claimed)} stale job entries")
+        return claimed
+
+    async def dead_letter(self, entry_id: str, fields: Dict, reason: str):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(self.dead_stream, {**fields, 'entry_id': entry_id, 'reason': reason},
+                      maxlen=self.maxlen, approximate=True)
+            pipe.xack(self.stream, self.group, entry_id)
+            await pipe.execute()
+        self.stats['dead_lettered'] += 1
+
+    async def ack(self, entry_id: str):
+        await self.redis.xack(self.stream, self.group, entry_id)
+        self.in_flight.pop(entry_id, None)
+        self.stats['acked'] += 1
+
+    async def requeue(self, entry_id: str, job: Dict[str, Any]):
+        """Hand a read job back to the stream (new entry at the tail) and ack the old entry"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(self.stream, {'job': json.dumps(job, separators=(',', ':'))},
+                      maxlen=self.maxlen, approximate=True)
+            pipe.xack(self.stream, self.group, entry_id)
+            await pipe.execute()
+        self.in_flight.pop(entry_id, None)
+        self.stats['requeued'] += 1
+
+    @property
+    def heartbeat_interval(self) -> float:
+        """Seconds between heartbeats: three per claim_idle_ms"""
+        return self.claim_idle_ms / 3000
+
+    async def heartbeat(self):
+        """Reset the idle time of this worker's in-flight entries so long jobs are not claimed"""
+        if not self.in_flight:
+            return
+        self.last_heartbeat = time.time()
+        lost = await self.redis.eval(HEARTBEAT_SCRIPT, 1, self.stream, self.group, self.consumer, *self.in_flight)
+        for entry_id in lost:
+            # Claimed by another worker after a missed heartbeat: it owns the entry now
+            self.in_flight.pop(entry_id, None)
+            self.stats['lost'] += 1
+            logger.warning(f"Job entry {entry_id} was claimed by another worker")
+
+    async def queue_stats(self) -> Dict[str, Any]:
+        """Stream depth, group pending count and lag (entries not yet delivered, Redis >= 7)"""
+        depth = await self.redis.xlen(self.stream)
+        groups = await self.redis.xinfo_groups(self.stream)
+        group = next((g for g in groups if g.get('name') == self.group), {})
+        return {
+            'depth': depth,
+            'pending': group.get('pending', 0),
+            'lag': group.get('lag'),
+            'consumers': group.get('consumers', 0),
+            'in_flight_here': len(self.in_flight),
+            **self.stats
+        }
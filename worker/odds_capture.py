@@ -0,0 +1,339 @@
+"""
+Network Odds Capture
+Reads odds from the traffic bookmaker frontends already receive: XHR/fetch
+responses and WebSocket frames whose URL matches the bookmaker's capture
+profile are decoded as C-Sport JSON, parsed with CSportOddsParser (off the
+event loop) and published as odds_update messages right away. No DOM queries,
+no extra reloads; a page only has to stay open.
+
+  responses    URL regexes of XHR/fetch endpoints; each body is a full list for
+               its endpoint (matches it no longer contains are dropped)
+  websockets   URL regexes of sockets; each frame is an upsert of the matches it carries
+
+Matches are merged into one book per bookmaker (by match_id) and published in
+full, since the engine treats every odds_update as the provider's snapshot;
+each match carries the time a source last refreshed it as received_at, so the
+engine ages it from then rather than from the republish. Matches no source has
+refreshed for max_age seconds are dropped. Bodies are parsed one at a time per
+endpoint, and only the newest one waiting is kept (a socket match only carried
+by a dropped frame returns with its next frame); identical bodies are skipped.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from playwright.async_api import Page, Response, WebSocket
+
+from offload import OffloadExecutor, parse_csport_response
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_PROFILES: Dict[str, Dict[str, List[str]]] = {
+    'qq188': {
+        'responses': [r'csport', r'/[Oo]dds', r'GetMatch', r'MatchList'],
+        'websockets': [r'csport', r'odds', r'/push'],
+    },
+    'default': {
+        'responses': [r'csport', r'/[Oo]dds'],
+        'websockets': [r'csport', r'odds'],
+    }
+}
+
+
+def decode_capture(body) -> Optional[Dict]:
+    """C-Sport {'data': [[...], ...]} from a body or frame; None when it is not odds JSON"""
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', errors='replace')
+    # Socket.IO / SignalR style frames carry a numeric prefix before the JSON
+    starts = [i for i in (body.find('{'), body.find('[')) if i >= 0]
+    if not starts:
+        return None
+    try:
+        data = json.loads(body[min(starts):])
+    except ValueError:
+        return None
+    if isinstance(data, list):
+        if data and all(isinstance(row, list) for row in data):
+            return {'data': data}
+        # ["odds", {...}] event frames
+        data = next((item for item in data if isinstance(item, dict)), None)
+    if isinstance(data, dict) and isinstance(data.get('data'), list):
+        return data
+    return None
+
+
+def parse_capture(body) -> Optional[List[Dict]]:
+    """decode_capture + CSportOddsParser; module level so the process offload can pickle it"""
+    payload = decode_capture(body)
+    if payload is None:
+        return None
+    return parse_csport_response(payload)['matches']
+
+
+def select_matches(matches: List[Dict], event_id: str = None, markets: List[str] = None) -> List[Dict]:
+    """Matches for one event (all when event_id is None), odds limited to the given markets"""
+    if event_id is not None:
+        matches = [match for match in matches if match['match_id'] == str(event_id)]
+    if markets:
+        wanted = {market.lower() for market in markets}
+        matches = [{**match, 'odds': {k: v for k, v in match['odds'].items() if k in wanted}} for match in matches]
+    return matches
+
+
+class CaptureProfile:
+    """Compiled endpoint patterns for one bookmaker"""
+
+    def __init__(self, name: str, responses: List[str], websockets: List[str]):
+        self.name = name
+        self.responses = re.compile('|'.join(responses)) if responses else None
+        self.websockets = re.compile('|'.join(websockets)) if websockets else None
+
+    def matches_response(self, url: str) -> bool:
+        return bool(self.responses and self.responses.search(url))
+
+    def matches_websocket(self, url: str) -> bool:
+        return bool(self.websockets and self.websockets.search(url))
+
+
+def capture_profile_for(bookmaker: str, profiles: Dict = None) -> CaptureProfile:
+    profiles = profiles or CAPTURE_PROFILES
+    for name, rules in profiles.items():
+        if name != 'default' and name in (bookmaker or ''):
+            return CaptureProfile(name, **rules)
+    return CaptureProfile('default', **profiles['default'])
+
+
+class OddsCapture:
+    """Page listeners that turn matching network traffic into published odds_update messages"""
+
+    def __init__(self, publish: Callable[[Dict[str, Any]], Awaitable[None]], offload: OffloadExecutor = None,
+                 profiles: Dict = None, max_age: float = 30):
+        """
+        Args:
+            publish: Coroutine called with every odds_update message
+            offload: Executor for decode + parse (inline when None)
+            profiles: Capture profiles (defaults to CAPTURE_PROFILES)
+            max_age: Seconds a match survives without being refreshed (keep <= the engine's quote_max_age)
+        """
+        self.publish = publish
+        self.offload = offload
+        self.profiles = profiles or CAPTURE_PROFILES
+        self.max_age = max_age
+        self.books: Dict[str, Dict[str, tuple]] = {}  # bookmaker -> match_id -> (match, source, seen_at)
+        self.updated_at: Dict[str, float] = {}
+        self.attached: Dict[int, str] = {}
+        self.targets: Dict[int, tuple] = {}  # id(page) -> (requested url, landed url without query)
+        self.sequence = itertools.count(1)
+        self.applied: Dict[tuple, int] = {}
+        self.digests: Dict[tuple, int] = {}
+        self.tasks = set()
+        self.waiting: Dict[tuple, tuple] = {}  # source -> newest (kind, url, body) not yet parsed
+        self.draining = set()
+        self.stats = {'responses': 0, 'frames': 0, 'parsed': 0, 'ignored': 0, 'duplicates': 0,
+                      'superseded': 0, 'stale': 0, 'errors': 0, 'published': 0}
+
+    def attach(self, page: Page, bookmaker: str) -> bool:
+        """Subscribe to the page's responses and sockets (once per page; listeners die with it)"""
+        if id(page) in self.attached:
+            return False
+        bookmaker = (bookmaker or 'default').lower()
+        profile = capture_profile_for(bookmaker, self.profiles)
+
+        def on_response(response: Response):
+            if response.request.resource_type in ('xhr', 'fetch') and profile.matches_response(response.url):
+                self._spawn(self._capture_response(bookmaker, response))
+
+        def on_websocket(ws: WebSocket):
+            if profile.matches_websocket(ws.url):
+                logger.info(f"Odds capture: {bookmaker} socket {ws.url}")
+                ws.on('framereceived', lambda payload: self._offer(bookmaker, 'websocket', ws.url, payload))
+
+        page.on('response', on_response)
+        page.on('websocket', on_websocket)
+        page.on('close', lambda _: (self.attached.pop(id(page), None), self.targets.pop(id(page), None)))
+        self.attached[id(page)] = bookmaker
+        return True
+
+    @staticmethod
+    def _location(url: str) -> str:
+        return url.split('#', 1)[0].split('?', 1)[0].rstrip('/')
+
+    def set_target(self, page: Page, url: str):
+        """Remember where a navigation to url landed (after redirects such as locale paths)"""
+        self.targets[id(page)] = (url, self._location(page.url))
+
+    def on_target(self, page: Page, url: str) -> bool:
+        """True while the page still shows what navigating to url produced"""
+        target = self.targets.get(id(page))
+        return bool(target) and target[0] == url and self._location(page.url) == target[1]
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _capture_response(self, bookmaker: str, response: Response):
+        try:
+            body = await response.body()
+        except Exception as e:
+            # Redirects and bodies evicted after navigation have nothing to read
+            logger.debug(f"Odds capture: no body for {response.url}: {e}")
+            return
+        self._offer(bookmaker, 'response', response.url, body)
+
+    def _offer(self, bookmaker: str, kind: str, url: str, body):
+        """Queue a body for its endpoint; one still waiting to be parsed is replaced, never piled up"""
+        self.stats['responses' if kind == 'response' else 'frames'] += 1
+        source = (bookmaker, url.split('?', 1)[0])
+        if source in self.waiting:
+            self.stats['superseded'] += 1
+        self.waiting[source] = (kind, url, body)
+        if source not in self.draining:
+            self.draining.add(source)
+            self._spawn(self._drain(bookmaker, source))
+
+    async def _drain(self, bookmaker: str, source: tuple):
+        try:
+            while source in self.waiting:
+                kind, url, body = self.waiting.pop(source)
+                await self._capture(bookmaker, kind, url, body)
+        finally:
+            self.draining.discard(source)
+
+    async def _capture(self, bookmaker: str, kind: str, url: str, body):
+        seq = next(self.sequence)
+        source = (bookmaker, url.split('?', 1)[0])
+        digest = hash(body)
+        if self.digests.get(source) == digest:
+            self.stats['duplicates'] += 1
+            return
+        self.digests[source] = digest
+
+        try:
+            if self.offload:
+                matches = await self.offload.run('capture_parse', parse_capture, body)
+            else:
+                matches = parse_capture(body)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Odds capture: parse failed for {url}: {e}")
+            return
+        if matches is None:
+            self.stats['ignored'] += 1
+            return
+        if seq < self.applied.get(source, 0):
+            self.stats['stale'] += 1
+            return
+        self.applied[source] = seq
+        self.stats['parsed'] += 1
+
+        self._merge(bookmaker, source, matches, replace=kind == 'response')
+        try:
+            await self.publish(self.snapshot_message(bookmaker))
+            self.stats['published'] += 1
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Odds capture: publish failed for {bookmaker}: {e}")
+
+    def _merge(self, bookmaker: str, source: tuple, matches: List[Dict], replace: bool):
+        book = self.books.setdefault(bookmaker, {})
+        now = time.time()
+        if replace:
+            fresh = {match['match_id'] for match in matches}
+            for match_id in [m for m, (_, src, _) in book.items() if src == source and m not in fresh]:
+                del book[match_id]
+        for match in matches:
+            book[match['match_id']] = (match, source, now)
+        for match_id in [m for m, (_, _, seen_at) in book.items() if now - seen_at > self.max_age]:
+            del book[match_id]
+        self.updated_at[bookmaker] = now
+
+    def matches(self, bookmaker: str) -> List[Dict]:
+        """Current book; received_at is when a source last refreshed the match"""
+        return [{**match, 'received_at': seen_at}
+                for match, _, seen_at in self.books.get((bookmaker or 'default').lower(), {}).values()]
+
+    def snapshot_message(self, bookmaker: str) -> Dict[str, Any]:
+        matches = self.matches(bookmaker)
+        return {
+            'type': 'odds_update',
+            'provider': bookmaker,
+            'source': 'network',
+            'healthy': True,
+            'timestamp': int(time.time()),
+            'total_matches': len(matches),
+            'matches': matches
+        }
+
+    async def wait_for_update(self, bookmaker: str, since: float, timeout: float) -> bool:
+        """True once the bookmaker's book was updated after since (polls; no page interaction)"""
+        deadline = time.time() + timeout
+        while self.updated_at.get(bookmaker, 0) <= since:
+            if time.time() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+
+class IngestPublisher:
+    """Sends odds_update messages to the engine ingest WebSocket, reconnecting lazily"""
+
+    def __init__(self, url: str, offload: OffloadExecutor = None, retry_seconds: float = 5):
+        self.url = url
+        self.offload = offload
+        self.retry_seconds = retry_seconds
+        self.ws = None
+        self.retry_at = 0.0
+        self.lock = None
+        self.stats = {'sent': 0, 'dropped': 0, 'reconnects': 0}
+
+    async def send(self, message: Dict[str, Any]):
+        if websockets is None:
+            self.stats['dropped'] += 1
+            return
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        if self.offload:
+            payload = await self.offload.run('encode', json.dumps, message)
+        else:
+            payload = json.dumps(message)
+
+        async with self.lock:
+            if self.ws is None:
+                if time.time() < self.retry_at:
+                    self.stats['dropped'] += 1
+                    return
+                try:
+                    self.ws = await websockets.connect(self.url, ping_interval=None)
+                    self.stats['reconnects'] += 1
+                    logger.info(f"Odds ingest connected: {self.url}")
+                except Exception as e:
+                    self.retry_at = time.time() + self.retry_seconds
+                    self.stats['dropped'] += 1
+                    logger.warning(f"Odds ingest unavailable ({self.url}): {e}")
+                    return
+            try:
+                await self.ws.send(payload)
+                self.stats['sent'] += 1
+            except Exception as e:
+                self.ws = None
+                self.stats['dropped'] += 1
+                logger.warning(f"Odds ingest send failed: {e}")
+
+    async def close(self):
+        if self.ws is not None:
+            try:
+                await self.ws.close()
+            except Exception:
+                pass
+            self.ws = None
@@ -0,0 +1,153 @@
+"""
+CPU Offload for Worker Event Loops
+Runs CPU-heavy stages (parse, encode) on a thread or process pool so a
+large payload never stalls WebSocket pings or other providers' polls.
+
+  thread   default; the GIL is released every switch interval, so the loop keeps running
+  process  true parallelism; arguments and results are pickled across the boundary
+  inline   run on the loop (debugging / baseline)
+
+Submissions beyond max_pending wait for a free slot (bounded queue, no unbounded
+backlog of stale payloads). LoopLagMonitor measures how late the loop wakes up.
+
+Config (env): WORKER_OFFLOAD=thread|process|inline, WORKER_OFFLOAD_WORKERS, WORKER_OFFLOAD_QUEUE
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict
+
+_parser = None
+
+
+def parse_csport_response(api_response: Dict) -> Dict:
+    """CSportOddsParser.parse_response with one parser per worker process/thread pool"""
+    global _parser
+    if _parser is None:
+        from csport_parser_final_fixed import CSportOddsParser
+        _parser = CSportOddsParser()
+    return _parser.parse_response(api_response)
+
+
+class OffloadExecutor:
+    """Bounded run_in_executor wrapper with per-stage timings"""
+
+    def __init__(self, kind: str = None, max_workers: int = None, max_pending: int = None):
+        self.kind = kind or os.getenv('WORKER_OFFLOAD', 'thread')
+        self.max_workers = max_workers or int(os.getenv('WORKER_OFFLOAD_WORKERS', '2'))
+        self.max_pending = max_pending or int(os.getenv('WORKER_OFFLOAD_QUEUE', '8'))
+        if self.kind == 'process':
+            self.pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        elif self.kind == 'thread':
+            self.pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='offload')
+        elif self.kind == 'inline':
+            self.pool = None
+        else:
+            raise ValueError(f"Unknown offload kind: {self.kind}")
+        self.slots = None
+        self.pending = 0
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'queue_wait_max_ms': 0.0, 'stages': {}}
+
+    async def run(self, stage: str, fn: Callable, *args):
+        """Run fn(*args) off the loop; waits for a slot when max_pending jobs are in flight"""
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.max_pending)
+        queued = time.perf_counter()
+        async with self.slots:
+            waited = (time.perf_counter() - queued) * 1000
+            self.stats['queue_wait_max_ms'] = max(self.stats['queue_wait_max_ms'], round(waited, 3))
+            self.stats['submitted'] += 1
+            self.pending += 1
+            started = time.perf_counter()
+            try:
+                if self.pool is None:
+                    result = fn(*args)
+                else:
+                    result = await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+                self.stats['completed'] += 1
+                return result
+            except Exception:
+                self.stats['failed'] += 1
+                raise
+            finally:
+                self.pending -= 1
+                elapsed = (time.perf_counter() - started) * 1000
+                timing = self.stats['stages'].setdefault(stage, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+                timing['count'] += 1
+                timing['total_ms'] = round(timing['total_ms'] + elapsed, 3)
+                timing['max_ms'] = round(max(timing['max_ms'], elapsed), 3)
+
+    def shutdown(self):
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class LoopLagMonitor:
+    """Sleeps interval seconds in a loop and records how late each wake-up is"""
+
+    def __init__(self, interval: float = 0.05, samples: int = 1200):
+        self.interval = interval
+        self.lags = deque(maxlen=samples)
+        self.task = None
+
+    async def _watch(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self._watch())
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    def stats(self) -> Dict:
+        lags = sorted(self.lags)
+        if not lags:
+            return {'samples': 0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+        pick = lambda q: lags[min(len(lags) - 1, int(q * len(lags)))] * 1000
+        return {
+            'samples': len(lags),
+            'p50_ms': round(pick(0.50), 3),
+            'p99_ms': round(pick(0.99), 3),
+            'max_ms': round(lags[-1] * 1000, 3)
+        }
+
+
+async def measure_loop_lag(kind: str, api_response: Dict, rounds: int = 5) -> Dict:
+    """Parse a payload rounds times through the given executor kind while monitoring loop lag"""
+    executor = OffloadExecutor(kind)
+    monitor = LoopLagMonitor(interval=0.005)
+    monitor.start()
+    await asyncio.sleep(0)
+    try:
+        await executor.run('parse', parse_csport_response, {'data': api_response['data'][:1]})  # warm pool
+        monitor.lags.clear()
+        started = time.perf_counter()
+        for _ in range(rounds):
+            await executor.run('parse', parse_csport_response, api_response)
+        await asyncio.sleep(monitor.interval * 2)  # let the monitor record a wake-up that was blocked
+        return {'kind': kind, 'elapsed_ms': round((time.perf_counter() - started) * 1000, 1), **monitor.stats()}
+    finally:
+        monitor.stop()
+        executor.shutdown()
+
+
+if __name__ == '__main__':
+    import sys
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    row = [23230149, 0, 0, 64991, "Soccer", "00995000", 0, "1", "2", 0,
+           0.25, 0, 6.25, 0, -999, "4.5/5", -999, -999, -999, -999, -999, -999, -999, 1, 0, 1, 0, 0, 0, 0,
+           "1", "00000000", "639008818800000000", 1, "a1409798", "", ["00995000"],
+           "ESOCCER BATTLE - 8 MINS PLAY", "Chelsea (hotShot)", "Tottenham Hotspur (GianniKid)",
+           0.72, 0.98, 0.95, 0.65, -999, -999, -999, -999, -999, -999, 0, "S", "Live", "1H 3"]
+    payload = {'data': [list(row) for _ in range(rows)]}
+    for kind in ('inline', 'thread', 'process'):
+        print(f"[OFFLOAD] {rows} rows: {asyncio.run(measure_loop_lag(kind, payload))}")
@@ -0,0 +1,240 @@
+"""
+Page Pool
+Keeps warm Playwright pages keyed by (bookmaker, account) so repeated jobs skip
+context creation, navigation and login. Each account gets its own browser
+context (cookies and storage never leak between accounts); pages are checked
+out for a job and returned afterwards, health-checked on checkout, and the
+least recently used idle page is evicted once the pool is full. max_pages is a
+hard cap: with every page checked out, checkout waits for a release.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from playwright.async_api import Browser, BrowserContext, Page
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[str, Optional[str]]
+
+
+class PooledPage:
+    """
+    A checked-out page; warm is True when it was reused rather than created,
+    restored_version is set when its context was seeded from a stored session
+    """
+
+    __slots__ = ('key', 'page', 'warm', 'restored_version', 'checked_out_at')
+
+    def __init__(self, key: PoolKey, page: Page, warm: bool, restored_version: Optional[int] = None):
+        self.key = key
+        self.page = page
+        self.warm = warm
+        self.restored_version = restored_version
+        self.checked_out_at = time.time()
+
+
+class PagePool:
+    """
+    LRU pool of idle pages plus one browser context per (bookmaker, account)
+    """
+
+    def __init__(self, browser: Browser, context_options: Dict[str, Any], max_pages: int = 8,
+                 idle_ttl: float = 600, default_context: BrowserContext = None,
+                 state_loader: Callable[[PoolKey], Awaitable[Optional[Tuple[Dict, int]]]] = None,
+                 context_setup: Callable[[BrowserContext, str], Awaitable[None]] = None):
+        """
+        Args:
+            browser: Browser that owns every pooled context
+            context_options: new_context() options for per-account contexts
+            max_pages: Upper bound on open pages (idle + checked out)
+            idle_ttl: Idle pages older than this are closed instead of reused
+            default_context: Shared context for jobs without an account (e.g. test jobs)
+            state_loader: Returns (storage_state, version) to seed a new account context
+            context_setup: Called with every new account context and its bookmaker (e.g. request routes)
+        """
+        self.browser = browser
+        self.context_options = context_options
+        self.max_pages = max_pages
+        self.idle_ttl = idle_ttl
+        self.default_context = default_context
+        self.state_loader = state_loader
+        self.context_setup = context_setup
+        self.restored_versions: Dict[PoolKey, int] = {}
+        self.contexts: Dict[PoolKey, BrowserContext] = {}
+        self.idle: 'OrderedDict[int, Tuple[PoolKey, Page, float]]' = OrderedDict()
+        self.in_use = 0
+        self.context_lock = None
+        self.slot_freed = None
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'health_failures': 0, 'waits': 0}
+
+    @staticmethod
+    def key(bookmaker: str, account: Optional[str] = None) -> PoolKey:
+        return ((bookmaker or 'default').lower(), account)
+
+    async def context_for(self, key: PoolKey) -> BrowserContext:
+        if key[1] is None and self.default_context:
+            return self.default_context
+        if self.context_lock is None:
+            self.context_lock = asyncio.Lock()
+        # Concurrent first jobs for one account must share a single context
+        async with self.context_lock:
+            context = self.contexts.get(key)
+            if context is None:
+                options = self.context_options
+                restored = await self.state_loader(key) if self.state_loader else None
+                if restored:
+                    options = {**options, 'storage_state': restored[0]}
+                    self.restored_versions[key] = restored[1]
+                context = await self.browser.new_context(**options)
+                if self.context_setup:
+                    await self.context_setup(context, key[0])
+                self.contexts[key] = context
+                logger.info(f"Page pool: new context for {key[0]}/{key[1]}"
+                            f"{f' (session v{restored[1]})' if restored else ''}")
+        return context
+
+    def set_session_version(self, key: PoolKey, version: Optional[int]):
+        """Record which stored session version the account's context now holds (None = not validated)"""
+        if version is None:
+            self.restored_versions.pop(key, None)
+        else:
+            self.restored_versions[key] = version
+
+    @staticmethod
+    async def apply_storage_state(page: Page, state: Dict):
+        """
+        Seed the page's existing context with a stored storage_state, as new_context(storage_state=)
+        does for new ones: cookies, then each origin's localStorage (which needs a page on that origin)
+        """
+        await page.context.add_cookies(state.get('cookies', []))
+        for origin in state.get('origins', []):
+            items = origin.get('localStorage') or []
+            if not items:
+                continue
+            await page.goto(origin['origin'], wait_until='domcontentloaded')
+            await page.evaluate('items => { for (const {name, value} of items) localStorage.setItem(name, value); }',
+                                items)
+
+    async def is_healthy(self, page: Page) -> bool:
+        """Cheap liveness probe: page still open and its JS runtime responds"""
+        if page.is_closed():
+            return False
+        try:
+            return await page.evaluate('() => document.readyState') in ('interactive', 'complete')
+        except Exception:
+            return False
+
+    async def _take_idle(self, key: PoolKey) -> Optional[PooledPage]:
+        now = time.time()
+        # Most recently returned page for this key first
+        for page_id in reversed(list(self.idle)):
+            idle_key, page, returned_at = self.idle[page_id]
+            if idle_key != key:
+                continue
+            del self.idle[page_id]
+            if now - returned_at > self.idle_ttl:
+                await self._close_page(key, page, drop_context=True)
+                continue
+            if not await self.is_healthy(page):
+                self.stats['health_failures'] += 1
+                await self._close_page(key, page)
+                continue
+            self.stats['hits'] += 1
+            self.in_use += 1
+            return PooledPage(key, page, warm=True, restored_version=self.restored_versions.get(key))
+        return None
+
+    def _free_slot(self):
+        self.in_use -= 1
+        if self.slot_freed is not None:
+            self.slot_freed.set()
+
+    async def checkout(self, bookmaker: str, account: Optional[str] = None) -> PooledPage:
+        key = self.key(bookmaker, account)
+        if self.slot_freed is None:
+            self.slot_freed = asyncio.Event()
+
+        while True:
+            lease = await self._take_idle(key)
+            if lease is not None:
+                return lease
+            if self.in_use < self.max_pages:
+                break
+            # Every page is checked out: wait for one to come back (it may be ours, warm)
+            self.stats['waits'] += 1
+            self.slot_freed.clear()
+            await self.slot_freed.wait()
+
+        self.stats['misses'] += 1
+        self.in_use += 1  # reserve the slot before awaiting eviction or page creation
+        while self.idle and len(self.idle) + self.in_use > self.max_pages:
+            await self._evict_lru()
+        try:
+            context = await self.context_for(key)
+            page = await context.new_page()
+        except Exception:
+            self._free_slot()
+            raise
+        return PooledPage(key, page, warm=False, restored_version=self.restored_versions.get(key))
+
+    async def release(self, lease: PooledPage, healthy: bool = True):
+        """Return a page to the pool; unhealthy pages (failed jobs) are closed instead"""
+        if not healthy or lease.page.is_closed():
+            await self._close_page(lease.key, lease.page)
+            self._free_slot()
+            return
+        self.idle[id(lease.page)] = (lease.key, lease.page, time.time())
+        self._free_slot()
+
+    @asynccontextmanager
+    async def page(self, bookmaker: str, account: Optional[str] = None):
+        """async with pool.page('qq188', 'user1') as lease: ... (closed on exception, pooled otherwise)"""
+        lease = await self.checkout(bookmaker, account)
+        try:
+            yield lease
+        except Exception:
+            await self.release(lease, healthy=False)
+            raise
+        else:
+            await self.release(lease)
+
+    async def _evict_lru(self):
+        _, (key, page, _) = self.idle.popitem(last=False)
+        self.stats['evictions'] += 1
+        await self._close_page(key, page, drop_context=True)
+
+    async def _close_page(self, key: PoolKey, page: Page, drop_context: bool = False):
+        try:
+            if not page.is_closed():
+                await page.close()
+        except Exception as e:
+            logger.warning(f"Page pool: close failed for {key}: {e}")
+
+        # Evicted accounts lose their context once none of its pages remain;
+        # a crashed page keeps it so the next checkout still has the cookies
+        context = self.contexts.get(key) if drop_context else None
+        if context is not None and not any(k == key for k, _, _ in self.idle.values()):
+            try:
+                if not context.pages:
+                    del self.contexts[key]
+                    self.restored_versions.pop(key, None)
+                    await context.close()
+            except Exception as e:
+                logger.warning(f"Page pool: context close failed for {key}: {e}")
+
+    async def close(self):
+        for key, page, _ in list(self.idle.values()):
+            await self._close_page(key, page)
+        self.idle.clear()
+        for context in list(self.contexts.values()):
+            try:
+                await context.close()
+            except Exception:
+                pass
+        self.contexts.clear()
+        self.restored_versions.clear()
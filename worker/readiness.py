@@ -0,0 +1,179 @@
+"""
+Readiness Waits
+Per-bookmaker profiles of login steps, each finished by the first concrete
+signal that fires (selector visible, JS condition true, URL change, network
+response, load state); the step timeout is only a ceiling. Actual step
+durations are recorded so slow steps show up in job results and logs.
+
+Usage:
+  waits = ReadinessWaits()
+  async with waits.step(page, 'qq188', 'logged_in') as step:
+      await page.keyboard.press('Enter')       # signals are armed before the action
+  if step.signal is None: ...                   # ceiling hit
+
+Call step.skip() inside the block when the action did not happen (e.g. no
+button to click); the step is then neither waited for nor recorded.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from playwright.async_api import Page
+
+logger = logging.getLogger(__name__)
+
+Signal = Tuple[str, str]  # (kind, argument): selector | function | url | response | load_state
+
+QQ188_LOGIN_BUTTON = """() => Array.from(document.querySelectorAll('a, button, span, div')).some(el => {
+    const txt = el.innerText ? el.innerText.trim().toUpperCase() : '';
+    return txt === 'LOGIN' || txt === 'MASUK';
+})"""
+
+QQ188_BALANCE = """() => Array.from(document.querySelectorAll('span, div, b, strong')).some(el => {
+    const text = el.innerText;
+    return text && text.includes('IDR') && /[\\d,]+\\.\\d{2}/.test(text) && text.length < 20;
+})"""
+
+# step -> (signals, ceiling ms); the first signal to fire ends the step
+READINESS_PROFILES: Dict[str, Dict[str, Tuple[List[Signal], int]]] = {
+    'qq188': {
+        'landing': ([('function', QQ188_LOGIN_BUTTON)], 5000),
+        'login_form': ([('selector', 'input[type="password"]')], 10000),
+        'logged_in': ([('function', QQ188_BALANCE)], 15000),
+        'session_check': ([('function', QQ188_BALANCE)], 5000),
+    },
+    'default': {
+        'landing': ([('load_state', 'domcontentloaded')], 5000),
+        'login_form': ([('selector', 'input[type="password"]')], 10000),
+        'logged_in': ([('load_state', 'networkidle')], 15000),
+        'session_check': ([('load_state', 'networkidle')], 5000),
+    }
+}
+
+
+class StepWait:
+    """One armed step; signal is the kind that fired, None when the ceiling was hit"""
+
+    def __init__(self, page: Page, bookmaker: str, name: str, signals: List[Signal], ceiling_ms: int):
+        self.page = page
+        self.bookmaker = bookmaker
+        self.name = name
+        self.signals = signals
+        self.ceiling_ms = ceiling_ms
+        self.signal: Optional[str] = None
+        self.elapsed_ms = 0.0
+        self.tasks: Dict[asyncio.Task, str] = {}
+        self.started = 0.0
+        self.skipped = False
+
+    def _waiter(self, kind: str, argument: str):
+        page, timeout = self.page, self.ceiling_ms
+        if kind == 'selector':
+            return page.wait_for_selector(argument, state='visible', timeout=timeout)
+        if kind == 'function':
+            return page.wait_for_function(argument, timeout=timeout)
+        if kind == 'url':
+            return page.wait_for_url(re.compile(argument), timeout=timeout)
+        if kind == 'response':
+            pattern = re.compile(argument)
+            return page.wait_for_event('response', predicate=lambda r: bool(pattern.search(r.url)), timeout=timeout)
+        if kind == 'load_state':
+            return page.wait_for_load_state(argument, timeout=timeout)
+        raise ValueError(f"Unknown readiness signal: {kind}")
+
+    def arm(self):
+        self.started = time.perf_counter()
+        for kind, argument in self.signals:
+            self.tasks[asyncio.ensure_future(self._waiter(kind, argument))] = kind
+
+    def skip(self):
+        """Disarm the step: its trigger did not happen, so there is nothing to wait for"""
+        self.skipped = True
+        for task in self.tasks:
+            task.cancel()
+
+    async def wait(self) -> Optional[str]:
+        pending = set(self.tasks)
+        deadline = self.started + self.ceiling_ms / 1000
+        try:
+            while pending and self.signal is None:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    # exception() also marks failed waiters as retrieved
+                    if not task.cancelled() and task.exception() is None and self.signal is None:
+                        self.signal = self.tasks[task]
+        finally:
+            for task in pending:
+                task.cancel()
+            self.elapsed_ms = round((time.perf_counter() - self.started) * 1000, 1)
+        return self.signal
+
+
+class ReadinessWaits:
+    """Runs profile steps and keeps per (bookmaker, step) timing stats"""
+
+    def __init__(self, profiles: Dict = None):
+        self.profiles = profiles or READINESS_PROFILES
+        self.timings: Dict[Tuple[str, str], Dict] = {}
+
+    def profile_for(self, bookmaker: str) -> Dict:
+        for name, profile in self.profiles.items():
+            if name != 'default' and name in (bookmaker or ''):
+                return profile
+        return self.profiles['default']
+
+    def step(self, page: Page, bookmaker: str, name: str) -> 'ArmedStep':
+        signals, ceiling_ms = self.profile_for(bookmaker)[name]
+        return ArmedStep(self, StepWait(page, bookmaker, name, signals, ceiling_ms))
+
+    async def wait(self, page: Page, bookmaker: str, name: str) -> StepWait:
+        """Wait for a step whose trigger already happened (e.g. a navigation)"""
+        async with self.step(page, bookmaker, name) as step:
+            pass
+        return step
+
+    def record(self, step: StepWait):
+        stats = self.timings.setdefault((step.bookmaker, step.name), {
+            'count': 0, 'timeouts': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0
+        })
+        stats['count'] += 1
+        stats['timeouts'] += step.signal is None
+        stats['total_ms'] = round(stats['total_ms'] + step.elapsed_ms, 1)
+        stats['max_ms'] = max(stats['max_ms'], step.elapsed_ms)
+        stats['last_ms'] = step.elapsed_ms
+        if step.signal is None:
+            logger.warning(f"{step.bookmaker}: step '{step.name}' hit its {step.ceiling_ms} ms ceiling")
+        else:
+            logger.info(f"{step.bookmaker}: step '{step.name}' ready after {step.elapsed_ms} ms ({step.signal})")
+
+    def summary(self) -> Dict[str, Dict]:
+        return {
+            f"{bookmaker}/{name}": {**stats, 'avg_ms': round(stats['total_ms'] / stats['count'], 1)}
+            for (bookmaker, name), stats in self.timings.items()
+        }
+
+
+class ArmedStep:
+    """async with: arms the step's signals on enter, waits for the first one on exit"""
+
+    def __init__(self, waits: ReadinessWaits, step: StepWait):
+        self.waits = waits
+        self.step_wait = step
+
+    async def __aenter__(self) -> StepWait:
+        self.step_wait.arm()
+        return self.step_wait
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None or self.step_wait.skipped:
+            self.step_wait.skip()
+            return False
+        await self.step_wait.wait()
+        self.waits.record(self.step_wait)
+        return False
@@ -0,0 +1,137 @@
+"""
+Resource Blocker
+Per-bookmaker request interception for browser contexts (context.route).
+Images, fonts, media and third-party trackers are aborted before they reach
+the proxy; documents are never blocked and scripts, stylesheets and XHR/fetch
+only when they match a block pattern, so the bookmaker's own login, balance
+and bet flows keep working (WebSockets are not routed at all).
+
+  block_types      Playwright resource types to abort (image, media, font, ...)
+  block_patterns   URL regexes to abort whatever their type (analytics, chat widgets)
+  allow_patterns   URL regexes that are never blocked (captcha images, bet slips)
+
+Aborted requests are counted per bookmaker with an estimated size (typical
+bytes per resource type), next to the bytes actually loaded, so the saving
+can be read off the stats; compare the readiness 'landing' step_ms with
+RESOURCE_BLOCKING=0 for the page-load effect. Note that Playwright disables
+the HTTP cache for routed contexts.
+"""
+
+import logging
+import re
+from typing import Dict, List, Optional
+
+from playwright.async_api import BrowserContext, Request, Response, Route
+
+logger = logging.getLogger(__name__)
+
+TRACKER_PATTERNS = [
+    r'google-analytics\.com', r'googletagmanager\.com', r'doubleclick\.net', r'googlesyndication\.com',
+    r'facebook\.(net|com)/(tr|signals|en_US/fbevents)', r'connect\.facebook\.net', r'hotjar\.com',
+    r'clarity\.ms', r'yandex\.ru/(metrika|watch)', r'mc\.yandex', r'livechatinc\.com', r'tawk\.to',
+    r'zopim\.com', r'intercom\.io', r'onesignal\.com', r'sentry\.io', r'newrelic\.com', r'nr-data\.net',
+]
+
+BLOCK_PROFILES: Dict[str, Dict[str, List[str]]] = {
+    'qq188': {
+        'block_types': ['image', 'media', 'font', 'texttrack', 'eventsource', 'manifest'],
+        'block_patterns': TRACKER_PATTERNS + [r'/banner', r'/promo(tion)?s?/', r'\.(mp4|webm|gif)(\?|$)'],
+        'allow_patterns': [r'captcha', r'verif'],
+    },
+    'default': {
+        'block_types': ['image', 'media', 'font'],
+        'block_patterns': TRACKER_PATTERNS,
+        'allow_patterns': [r'captcha', r'verif', r'recaptcha', r'hcaptcha'],
+    }
+}
+
+# Typical transfer sizes, used to estimate what an aborted request would have cost
+TYPICAL_BYTES = {
+    'image': 40_000, 'media': 500_000, 'font': 35_000, 'script': 60_000,
+    'stylesheet': 20_000, 'texttrack': 5_000, 'manifest': 2_000, 'other': 10_000
+}
+
+
+class BlockProfile:
+    """Compiled block/allow rules for one bookmaker"""
+
+    def __init__(self, name: str, block_types: List[str], block_patterns: List[str], allow_patterns: List[str]):
+        self.name = name
+        self.block_types = frozenset(block_types)
+        self.block_pattern = re.compile('|'.join(block_patterns)) if block_patterns else None
+        self.allow_pattern = re.compile('|'.join(allow_patterns), re.IGNORECASE) if allow_patterns else None
+
+    def reason(self, resource_type: str, url: str) -> Optional[str]:
+        """Why the request should be aborted ('type' or 'pattern'), None to let it through"""
+        if resource_type == 'document':
+            return None  # navigations (and the login flow) are never aborted
+        if self.allow_pattern and self.allow_pattern.search(url):
+            return None
+        if resource_type in self.block_types:
+            return 'type'
+        if self.block_pattern and self.block_pattern.search(url):
+            return 'pattern'
+        return None
+
+
+class ResourceBlocker:
+    """Installs a profile's route handler on contexts and keeps per-bookmaker counters"""
+
+    def __init__(self, profiles: Dict = None, enabled: bool = True):
+        self.profiles = {
+            name: BlockProfile(name, **rules) for name, rules in (profiles or BLOCK_PROFILES).items()
+        }
+        self.enabled = enabled
+        self.stats: Dict[str, Dict] = {}
+
+    def profile_for(self, bookmaker: str) -> BlockProfile:
+        for name, profile in self.profiles.items():
+            if name != 'default' and name in (bookmaker or ''):
+                return profile
+        return self.profiles['default']
+
+    def _stats(self, name: str) -> Dict:
+        return self.stats.setdefault(name, {
+            'requests': 0, 'blocked': 0, 'blocked_by_type': {}, 'blocked_by_pattern': 0,
+            'est_bytes_saved': 0, 'bytes_loaded': 0
+        })
+
+    async def attach(self, context: BrowserContext, bookmaker: str = None):
+        """Route every request of the context through the bookmaker's profile"""
+        if not self.enabled:
+            return
+        profile = self.profile_for(bookmaker)
+        stats = self._stats(profile.name)
+
+        async def handle(route: Route, request: Request):
+            stats['requests'] += 1
+            resource_type = request.resource_type
+            reason = profile.reason(resource_type, request.url)
+            if reason is None:
+                await route.continue_()
+                return
+            stats['blocked'] += 1
+            stats['est_bytes_saved'] += TYPICAL_BYTES.get(resource_type, TYPICAL_BYTES['other'])
+            if reason == 'type':
+                by_type = stats['blocked_by_type']
+                by_type[resource_type] = by_type.get(resource_type, 0) + 1
+            else:
+                stats['blocked_by_pattern'] += 1
+            await route.abort('blockedbyclient')
+
+        def loaded(response: Response):
+            # content-length is absent for chunked bodies; those count as 0
+            try:
+                stats['bytes_loaded'] += int(response.headers.get('content-length', 0))
+            except ValueError:
+                pass
+
+        await context.route('**/*', handle)
+        context.on('response', loaded)
+        logger.info(f"Resource blocking: profile '{profile.name}' on context for {bookmaker or 'default'}")
+
+    def summary(self) -> Dict[str, Dict]:
+        return {
+            name: {**stats, 'blocked_share': round(stats['blocked'] / stats['requests'], 3) if stats['requests'] else 0.0}
+            for name, stats in self.stats.items()
+        }
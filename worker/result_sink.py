@@ -0,0 +1,124 @@
+"""
+Result Sink
+Buffers job results and writes them to a Redis Stream (jobs:results) in
+pipelined batches, flushed when max_batch results are waiting or flush_ms
+after the oldest one arrived. The stream entries' job acknowledgements ride
+in the same pipeline, so a job is only acked once its result is in Redis.
+
+Entry fields: job_id, enc ('msgpack' or 'json'), result (encoded), reported_at.
+put() waits once max_buffer results are pending (backpressure on job intake).
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+
+class ResultSink:
+    """Size/time-flushed, bounded result buffer in front of a Redis Stream"""
+
+    def __init__(self, redis_client, job_stream=None, stream: str = 'jobs:results', maxlen: int = 100000,
+                 max_batch: int = 100, flush_ms: int = 50, max_buffer: int = 1000, encoding: str = None):
+        """
+        Args:
+            redis_client: redis.asyncio client
+            job_stream: JobStream whose entries are acked together with their results
+            stream: Results stream key; trimmed to roughly maxlen entries
+            max_batch: Results per pipeline
+            flush_ms: Longest a result waits in the buffer
+            max_buffer: Pending results before put() blocks
+            encoding: 'msgpack' or 'json'; defaults to msgpack if installed
+        """
+        self.redis = redis_client
+        self.job_stream = job_stream
+        self.stream = stream
+        self.maxlen = maxlen
+        self.max_batch = max_batch
+        self.flush_interval = flush_ms / 1000
+        self.max_buffer = max_buffer
+        self.encoding = encoding or ('msgpack' if msgpack else 'json')
+        self.buffer: List[Tuple[str, Dict[str, Any], Optional[str], float]] = []
+        self.flushing = None
+        self.space = None
+        self.flusher = None
+        self.stats = {'results': 0, 'batches': 0, 'errors': 0, 'bytes': 0, 'backpressure_waits': 0}
+
+    def encode(self, result: Dict[str, Any]) -> bytes:
+        if self.encoding == 'msgpack':
+            return msgpack.packb(result, use_bin_type=True, default=str)
+        return json.dumps(result, separators=(',', ':'), default=str).encode()
+
+    def start(self):
+        self.flushing = asyncio.Lock()
+        self.space = asyncio.Condition()
+        self.flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def put(self, job_id: str, result: Dict[str, Any], entry_id: str = None):
+        if len(self.buffer) >= self.max_buffer:
+            self.stats['backpressure_waits'] += 1
+            async with self.space:
+                await self.space.wait_for(lambda: len(self.buffer) < self.max_buffer)
+        self.buffer.append((job_id, result, entry_id, time.time()))
+        if len(self.buffer) >= self.max_batch:
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Result flush failed: {e}")
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self.buffer and time.time() - self.buffer[0][3] >= self.flush_interval:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logger.error(f"Result flush failed: {e}")
+
+    async def flush(self):
+        async with self.flushing:
+            while self.buffer:
+                batch = self.buffer[:self.max_batch]
+                try:
+                    await self._write(batch)
+                except Exception:
+                    self.stats['errors'] += 1
+                    raise  # results stay buffered and are retried on the next flush
+                del self.buffer[:len(batch)]
+                async with self.space:
+                    self.space.notify_all()
+
+    async def _write(self, batch):
+        entry_ids = [entry_id for _, _, entry_id, _ in batch if entry_id]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for job_id, result, _, reported_at in batch:
+                payload = self.encode(result)
+                self.stats['bytes'] += len(payload)
+                pipe.xadd(self.stream, {
+                    'job_id': job_id or '', 'enc': self.encoding, 'result': payload, 'reported_at': reported_at
+                }, maxlen=self.maxlen, approximate=True)
+            if entry_ids and self.job_stream:
+                pipe.xack(self.job_stream.stream, self.job_stream.group, *entry_ids)
+            await pipe.execute()
+
+        self.stats['results'] += len(batch)
+        self.stats['batches'] += 1
+        if entry_ids and self.job_stream:
+            for entry_id in entry_ids:
+                self.job_stream.in_flight.pop(entry_id, None)
+            self.job_stream.stats['acked'] += len(entry_ids)
+
+    async def close(self):
+        if self.flusher:
+            self.flusher.cancel()
+            self.flusher = None
+        if self.buffer:
+            await self.flush()
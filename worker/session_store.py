@@ -0,0 +1,131 @@
+"""
+Distributed Session Store
+Encrypted Playwright storage_state per (bookmaker, account) in Redis, so any
+worker can restore a logged-in context instead of logging in again.
+
+  session:<bookmaker>:<account>          hash: state (Fernet token), version, saved_at, worker_id
+  session:<bookmaker>:<account>:lease    worker_id of the one worker allowed to log in right now
+
+Writes are versioned (compare-and-set), so a worker holding an old state can
+never overwrite a newer login, and invalidation only removes the version that
+was found to be bad.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from utils.session import SessionManager
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] session hash; ARGV: expected version (-1 = any), token, saved_at, worker_id, ttl seconds
+SAVE_SCRIPT = """
+local current = tonumber(redis.call('HGET', KEYS[1], 'version') or '0')
+local expected = tonumber(ARGV[1])
+if expected >= 0 and current ~= expected then
+    return -1
+end
+local version = current + 1
+redis.call('HSET', KEYS[1], 'state', ARGV[2], 'version', version, 'saved_at', ARGV[3], 'worker_id', ARGV[4])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[5]))
+return version
+"""
+
+# KEYS[1] session hash; ARGV[1] version found to be invalid
+INVALIDATE_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'version') == ARGV[1] then
+    return redis.call('HDEL', KEYS[1], 'state')
+end
+return 0
+"""
+
+# KEYS[1] lease key; ARGV[1] owner
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class SessionStore:
+    """Versioned, leased, encrypted storage_state records in Redis"""
+
+    def __init__(self, redis_client, session_manager: SessionManager, worker_id: str,
+                 ttl: int = 86400, lease_ttl: int = 90):
+        """
+        Args:
+            redis_client: redis.asyncio client (decode_responses=True)
+            session_manager: Fernet wrapper from utils.session
+            worker_id: Lease owner identity
+            ttl: Seconds a stored session survives without being refreshed
+            lease_ttl: Seconds a login lease is held before it lapses (crashed worker)
+        """
+        self.redis = redis_client
+        self.crypto = session_manager
+        self.worker_id = worker_id
+        self.ttl = ttl
+        self.lease_ttl = lease_ttl
+        self.stats = {'loaded': 0, 'saved': 0, 'conflicts': 0, 'invalidated': 0, 'lease_waits': 0}
+
+    @staticmethod
+    def key(bookmaker: str, account: str) -> str:
+        return f"session:{(bookmaker or 'default').lower()}:{account}"
+
+    async def load(self, bookmaker: str, account: str) -> Optional[Tuple[Dict, int]]:
+        """(storage_state, version), or None when nothing usable is stored"""
+        record = await self.redis.hgetall(self.key(bookmaker, account))
+        if not record.get('state'):
+            return None
+        try:
+            state = self.crypto.decrypt_state(record['state'])
+        except Exception as e:
+            logger.warning(f"Session for {bookmaker}/{account} could not be decrypted: {e}")
+            return None
+        self.stats['loaded'] += 1
+        return state, int(record.get('version', 0))
+
+    async def current_version(self, bookmaker: str, account: str) -> int:
+        return int(await self.redis.hget(self.key(bookmaker, account), 'version') or 0)
+
+    async def save(self, bookmaker: str, account: str, state: Dict, expected_version: int = -1) -> int:
+        """Store a new version; returns it, or -1 when someone else saved first"""
+        version = await self.redis.eval(
+            SAVE_SCRIPT, 1, self.key(bookmaker, account),
+            expected_version, self.crypto.encrypt_state(state), time.time(), self.worker_id, self.ttl
+        )
+        if int(version) < 0:
+            self.stats['conflicts'] += 1
+        else:
+            self.stats['saved'] += 1
+        return int(version)
+
+    async def invalidate(self, bookmaker: str, account: str, version: int) -> bool:
+        removed = await self.redis.eval(INVALIDATE_SCRIPT, 1, self.key(bookmaker, account), str(version))
+        if removed:
+            self.stats['invalidated'] += 1
+        return bool(removed)
+
+    async def acquire_lease(self, bookmaker: str, account: str) -> bool:
+        return bool(await self.redis.set(
+            f"{self.key(bookmaker, account)}:lease", self.worker_id, nx=True, ex=self.lease_ttl
+        ))
+
+    async def release_lease(self, bookmaker: str, account: str):
+        await self.redis.eval(RELEASE_SCRIPT, 1, f"{self.key(bookmaker, account)}:lease", self.worker_id)
+
+    async def wait_for_lease(self, bookmaker: str, account: str, poll: float = 0.5) -> bool:
+        """Acquire the login lease, waiting out another worker's login (up to lease_ttl)"""
+        deadline = time.time() + self.lease_ttl
+        waited = False
+        while time.time() < deadline:
+            if await self.acquire_lease(bookmaker, account):
+                return True
+            if not waited:
+                waited = True
+                self.stats['lease_waits'] += 1
+                logger.info(f"Session {bookmaker}/{account}: another worker is logging in, waiting")
+            await asyncio.sleep(poll)
+        return False
@@ -0,0 +1,252 @@
+"""
+Shared-Memory Odds Board
+Fixed-layout quote table in multiprocessing.shared_memory for co-located worker
+and engine processes: workers write their provider's snapshot straight into the
+board and the engine reads it from shared memory, with no socket hop.
+Lives with the worker code (the worker image only ships worker/); the engine's
+ingest server imports it from there.
+
+Layout (little endian):
+  header    <8sHHIQ    magic, version, max_providers, slots_per_provider, reserved
+  providers <32sQII    name, seq, quote count, reserved       (x max_providers)
+  slots     SLOT       received_at, match_id, league, home, away, score, time,
+                       status, 8 prices                       (x max_providers x slots)
+
+Prices are ft_hdp home/away, ft_ou over/under, ht_hdp home/away, ht_ou over/under;
+NaN marks a missing price. Text fields are UTF-8, truncated to their width
+(names to 96 bytes, which parser output stays well under).
+
+Each provider region is written by exactly one worker and guarded by its seq as
+a sequence lock (odd while the writer is mid-snapshot); the seq is also that
+region's change signal, so there is no shared counter for writers to race on.
+An idle reader costs one integer compare per provider per poll.
+
+poll() decodes changed regions into parser-style match dicts, which is what
+BackendEngine.ingest consumes. view() is a numpy structured array over the
+region itself, valid while unchanged(index, seq) holds; with numpy, a read
+copies the region out of it in one block and builds the dicts column by
+column. That costs about what json.loads of the same matches does (~20 ms for
+a full region): the board saves the worker's encode and the socket hop, not
+the decode, so readers should poll off their event loop.
+
+Usage:
+  board = SharedOddsBoard.create('arb_odds', ['C-Sport', 'nova', 'saba'])   # engine
+  board = SharedOddsBoard.attach('arb_odds')                                 # worker
+  board.publish('C-Sport', matches)                                          # worker
+  for provider, matches in board.poll().items(): ...                         # engine
+"""
+
+import math
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BOARD_MAGIC = b'ARBBOARD'
+BOARD_VERSION = 2
+HEADER = struct.Struct('<8sHHIQ')
+PROVIDER = struct.Struct('<32sQII')
+SEQ = struct.Struct('<Q')
+
+TEXT_FIELDS = [
+    ('match_id', 32), ('league', 96), ('home_team', 96), ('away_team', 96),
+    ('score', 8), ('time', 16), ('status', 16)
+]
+PRICE_FIELDS = [
+    ('ft_hdp', 'home'), ('ft_hdp', 'away'),
+    ('ft_ou', 'over'), ('ft_ou', 'under'),
+    ('ht_hdp', 'home'), ('ht_hdp', 'away'),
+    ('ht_ou', 'over'), ('ht_ou', 'under')
+]
+MARKET_SIDES: Dict[str, List[str]] = {}
+for _market, _side in PRICE_FIELDS:
+    MARKET_SIDES.setdefault(_market, []).append(_side)
+SLOT = struct.Struct('<d' + ''.join(f'{size}s' for _, size in TEXT_FIELDS) + '8d')
+SLOT_DTYPE = np.dtype(
+    [('received_at', '<f8')]
+    + [(name, f'S{size}') for name, size in TEXT_FIELDS]
+    + [(f'{market}_{side}', '<f8') for market, side in PRICE_FIELDS]
+) if np is not None else None
+NAN = float('nan')
+
+
+def _text(value, size: int) -> bytes:
+    return str(value if value is not None else '').encode()[:size]
+
+
+def _decode(value: bytes) -> str:
+    # errors='ignore' drops a multi-byte character cut by truncation
+    return value.rstrip(b'\0').decode(errors='ignore')
+
+
+class SharedOddsBoard:
+    """One region of fixed-size quote slots per provider, seqlock-protected"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.buf = shm.buf
+        self.owner = owner
+        magic, version, self.max_providers, self.slots_per_provider, _ = HEADER.unpack_from(self.buf, 0)
+        if magic != BOARD_MAGIC or version != BOARD_VERSION:
+            raise ValueError(f"{shm.name} is not a version {BOARD_VERSION} odds board")
+        self.providers_offset = HEADER.size
+        self.slots_offset = self.providers_offset + PROVIDER.size * self.max_providers
+        # Regions are fixed when the board is created
+        self.names = [
+            PROVIDER.unpack_from(self.buf, self.providers_offset + PROVIDER.size * i)[0].rstrip(b'\0').decode()
+            for i in range(self.max_providers)
+        ]
+        self.last_seq = {}
+
+    @classmethod
+    def create(cls, name: str, providers: List[str], slots_per_provider: int = 4096) -> 'SharedOddsBoard':
+        size = HEADER.size + PROVIDER.size * len(providers) + SLOT.size * slots_per_provider * len(providers)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        HEADER.pack_into(shm.buf, 0, BOARD_MAGIC, BOARD_VERSION, len(providers), slots_per_provider, 0)
+        for i, provider in enumerate(providers):
+            PROVIDER.pack_into(shm.buf, HEADER.size + PROVIDER.size * i, _text(provider, 32), 0, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedOddsBoard':
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    def provider_names(self) -> List[str]:
+        return list(self.names)
+
+    def provider_index(self, provider: str) -> int:
+        try:
+            return self.names.index(provider)
+        except ValueError:
+            raise KeyError(f"Provider {provider} has no region on board {self.shm.name}")
+
+    def _entry(self, index: int) -> int:
+        return self.providers_offset + PROVIDER.size * index
+
+    def _base(self, index: int) -> int:
+        return self.slots_offset + SLOT.size * self.slots_per_provider * index
+
+    def seq(self, index: int) -> int:
+        return SEQ.unpack_from(self.buf, self._entry(index) + 32)[0]
+
+    # Writer side (one writer per provider region)
+
+    def publish(self, provider: str, matches: List[Dict], received_at: float = None, index: int = None) -> int:
+        """Write a full provider snapshot into its region; returns quotes written"""
+        index = self.provider_index(provider) if index is None else index
+        received_at = time.time() if received_at is None else received_at
+        entry = self._entry(index)
+        seq = self.seq(index)
+        if seq & 1:
+            seq += 1  # previous writer died mid-snapshot
+        SEQ.pack_into(self.buf, entry + 32, seq + 1)
+
+        count = min(len(matches), self.slots_per_provider)
+        base = self._base(index)
+        for i in range(count):
+            match = matches[i]
+            odds = match.get('odds') or {}
+            prices = []
+            for market, side in PRICE_FIELDS:
+                value = (odds.get(market) or {}).get(side)
+                prices.append(float(value) if value else NAN)
+            SLOT.pack_into(
+                self.buf, base + SLOT.size * i,
+                match.get('received_at') or received_at,
+                *(_text(match.get(name), size) for name, size in TEXT_FIELDS),
+                *prices
+            )
+
+        name = PROVIDER.unpack_from(self.buf, entry)[0]
+        PROVIDER.pack_into(self.buf, entry, name, seq + 2, count, 0)
+        return count
+
+    # Reader side
+
+    def view(self, index: int) -> Tuple[int, Optional['np.ndarray']]:
+        """(seq, structured array over the region in place); check unchanged(index, seq) after reading"""
+        if np is None:
+            raise RuntimeError('numpy is required for zero-copy board views')
+        _, seq, count, _ = PROVIDER.unpack_from(self.buf, self._entry(index))
+        if seq & 1:
+            return seq, None
+        return seq, np.ndarray((count,), dtype=SLOT_DTYPE, buffer=self.buf, offset=self._base(index))
+
+    def unchanged(self, index: int, seq: int) -> bool:
+        return not seq & 1 and self.seq(index) == seq
+
+    @staticmethod
+    def decode_rows(rows: 'np.ndarray') -> List[Dict]:
+        """Match dicts from a copy of a region (SLOT_DTYPE rows), built column by column"""
+        names = [name for name, _ in TEXT_FIELDS]
+        texts = [[value.decode(errors='ignore') for value in rows[name].tolist()] for name in names]
+        books = []
+        for market, sides in MARKET_SIDES.items():
+            columns = []
+            for side in sides:
+                column = rows[f'{market}_{side}']
+                columns.append(np.where(np.isnan(column), None, column).tolist())
+            books.append([dict(zip(sides, prices)) for prices in zip(*columns)])
+        matches = [dict(zip(names, values)) for values in zip(*texts)]
+        for match, received_at, odds in zip(matches, rows['received_at'].tolist(), zip(*books)):
+            match['received_at'] = received_at
+            match['odds'] = dict(zip(MARKET_SIDES, odds))
+        return matches
+
+    def read_provider(self, index: int, retries: int = 100) -> Optional[List[Dict]]:
+        """Decode one provider's region into match dicts; None if the writer kept it busy"""
+        if np is not None:
+            for _ in range(retries):
+                seq, rows = self.view(index)
+                if rows is None:
+                    continue
+                rows = rows.copy()
+                if self.unchanged(index, seq):
+                    self.last_seq[index] = seq
+                    return self.decode_rows(rows)
+            return None
+
+        entry = self._entry(index)
+        base = self._base(index)
+        for _ in range(retries):
+            _, seq, count, _ = PROVIDER.unpack_from(self.buf, entry)
+            if seq & 1:
+                continue
+            matches = []
+            for i in range(count):
+                received_at, *fields = SLOT.unpack_from(self.buf, base + SLOT.size * i)
+                texts, prices = fields[:len(TEXT_FIELDS)], fields[len(TEXT_FIELDS):]
+                odds = {}
+                for (market, side), price in zip(PRICE_FIELDS, prices):
+                    odds.setdefault(market, {})[side] = None if math.isnan(price) else price
+                match = {name: _decode(value) for (name, _), value in zip(TEXT_FIELDS, texts)}
+                match['received_at'] = received_at
+                match['odds'] = odds
+                matches.append(match)
+            if self.seq(index) == seq:
+                self.last_seq[index] = seq
+                return matches
+        return None
+
+    def poll(self) -> Dict[str, List[Dict]]:
+        """Snapshots of providers whose region changed since the last poll"""
+        changed = {}
+        for index, provider in enumerate(self.names):
+            seq = self.seq(index)
+            if seq == 0 or seq == self.last_seq.get(index):
+                continue
+            matches = self.read_provider(index)
+            if matches is not None:  # a busy region is retried on the next poll
+                changed[provider] = matches
+        return changed
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -65,6 +65,31 @@ class SessionManager:
         
         return session_data
     
+    def encrypt_state(self, storage_state: Dict) -> str:
+        """
+        Encrypt a Playwright storage_state (cookies + per-origin localStorage)
+        
+        Args:
+            storage_state: Result of BrowserContext.storage_state()
+        
+        Returns:
+            Encrypted state token (string)
+        """
+        json_data = json.dumps(storage_state, separators=(',', ':'))
+        return self.fernet.encrypt(json_data.encode()).decode()
+    
+    def decrypt_state(self, encrypted_token: str) -> Dict:
+        """
+        Decrypt a storage_state token
+        
+        Args:
+            encrypted_token: Token from encrypt_state
+        
+        Returns:
+            storage_state dictionary, usable as new_context(storage_state=...)
+        """
+        return json.loads(self.fernet.decrypt(encrypted_token.encode()).decode())
+    
     @staticmethod
     def generate_key() -> str:
         """
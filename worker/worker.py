@@ -2,12 +2,16 @@
 """
 Worker Bot - Arbitrage Bot System
 Consumes jobs from Redis queue and executes them using Playwright
+
+Jobs run concurrently on one browser (Playwright async API): up to
+JOB_CONCURRENCY at once, with per-type caps from JOB_TYPE_LIMITS
+(e.g. "login=2,check_odds=6"). JOB_CONCURRENCY=1 runs jobs one at a time.
 """
 
+import asyncio
 import os
 import sys
 import time
-import json
 import logging
 import signal
 import uuid
@@ -15,9 +19,20 @@ import re
 from typing import Dict, Any, Optional
 from datetime import datetime
 from dotenv import load_dotenv
-import redis
+import redis.asyncio as aioredis
 import websocket
-from playwright.sync_api import sync_playwright, Browser, BrowserContext, Page
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+
+from job_scheduler import JobScheduler
+from job_stream import JobStream
+from odds_capture import IngestPublisher, OddsCapture, select_matches
+from offload import OffloadExecutor
+from page_pool import PagePool
+from result_sink import ResultSink
+from readiness import ReadinessWaits
+from resource_blocker import ResourceBlocker
+from session_store import SessionStore
+from utils.session import SessionManager
 
 # Configure logging
 logging.basicConfig(
@@ -42,52 +57,88 @@ class WorkerBot:
         self.engine_ws_url = config.get('engine_ws_url')
         self.redis_url = config.get('redis_url')
         self.proxy_config = config.get('proxy', {})
+        self.page_pool_config = config.get('page_pool', {})
+        self.concurrency_config = config.get('concurrency', {})
         
-        self.redis_client: Optional[redis.Redis] = None
+        self.redis_client: Optional[aioredis.Redis] = None
         self.ws_client: Optional[websocket.WebSocket] = None
         self.playwright = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
+        self.page_pool: Optional[PagePool] = None
+        self.readiness = ReadinessWaits()
+        self.resource_blocker = ResourceBlocker(enabled=config.get('resource_blocking', True))
+        self.session_store: Optional[SessionStore] = None
+        self.job_stream: Optional[JobStream] = None
+        self.result_sink: Optional[ResultSink] = None
+        self.stream_config = config.get('job_stream', {})
+        self.odds_config = config.get('odds_capture', {})
+        # Odds come from the pages' own XHR/WebSocket traffic and go straight to the engine ingest
+        self.offload = OffloadExecutor()
+        self.odds_publisher = IngestPublisher(self.odds_config.get('ingest_url', 'ws://localhost:8000/ws'),
+                                              offload=self.offload)
+        self.odds_capture = OddsCapture(self.odds_publisher.send, offload=self.offload,
+                                        max_age=self.odds_config.get('max_age', 30))
+        self.scheduler = JobScheduler(
+            self._run_job,
+            max_concurrency=self.concurrency_config.get('max_jobs', 4),
+            limits=self.concurrency_config.get('limits', {}),
+            backlog_limits=self.concurrency_config.get('backlog_limits', {})
+        )
         self.is_running = True
         
         logger.info(f"Worker initialized: {self.worker_id}")
     
-    def start(self):
+    async def start(self):
         """Start the worker bot"""
         logger.info(f"Starting worker {self.worker_id}")
         
         try:
             # Connect to Redis
-            self._connect_redis()
+            await self._connect_redis()
             
             # Connect to Engine via WebSocket
             self._connect_engine()
             
             # Initialize browser
-            self._init_browser()
+            await self._init_browser()
             
             # Start consuming jobs
-            self._consume_jobs()
+            await self._consume_jobs()
             
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, asyncio.CancelledError):
             logger.info("Received interrupt signal")
-            self.shutdown()
         except Exception as e:
             logger.error(f"Worker startup failed: {e}", exc_info=True)
-            self.shutdown()
+            await self.shutdown()
             sys.exit(1)
+        
+        await self.shutdown()
     
-    def _connect_redis(self):
+    async def _connect_redis(self):
         """Connect to Redis"""
         try:
-            self.redis_client = redis.from_url(
+            self.redis_client = aioredis.from_url(
                 self.redis_url,
                 decode_responses=True,
                 socket_timeout=5,
                 socket_connect_timeout=5
             )
-            self.redis_client.ping()
+            await self.redis_client.ping()
             logger.info("Redis connected successfully")
+            
+            self.job_stream = JobStream(self.redis_client, consumer=self.worker_id, **self.stream_config)
+            await self.job_stream.ensure_group()
+            
+            # Results go out in pipelined batches together with their job acks
+            self.result_sink = ResultSink(self.redis_client, job_stream=self.job_stream)
+            self.result_sink.start()
+            
+            # Shared logged-in sessions (needs SESSION_ENCRYPTION_KEY)
+            try:
+                self.session_store = SessionStore(self.redis_client, SessionManager(), self.worker_id)
+            except ValueError as e:
+                logger.warning(f"Session store disabled: {e}")
         except Exception as e:
             logger.error(f"Redis connection failed: {e}")
             raise
@@ -119,12 +170,12 @@ class WorkerBot:
         logger.info(f"Worker registration message: {registration_msg}")
         # TODO: Send via WebSocket when implemented
     
-    def _init_browser(self):
+    async def _init_browser(self):
         """Initialize Playwright browser"""
         try:
             logger.info("Initializing Playwright browser...")
             
-            self.playwright = sync_playwright().start()
+            self.playwright = await async_playwright().start()
             
             # Browser launch options
             browser_args = {
@@ -146,14 +197,27 @@ class WorkerBot:
                     'password': self.proxy_config.get('password')
                 }
             
-            self.browser = self.playwright.chromium.launch(**browser_args)
+            self.browser = await self.playwright.chromium.launch(**browser_args)
             
             # Create browser context
-            self.context = self.browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                locale='id-ID',
-                timezone_id='Asia/Jakarta'
+            context_options = {
+                'viewport': {'width': 1920, 'height': 1080},
+                'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+                'locale': 'id-ID',
+                'timezone_id': 'Asia/Jakarta'
+            }
+            self.context = await self.browser.new_context(**context_options)
+            await self.resource_blocker.attach(self.context)
+            
+            # Warm pages per (bookmaker, account); account-less jobs share self.context
+            self.page_pool = PagePool(
+                self.browser,
+                context_options,
+                max_pages=self.page_pool_config.get('max_pages', 8),
+                idle_ttl=self.page_pool_config.get('idle_ttl', 600),
+                default_context=self.context,
+                state_loader=self._load_stored_session if self.session_store else None,
+                context_setup=self.resource_blocker.attach
             )
             
             logger.info("Browser initialized successfully")
@@ -162,36 +226,60 @@ class WorkerBot:
             logger.error(f"Browser initialization failed: {e}")
             raise
     
-    def _consume_jobs(self):
-        """Main job consumption loop"""
-        logger.info("Starting job consumption loop...")
+    async def _consume_jobs(self):
+        """Main job consumption loop: pop jobs while the scheduler has room, run them concurrently"""
+        logger.info(f"Starting job consumption loop (max {self.scheduler.max_concurrency} concurrent jobs)...")
         
+        heartbeat = asyncio.create_task(self._heartbeat_loop())
+        last_stats = time.time()
         while self.is_running:
             try:
-                # Blocking pop from Redis queue (5 second timeout)
-                job_data = self.redis_client.blpop('jobs:queue', timeout=5)
-                
-                if job_data is None:
-                    # No job available, continue
-                    continue
+                # Only take jobs that can start soon; otherwise leave them for other workers
+                await self.scheduler.wait_for_capacity()
                 
-                # Parse job data
-                _, job_json = job_data
-                job = json.loads(job_json)
+                # Batched read from the consumer group (stale entries of dead workers first)
+                free = self.scheduler.max_backlog - self.scheduler.backlog
+                refused = 0
+                for entry_id, job in await self.job_stream.read(free):
+                    logger.info(f"Received job: {job.get('job_id')} type={job.get('type')}")
+                    job['_entry_id'] = entry_id
+                    if not await self.scheduler.submit(job):
+                        # Its type's backlog is full: leave it to another worker (or a later read)
+                        del job['_entry_id']
+                        await self.job_stream.requeue(entry_id, job)
+                        refused += 1
+                if refused:
+                    # Don't spin on a stream holding only refused types; retry once a job starts or ends
+                    await self.scheduler.wait_for_change(timeout=1)
                 
-                logger.info(f"Received job: {job.get('job_id')} type={job.get('type')}")
-                
-                # Execute job
-                result = self._execute_job(job)
-                
-                # Report result
-                self._report_result(job.get('job_id'), result)
+                if time.time() - last_stats >= 60:
+                    last_stats = time.time()
+                    logger.info(f"Job queue: {await self.job_stream.queue_stats()}")
                 
             except Exception as e:
                 logger.error(f"Job consumption error: {e}", exc_info=True)
-                time.sleep(1)  # Brief pause before retry
+                await asyncio.sleep(1)  # Brief pause before retry
+        
+        # Jobs still running during the drain keep their entries heartbeated
+        await self.scheduler.drain(timeout=30)
+        heartbeat.cancel()
     
-    def _execute_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
+    async def _heartbeat_loop(self):
+        """Keep in-flight stream entries from being claimed, independent of job intake"""
+        while True:
+            await asyncio.sleep(self.job_stream.heartbeat_interval)
+            try:
+                await self.job_stream.heartbeat()
+            except Exception as e:
+                logger.error(f"Job heartbeat failed: {e}")
+    
+    async def _run_job(self, job: Dict[str, Any]):
+        """Execute a job and report its result; the stream entry is acked with the result write"""
+        entry_id = job.pop('_entry_id', None)
+        result = await self._execute_job(job)
+        await self._report_result(job.get('job_id'), result, entry_id)
+    
+    async def _execute_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a job"""
         job_type = job.get('type')
         job_id = job.get('job_id')
@@ -202,13 +290,13 @@ class WorkerBot:
         try:
             # Route to appropriate handler
             if job_type == 'test':
-                return self._handle_test_job(payload)
+                return await self._handle_test_job(payload)
             elif job_type == 'login':
-                return self._handle_login(payload)
+                return await self._handle_login(payload)
             elif job_type == 'place_bet':
-                return self._handle_place_bet(payload)
+                return await self._handle_place_bet(payload)
             elif job_type == 'check_odds':
-                return self._handle_check_odds(payload)
+                return await self._handle_check_odds(payload)
             else:
                 return {
                     'success': False,
@@ -222,26 +310,28 @@ class WorkerBot:
                 'error': str(e)
             }
     
-    def _handle_test_job(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    async def _handle_test_job(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Handle test job"""
         logger.info(f"Test job payload: {payload}")
         
         # Simple test: open a page and take screenshot
         try:
-            page = self.context.new_page()
-            page.goto('https://example.com')
-            page.wait_for_load_state('networkidle')
-            
-            screenshot_path = f'screenshots/test_{int(time.time())}.png'
-            os.makedirs('screenshots', exist_ok=True)
-            page.screenshot(path=screenshot_path)
-            
-            page.close()
+            url = 'https://example.com'
+            async with self.page_pool.page('test') as lease:
+                page = lease.page
+                if not lease.warm or page.url.rstrip('/') != url:
+                    await page.goto(url)
+                    await page.wait_for_load_state('networkidle')
+                
+                screenshot_path = f'screenshots/test_{int(time.time())}.png'
+                os.makedirs('screenshots', exist_ok=True)
+                await page.screenshot(path=screenshot_path)
             
             return {
                 'success': True,
                 'message': 'Test job completed',
                 'screenshot': screenshot_path,
+                'warm_page': lease.warm,
                 'timestamp': time.time()
             }
         except Exception as e:
@@ -251,7 +341,7 @@ class WorkerBot:
                 'error': str(e)
             }
     
-    def _handle_place_bet(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    async def _handle_place_bet(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Handle place bet job (stub)"""
         logger.info(f"Place bet job (stub): {payload}")
         
@@ -265,21 +355,76 @@ class WorkerBot:
             'note': 'Full implementation pending in Phase 3'
         }
     
-    def _handle_check_odds(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        """Handle check odds job (stub)"""
-        logger.info(f"Check odds job (stub): {payload}")
+    async def _handle_check_odds(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Odds from the bookmaker's own XHR/WebSocket traffic (no DOM queries).
+        The page stays pooled with its capture listeners, so it keeps publishing
+        updates after the job and later jobs read the book without reloading.
+        """
+        url = payload.get('url')
+        bookmaker = (payload.get('bookmaker') or '').lower()
+        if not url or not bookmaker:
+            # bookmaker is the provider name odds_update messages are published under
+            return {
+                'success': False,
+                'error': 'Missing bookmaker or URL'
+            }
         
-        # TODO: Implement actual odds checking logic
-        # This is a placeholder for Phase 3
+        lease = None
+        try:
+            lease = await self.page_pool.checkout(bookmaker, payload.get('username'))
+            page = lease.page
+            provider = lease.key[0]
+            last_update = self.odds_capture.updated_at.get(provider, 0)
+            
+            # Sockets opened before the listeners were attached are invisible: load the page once.
+            # After that only navigate when the page has left the URL it landed on (redirects included)
+            attached = self.odds_capture.attach(page, provider)
+            navigated = attached or not self.odds_capture.on_target(page, url)
+            if navigated:
+                await page.goto(url, wait_until='domcontentloaded')
+                self.odds_capture.set_target(page, url)
+            
+            if navigated or time.time() - last_update > float(payload.get('max_staleness', 10)):
+                await self.odds_capture.wait_for_update(provider, last_update, float(payload.get('timeout', 15)))
+            
+            await self.page_pool.release(lease)
+            warm, lease = lease.warm, None
+            updated_at = self.odds_capture.updated_at.get(provider)
+            if updated_at is None:
+                return {
+                    'success': False,
+                    'error': 'No odds traffic captured',
+                    'navigated': navigated,
+                    'capture': dict(self.odds_capture.stats)
+                }
+            
+            matches = self.odds_capture.matches(provider)
+            result = {
+                'success': True,
+                'bookmaker': provider,
+                'source': 'network',
+                'navigated': navigated,
+                'warm_page': warm,
+                'age_ms': round((time.time() - updated_at) * 1000, 1),
+                'total_matches': len(matches),
+                'timestamp': datetime.now().isoformat()
+            }
+            # The full book is already published to the engine; results only carry the requested event
+            if payload.get('event_id') is not None:
+                result['matches'] = select_matches(matches, payload['event_id'], payload.get('markets'))
+            return result
         
-        return {
-            'success': True,
-            'message': 'Odds checking (stub - not implemented)',
-            'payload': payload,
-            'note': 'Full implementation pending in Phase 3'
-        }
+        except Exception as e:
+            logger.error(f"Check odds failed: {str(e)}", exc_info=True)
+            if lease:
+                await self.page_pool.release(lease, healthy=False)
+            return {
+                'success': False,
+                'error': str(e)
+            }
     
-    def _handle_login(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    async def _handle_login(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Handle login for various sportsbooks"""
         bookmaker = payload.get('bookmaker', '').lower()
         username = payload.get('username')
@@ -292,28 +437,28 @@ class WorkerBot:
                 'message': 'Missing credentials or URL'
             }
         
+        lease = None
         try:
-            # Create a new page for login
-            page = self.context.new_page()
-            page.goto(url, wait_until='networkidle')
-            
+            # Warm page for this account: still logged in means the balance is already on screen
+            lease = await self.page_pool.checkout(bookmaker or url, username)
+            page = lease.page
             balance = None
+            steps: Dict[str, float] = {}
             
-            # Detect bookmaker and use appropriate login method
-            if 'qq188' in bookmaker or 'qq188' in url:
-                balance = self._login_qq188(page, username, password)
-            elif 'bet365' in bookmaker or 'bet365' in url:
-                balance = self._login_bet365(page, username, password)
-            elif 'pinnacle' in bookmaker or 'pinnacle' in url:
-                balance = self._login_pinnacle(page, username, password)
-            elif 'betfair' in bookmaker or 'betfair' in url:
-                balance = self._login_betfair(page, username, password)
-            else:
-                # Fallback to QQ188 logic for unknown bookmakers
-                logger.info(f"Unknown bookmaker '{bookmaker}', trying QQ188 login logic")
-                balance = self._login_qq188(page, username, password)
+            if lease.warm:
+                balance = await self._read_balance(bookmaker, url, page)
+                if balance is not None:
+                    logger.info(f"Login: reused warm page for {bookmaker}/{username}")
+            
+            # Context seeded from a stored session: one navigation and a balance check, no login
+            if balance is None and lease.restored_version is not None:
+                balance = await self._check_restored_session(lease, bookmaker, url, steps)
             
-            page.close()
+            if balance is None:
+                balance = await self._fresh_login(lease, bookmaker, username, password, url, steps)
+            
+            # Logged-in pages go back to the pool, failed ones are closed
+            await self.page_pool.release(lease, healthy=balance is not None)
             
             if balance is not None:
                 return {
@@ -321,133 +466,266 @@ class WorkerBot:
                     'bookmaker': bookmaker,
                     'username': username,
                     'balance': balance,
+                    'warm_page': lease.warm,
+                    'session_version': lease.restored_version,
+                    'step_ms': steps,
                     'timestamp': datetime.now().isoformat()
                 }
             else:
                 return {
                     'status': 'error',
-                    'message': 'Failed to extract balance'
+                    'message': 'Failed to extract balance',
+                    'step_ms': steps
                 }
         
         except Exception as e:
             logger.error(f"Login failed: {str(e)}", exc_info=True)
+            if lease:
+                await self.page_pool.release(lease, healthy=False)
             return {
                 'status': 'error',
                 'message': str(e)
             }
     
-    def _login_qq188(self, page: Page, username: str, password: str) -> Optional[float]:
-        """Login to QQ188 and extract balance"""
+    async def _load_stored_session(self, key):
+        """PagePool state_loader: stored storage_state for a (bookmaker, account) context"""
+        if key[1] is None:
+            return None
+        try:
+            return await self.session_store.load(key[0], key[1])
+        except Exception as e:
+            logger.warning(f"Session restore failed for {key[0]}/{key[1]}: {e}")
+            return None
+    
+    async def _check_restored_session(self, lease, bookmaker: str, url: str,
+                                      steps: Dict[str, float]) -> Optional[float]:
+        """Validate a restored session; drops the stored version if it is no longer logged in"""
+        page = lease.page
+        await page.goto(url, wait_until='domcontentloaded')
+        check = await self.readiness.wait(page, bookmaker or url, 'session_check')
+        steps['session_check'] = check.elapsed_ms
+        balance = await self._read_balance(bookmaker, url, page) if check.signal else None
+        
+        if balance is not None:
+            logger.info(f"Login: restored session v{lease.restored_version} for {lease.key[0]}/{lease.key[1]}")
+            return balance
+        
+        logger.info(f"Login: stored session v{lease.restored_version} for {lease.key[0]}/{lease.key[1]} is stale")
+        await self.session_store.invalidate(lease.key[0], lease.key[1], lease.restored_version)
+        self.page_pool.set_session_version(lease.key, None)
+        await page.context.clear_cookies()
+        lease.restored_version = None
+        return None
+    
+    async def _fresh_login(self, lease, bookmaker: str, username: str, password: str, url: str,
+                           steps: Dict[str, float]) -> Optional[float]:
+        """Browser login under the account's lease; the resulting storage_state is shared"""
+        page = lease.page
+        store_key = lease.key[0]
+        leased = False
+        observed = -1
+        if self.session_store:
+            observed = await self.session_store.current_version(store_key, username)
+            leased = await self.session_store.wait_for_lease(store_key, username)
+        
+        # Everything after the lease is acquired runs under the finally that releases it
+        try:
+            # Another worker may have logged this account in while we waited
+            if self.session_store and await self.session_store.current_version(store_key, username) > observed:
+                stored = await self.session_store.load(store_key, username)
+                if stored:
+                    # Cookies and localStorage, like the pool's restore path
+                    await self.page_pool.apply_storage_state(page, stored[0])
+                    lease.restored_version = stored[1]
+                    self.page_pool.set_session_version(lease.key, stored[1])
+                    balance = await self._check_restored_session(lease, bookmaker, url, steps)
+                    if balance is not None:
+                        return balance
+                    observed = await self.session_store.current_version(store_key, username)
+            
+            # Landing is ready on the bookmaker's own signal, not on network idle
+            await page.goto(url, wait_until='domcontentloaded')
+            landing = await self.readiness.wait(page, bookmaker or url, 'landing')
+            steps['landing'] = landing.elapsed_ms
+            
+            # Detect bookmaker and use appropriate login method
+            if 'qq188' in bookmaker or 'qq188' in url:
+                balance = await self._login_qq188(page, username, password, steps)
+            elif 'bet365' in bookmaker or 'bet365' in url:
+                balance = await self._login_bet365(page, username, password)
+            elif 'pinnacle' in bookmaker or 'pinnacle' in url:
+                balance = await self._login_pinnacle(page, username, password)
+            elif 'betfair' in bookmaker or 'betfair' in url:
+                balance = await self._login_betfair(page, username, password)
+            else:
+                # Fallback to QQ188 logic for unknown bookmakers
+                logger.info(f"Unknown bookmaker '{bookmaker}', trying QQ188 login logic")
+                balance = await self._login_qq188(page, username, password, steps)
+            
+            if balance is not None and self.session_store:
+                version = await self.session_store.save(
+                    store_key, username, await page.context.storage_state(), expected_version=observed
+                )
+                if version > 0:
+                    self.page_pool.set_session_version(lease.key, version)
+                    logger.info(f"Login: saved session v{version} for {store_key}/{username}")
+            
+            return balance
+        finally:
+            if leased:
+                await self.session_store.release_lease(store_key, username)
+    
+    async def _login_qq188(self, page: Page, username: str, password: str,
+                           steps: Dict[str, float] = None) -> Optional[float]:
+        """Login to QQ188 and extract balance (steps collects per-step readiness times in ms)"""
+        steps = {} if steps is None else steps
         try:
-            # Page already loaded by caller
-            page.wait_for_timeout(2000)
-            
-            # 1. Find and click LOGIN/MASUK button
-            login_clicked = page.evaluate("""() => {
-                const elements = Array.from(document.querySelectorAll('a, button, span, div'));
-                const target = elements.find(el => {
-                    const txt = el.innerText ? el.innerText.trim().toUpperCase() : '';
-                    return txt === 'LOGIN' || txt === 'MASUK';
-                });
-                if (target) { target.click(); return true; }
-                return false;
-            }""")
+            # Page already loaded by caller, landing step waited for the LOGIN button
+            
+            # 1. Find and click LOGIN/MASUK button; done once the login form is visible
+            async with self.readiness.step(page, 'qq188', 'login_form') as login_form:
+                login_clicked = await page.evaluate("""() => {
+                    const elements = Array.from(document.querySelectorAll('a, button, span, div'));
+                    const target = elements.find(el => {
+                        const txt = el.innerText ? el.innerText.trim().toUpperCase() : '';
+                        return txt === 'LOGIN' || txt === 'MASUK';
+                    });
+                    if (target) { target.click(); return true; }
+                    return false;
+                }""")
+                if not login_clicked:
+                    login_form.skip()  # no click, no form: don't sit out the ceiling
             
             if not login_clicked:
                 logger.warning("QQ188: Login button not found")
                 return None
-            
-            page.wait_for_timeout(3000)
+            steps['login_form'] = login_form.elapsed_ms
             
             # 2. Input username & password
-            page.wait_for_selector('input[type="text"]', timeout=10000)
-            text_inputs = page.query_selector_all('input[type="text"]')
+            await page.wait_for_selector('input[type="text"]', timeout=10000)
+            text_inputs = await page.query_selector_all('input[type="text"]')
             
             if text_inputs:
-                text_inputs[0].fill(username)
-            
-            page.fill('input[type="password"]', password)
-            page.keyboard.press('Enter')
-            
-            logger.info("QQ188: Login processing...")
-            page.wait_for_timeout(10000)
-            
-            # 3. Find balance (IDR + format XXX,XXX.XX)
-            saldo_data = page.evaluate("""() => {
-                const allElements = Array.from(document.querySelectorAll('span, div, b, strong'));
-                
-                const candidates = allElements.filter(el => {
-                    const text = el.innerText;
-                    if (!text) return false;
-                    return text.includes('IDR') && 
-                           /[\d,]+\.\d{2}/.test(text) && 
-                           text.length < 20;
-                });
-                
-                const texts = candidates.map(el => el.innerText.trim());
-                return texts.length > 0 ? texts : ["Saldo Tidak Ketemu"];
-            }""")
+                await text_inputs[0].fill(username)
             
-            logger.info(f"QQ188: Balance candidates: {saldo_data}")
+            await page.fill('input[type="password"]', password)
             
-            if saldo_data and saldo_data[0] != "Saldo Tidak Ketemu":
-                # Extract number from "IDR 1,234.56" format
-                match = re.search(r'[\d,]+\.\d{2}', saldo_data[0])
-                if match:
-                    balance_str = match.group().replace(',', '')
-                    return float(balance_str)
+            # 3. Submit; done as soon as the IDR balance renders
+            async with self.readiness.step(page, 'qq188', 'logged_in') as logged_in:
+                await page.keyboard.press('Enter')
+                logger.info("QQ188: Login processing...")
+            steps['logged_in'] = logged_in.elapsed_ms
             
-            return None
+            # 4. Find balance
+            return await self._read_balance_qq188(page)
         
         except Exception as e:
             logger.error(f"QQ188 login error: {str(e)}", exc_info=True)
             return None
     
-    def _login_bet365(self, page: Page, username: str, password: str) -> Optional[float]:
+    async def _read_balance(self, bookmaker: str, url: str, page: Page) -> Optional[float]:
+        """Balance from an already logged-in page, None if the page is not logged in"""
+        if any(name in bookmaker or name in url for name in ('bet365', 'pinnacle', 'betfair')):
+            return None  # no balance reader for these yet
+        try:
+            return await self._read_balance_qq188(page)
+        except Exception as e:
+            logger.warning(f"Warm page balance read failed: {e}")
+        return None
+    
+    async def _read_balance_qq188(self, page: Page) -> Optional[float]:
+        """Find balance (IDR + format XXX,XXX.XX)"""
+        saldo_data = await page.evaluate("""() => {
+            const allElements = Array.from(document.querySelectorAll('span, div, b, strong'));
+            
+            const candidates = allElements.filter(el => {
+                const text = el.innerText;
+                if (!text) return false;
+                return text.includes('IDR') && 
+                       /[\d,]+\.\d{2}/.test(text) && 
+                       text.length < 20;
+            });
+            
+            const texts = candidates.map(el => el.innerText.trim());
+            return texts.length > 0 ? texts : ["Saldo Tidak Ketemu"];
+        }""")
+        
+        logger.info(f"QQ188: Balance candidates: {saldo_data}")
+        
+        if saldo_data and saldo_data[0] != "Saldo Tidak Ketemu":
+            # Extract number from "IDR 1,234.56" format
+            match = re.search(r'[\d,]+\.\d{2}', saldo_data[0])
+            if match:
+                balance_str = match.group().replace(',', '')
+                return float(balance_str)
+        
+        return None
+    
+    async def _login_bet365(self, page: Page, username: str, password: str) -> Optional[float]:
         """Login to Bet365 and extract balance (stub)"""
         logger.info("Bet365 login (stub - not implemented)")
         # TODO: Implement Bet365 login logic
         return None
     
-    def _login_pinnacle(self, page: Page, username: str, password: str) -> Optional[float]:
+    async def _login_pinnacle(self, page: Page, username: str, password: str) -> Optional[float]:
         """Login to Pinnacle and extract balance (stub)"""
         logger.info("Pinnacle login (stub - not implemented)")
         # TODO: Implement Pinnacle login logic
         return None
     
-    def _login_betfair(self, page: Page, username: str, password: str) -> Optional[float]:
+    async def _login_betfair(self, page: Page, username: str, password: str) -> Optional[float]:
         """Login to Betfair and extract balance (stub)"""
         logger.info("Betfair login (stub - not implemented)")
         # TODO: Implement Betfair login logic
         return None
     
-    def _report_result(self, job_id: str, result: Dict[str, Any]):
-        """Report job result back to engine"""
-        logger.info(f"Job {job_id} result: {result.get('success')}")
-        
-        # TODO: Send result via WebSocket or HTTP callback
-        # For now, just log
-        logger.info(f"Result for job {job_id}: {json.dumps(result, indent=2)}")
+    async def _report_result(self, job_id: str, result: Dict[str, Any], entry_id: str = None):
+        """Report job result back to engine (jobs:results stream, batched)"""
+        logger.info(f"Job {job_id} result: {result.get('success', result.get('status'))}")
+        await self.result_sink.put(job_id, result, entry_id)
     
-    def shutdown(self):
+    async def shutdown(self):
         """Graceful shutdown"""
         logger.info("Shutting down worker...")
         
         self.is_running = False
+        logger.info(f"Job stats: {self.scheduler.snapshot()}")
+        if self.result_sink:
+            try:
+                await self.result_sink.close()
+            except Exception as e:
+                logger.error(f"Final result flush failed: {e}")
+            logger.info(f"Result sink: {self.result_sink.stats}")
+        logger.info(f"Readiness step timings: {self.readiness.summary()}")
+        logger.info(f"Odds capture: {self.odds_capture.stats} ingest: {self.odds_publisher.stats}")
+        if self.resource_blocker.enabled:
+            logger.info(f"Resource blocking: {self.resource_blocker.summary()}")
+        if self.session_store:
+            logger.info(f"Session store: {self.session_store.stats}")
         
         # Close browser
+        if self.page_pool:
+            await self.page_pool.close()
+            self.page_pool = None
         if self.context:
-            self.context.close()
+            await self.context.close()
+            self.context = None
         if self.browser:
-            self.browser.close()
+            await self.browser.close()
+            self.browser = None
         if self.playwright:
-            self.playwright.stop()
+            await self.playwright.stop()
+            self.playwright = None
         
         # Close connections
+        await self.odds_publisher.close()
+        self.offload.shutdown()
         if self.redis_client:
-            self.redis_client.close()
+            await self.redis_client.close()
+            self.redis_client = None
         if self.ws_client:
             self.ws_client.close()
+            self.ws_client = None
         
         logger.info("Worker shutdown complete")
 
@@ -465,10 +743,40 @@ def load_config() -> Dict[str, Any]:
             'server': os.getenv('PROXY_SERVER'),
             'username': os.getenv('PROXY_USERNAME'),
             'password': os.getenv('PROXY_PASSWORD')
+        },
+        'odds_capture': {
+            'ingest_url': os.getenv('ODDS_INGEST_URL', 'ws://localhost:8000/ws'),
+            'max_age': float(os.getenv('ODDS_MAX_AGE', '30'))
+        },
+        'resource_blocking': os.getenv('RESOURCE_BLOCKING', '1') != '0',
+        'page_pool': {
+            'max_pages': int(os.getenv('PAGE_POOL_SIZE', '8')),
+            'idle_ttl': float(os.getenv('PAGE_POOL_IDLE_TTL', '600'))
+        },
+        'job_stream': {
+            'stream': os.getenv('JOB_STREAM', 'jobs:stream'),
+            'group': os.getenv('JOB_GROUP', 'workers'),
+            'claim_idle_ms': int(os.getenv('JOB_CLAIM_IDLE_MS', '120000')),
+            'legacy_queue': os.getenv('JOB_LEGACY_QUEUE', 'jobs:queue')
+        },
+        'concurrency': {
+            'max_jobs': int(os.getenv('JOB_CONCURRENCY', '4')),
+            'limits': parse_type_limits(os.getenv('JOB_TYPE_LIMITS', 'login=2')),
+            'backlog_limits': parse_type_limits(os.getenv('JOB_TYPE_BACKLOG', ''))
         }
     }
 
 
+def parse_type_limits(value: str) -> Dict[str, int]:
+    """"login=2,check_odds=6" -> {'login': 2, 'check_odds': 6}"""
+    limits = {}
+    for item in value.split(','):
+        if '=' in item:
+            job_type, limit = item.split('=', 1)
+            limits[job_type.strip()] = int(limit)
+    return limits
+
+
 def main():
     """Main entry point"""
     print("=" * 60)
@@ -482,17 +790,19 @@ def main():
     # Create worker
     worker = WorkerBot(config)
     
-    # Setup signal handlers
-    def signal_handler(signum, frame):
-        logger.info(f"Received signal {signum}")
-        worker.shutdown()
-        sys.exit(0)
-    
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    async def run():
+        # Setup signal handlers: stop taking jobs, let running ones finish, then shut down
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, lambda signum=signum: (
+                logger.info(f"Received signal {signum}"),
+                setattr(worker, 'is_running', False)
+            ))
+        
+        # Start worker
+        await worker.start()
     
-    # Start worker
-    worker.start()
+    asyncio.run(run())
 
 
 if __name__ == '__main__':
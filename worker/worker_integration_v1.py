@@ -17,6 +17,11 @@ except:
     print("[WARN] Parser belum tersedia, akan di-load di runtime")
     CSportOddsParser = None
 
+try:
+    from offload import OffloadExecutor, parse_csport_response
+except:
+    OffloadExecutor = None
+
 
 class SessionManager:
     """Manage login session + cookies (memory + file backup)"""
@@ -114,9 +119,11 @@ class SessionManager:
 class WorkerIntegration:
     """Worker dengan parser + session management"""
     
-    def __init__(self, provider: str = "C-Sport", backend_url: str = "ws://localhost:8000"):
+    def __init__(self, provider: str = "C-Sport", backend_url: str = "ws://localhost:8000", offload: 'OffloadExecutor' = None):
         self.provider = provider
         self.backend_url = backend_url
+        # Parse off the event loop (WORKER_OFFLOAD=thread|process|inline)
+        self.offload = offload or (OffloadExecutor() if OffloadExecutor else None)
         self.session_manager = SessionManager()
         self.parser = None
         self.ws_connected = False
@@ -197,6 +204,11 @@ class WorkerIntegration:
             if not self.parser:
                 self._init_parser()
             
+            if self.offload:
+                odds = await self.offload.run('parse', parse_csport_response, api_response)
+                print(f"[✓] Parsed {odds['total_matches']} matches")
+                return odds
+            
             if self.parser:
                 odds = self.parser.parse_response(api_response)
                 print(f"[✓] Parsed {odds['total_matches']} matches")
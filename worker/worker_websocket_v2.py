@@ -18,6 +18,13 @@ try:
 except:
     websockets = None
 
+from shared_odds_board import SharedOddsBoard
+
+try:
+    from offload import OffloadExecutor, LoopLagMonitor, parse_csport_response
+except:
+    OffloadExecutor = None
+
 
 class SessionManager:
     """Manage login session"""
@@ -74,9 +81,15 @@ class SessionManager:
 class WorkerWebSocket:
     """Worker dengan WebSocket + Mock fallback"""
     
-    def __init__(self, provider: str = "C-Sport", backend_url: str = "ws://localhost:8000/ws"):
+    def __init__(self, provider: str = "C-Sport", backend_url: str = "ws://localhost:8000/ws", board_name: str = None,
+                 offload: 'OffloadExecutor' = None):
         self.provider = provider
         self.backend_url = backend_url
+        self.board_name = board_name
+        self.board = None
+        # Parse + encode off the event loop (WORKER_OFFLOAD=thread|process|inline)
+        self.offload = offload or (OffloadExecutor() if OffloadExecutor else None)
+        self.loop_lag = LoopLagMonitor() if OffloadExecutor else None
         self.session_manager = SessionManager()
         self.parser = None
         self.ws = None
@@ -94,6 +107,20 @@ class WorkerWebSocket:
         except Exception as e:
             print(f"[!] Parser load failed: {str(e)}")
     
+    def attach_board(self) -> bool:
+        """Attach ke shared-memory odds board engine (kalau engine jalan di host yang sama)"""
+        if not self.board_name:
+            return False
+        try:
+            self.board = SharedOddsBoard.attach(self.board_name)
+            self.mode = "shm"
+            print(f"[✓] Attached to odds board {self.board_name}")
+            return True
+        except Exception as e:
+            print(f"[!] Odds board attach failed: {str(e)}")
+            self.board = None
+            return False
+    
     async def connect_websocket(self) -> bool:
         """Connect ke backend WebSocket"""
         if not websockets:
@@ -126,9 +153,16 @@ class WorkerWebSocket:
         """Send message ke backend atau save to file"""
         
         try:
-            if self.mode == "websocket" and self.connected and self.ws:
+            if self.mode == "shm" and self.board:
+                # Co-located engine: write quotes straight into shared memory
+                self.board.publish(self.provider, message['matches'])
+            elif self.mode == "websocket" and self.connected and self.ws:
                 # Send via WebSocket
-                await self.ws.send(json.dumps(message))
+                if self.offload:
+                    payload = await self.offload.run('encode', json.dumps, message)
+                else:
+                    payload = json.dumps(message)
+                await self.ws.send(payload)
             else:
                 # Mock: save to file
                 timestamp = int(time.time() * 1000)
@@ -182,9 +216,14 @@ class WorkerWebSocket:
             }
             
             # Parse
-            if self.parser:
+            if self.offload:
+                odds = await self.offload.run('parse', parse_csport_response, api_response)
+            elif self.parser:
                 odds = self.parser.parse_response(api_response)
-                
+            else:
+                odds = None
+            
+            if odds:
                 # Build message
                 message = {
                     'type': 'odds_update',
@@ -212,13 +251,16 @@ class WorkerWebSocket:
         
         print("\n[PHASE 2] Connect Backend")
         print("-"*60)
-        await self.connect_websocket()
+        if not self.attach_board():
+            await self.connect_websocket()
         
         print(f"\n[PHASE 3] Polling (Mode: {self.mode.upper()})")
         print("-"*60)
         
         start_time = time.time()
         cycles = 0
+        if self.loop_lag:
+            self.loop_lag.start()
         
         while time.time() - start_time < duration:
             cycles += 1
@@ -227,6 +269,12 @@ class WorkerWebSocket:
             await asyncio.sleep(poll_interval)
         
         await self.disconnect_websocket()
+        if self.board:
+            self.board.close()
+        if self.loop_lag:
+            self.loop_lag.stop()
+        if self.offload:
+            self.offload.shutdown()
         
         print(f"\n[SUMMARY]")
         print("-"*60)
@@ -234,6 +282,9 @@ class WorkerWebSocket:
         print(f"Cycles: {cycles}")
         print(f"Messages sent: {self.msg_count}")
         print(f"Session valid: {self.session_manager.is_valid()}")
+        if self.offload:
+            print(f"Offload ({self.offload.kind}): {self.offload.stats}")
+            print(f"Loop lag: {self.loop_lag.stats()}")
 
 
 async def main():
@@ -241,9 +292,11 @@ async def main():
     print("[WORKER WEBSOCKET V2 - WITH MOCK FALLBACK]")
     print("="*70)
     
+    # ODDS_BOARD: shared-memory board of a co-located ingest server (--board)
     worker = WorkerWebSocket(
-        provider="C-Sport",
-        backend_url="ws://localhost:8000/ws"
+        provider=os.getenv('ODDS_PROVIDER', 'C-Sport'),
+        backend_url=os.getenv('ODDS_INGEST_URL', 'ws://localhost:8000/ws'),
+        board_name=os.getenv('ODDS_BOARD') or None
     )
     
     await worker.run(duration=15, poll_interval=2.5)